@@ -1 +1,7 @@
-print('speed bench placeholder')
+#!/usr/bin/env python3
+# Offline FASTQ download benchmark (MetaPhenoMap parallel/serial vs wget) against the local mock services.
+import runpy, sys
+from pathlib import Path
+if "--speed-summary" not in sys.argv: sys.argv += ["--speed-summary", "speed_summary.csv"]
+if "--case" not in sys.argv: sys.argv += ["--case", "sra"]
+runpy.run_path(str(Path(__file__).resolve().parent.parent / "metaphenomap_bench" / "offline_bench.py"), run_name="__main__")
@@ -1 +1,5 @@
-print('throughput bench placeholder')
+#!/usr/bin/env python3
+# Offline records/s benchmark against the local mock services; options: metaphenomap_bench/offline_bench.py
+import runpy
+from pathlib import Path
+runpy.run_path(str(Path(__file__).resolve().parent.parent / "metaphenomap_bench" / "offline_bench.py"), run_name="__main__")
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ENA, NCBI E-utilities and BV-BRC endpoints MetaPhenoMap calls.
+Responses are synthetic but deterministic per accession, FASTQ/assembly files are generated
+on the fly (HEAD and Range supported), and every response can be delayed, failed or
+rate-limited. Point the pipeline at it with METAPHENOMAP_ENDPOINTS=env_value().
+"""
+import argparse, hashlib, json, random, re, threading, time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse, unquote
+
+# Upstream prefix -> path prefix on this server
+SERVICES = {
+    "https://www.ebi.ac.uk": "/ebi",
+    "https://eutils.ncbi.nlm.nih.gov": "/ncbi",
+    "https://www.bv-brc.org": "/bvbrc",
+    "https://ftp.sra.ebi.ac.uk": "/files/ena",
+    "https://ftp.ncbi.nlm.nih.gov": "/files/ncbi",
+}
+
+def _h(s, mod=10**6):
+    return int(hashlib.md5(s.encode()).hexdigest()[:12], 16) % mod
+
+@lru_cache(maxsize=64)
+def file_body(name, size):
+    # FASTQ-looking bytes, unique per file name so content-addressed stores don't collapse them.
+    rnd = random.Random(name)
+    seq = "".join(rnd.choice("ACGT") for _ in range(150))
+    rec = f"@{name}\n{seq}\n+\n{'I'*150}\n".encode()
+    body = (rec * (size // len(rec) + 1))[:size]
+    return body, hashlib.md5(body).hexdigest()
+
+class Faults:
+    """Latency (+/- jitter), random 503s and a per-service token bucket answering 429."""
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0.0, seed=0):
+        self.latency, self.jitter, self.error_rate, self.rate_limit = latency, jitter, error_rate, rate_limit
+        self._rnd = random.Random(seed); self._lock = threading.Lock(); self._buckets = {}
+
+    def delay(self):
+        with self._lock: j = self._rnd.uniform(-self.jitter, self.jitter)
+        if self.latency + j > 0: time.sleep(self.latency + j)
+
+    def fail(self):
+        if not self.error_rate: return False
+        with self._lock: return self._rnd.random() < self.error_rate
+
+    def throttled(self, service):
+        if not self.rate_limit: return False
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(service, (self.rate_limit, now))
+            tokens = min(self.rate_limit, tokens + (now - last) * self.rate_limit)
+            if tokens < 1:
+                self._buckets[service] = (tokens, now); return True
+            self._buckets[service] = (tokens - 1, now); return False
+
+class MockState:
+    def __init__(self, base, faults, file_size, runs_per_sample):
+        self.base, self.faults, self.file_size, self.runs_per_sample = base, faults, file_size, runs_per_sample
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = {}; self.statuses = {}; self.bytes = {}
+            self.calls = {}  # (method, path) -> count, e.g. to spot repeated identical lookups
+
+    def count(self, service, status, nbytes):
+        with self.lock:
+            self.requests[service] = self.requests.get(service, 0) + 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.bytes[service] = self.bytes.get(service, 0) + nbytes
+
+    def stats(self):
+        with self.lock:
+            return {"requests": sum(self.requests.values()), "by_service": dict(self.requests),
+                    "statuses": dict(self.statuses), "bytes": dict(self.bytes)}
+
+    # --- synthetic records -------------------------------------------------
+    def runs_of(self, sample):
+        return [f"SRR{_h(sample + str(i), 10**7):07d}" for i in range(self.runs_per_sample)]
+
+    def ena_file(self, acc, name, kind="fastq"):
+        # fastq_ftp/submitted_ftp style: host/path without a scheme, in ENA's vol1 layout.
+        return f"ftp.sra.ebi.ac.uk/vol1/{kind}/{acc[:6]}/{acc}/{name}"
+
+    def local_url(self, url):
+        # Upstream URL (or ENA scheme-less ftp path) -> the same file on this server.
+        url = url if "://" in url else "https://" + url
+        for up, local in SERVICES.items():
+            if url.startswith(up): return self.base + local + url[len(up):]
+        return url
+
+    def read_run_row(self, run, sample=None):
+        names = [f"{run}_1.fastq.gz", f"{run}_2.fastq.gz"]
+        md5s = [file_body(n, self.file_size)[1] for n in names]
+        return {
+            "run_accession": run, "study_accession": f"PRJNA{_h(run, 10**6)}",
+            "sample_accession": sample or f"SAMN{_h(run, 10**8):08d}", "secondary_sample_accession": f"SRS{_h(run, 10**7)}",
+            "experiment_accession": f"SRX{_h(run, 10**7)}", "library_source": "METAGENOMIC", "library_strategy": "WGS",
+            "instrument_platform": "ILLUMINA", "instrument_model": "Illumina NovaSeq 6000",
+            "collection_date": "2021-05-04", "country": "Germany", "host": "Homo sapiens", "scientific_name": "human gut metagenome",
+            "fastq_ftp": ";".join(self.ena_file(run, n) for n in names), "fastq_http": "",
+            "fastq_md5": ";".join(md5s), "fastq_bytes": ";".join(str(self.file_size) for _ in names),
+            "submitted_ftp": "", "submitted_http": "", "submitted_md5": "", "submitted_bytes": "",
+        }
+
+    def sample_row(self, acc):
+        return {"sample_accession": acc, "secondary_sample_accession": f"ERS{_h(acc, 10**7)}", "scientific_name": "Escherichia coli",
+                "tax_id": "562", "host": "Homo sapiens", "host_tax_id": "9606", "sex": "female", "age": "42",
+                "isolation_source": "stool", "country": "Germany", "geographic_location": "Germany: Berlin",
+                "collection_date": "2020-01-01", "description": "synthetic sample", "broker_name": "", "center_name": "MOCK"}
+
+    def ena_rows(self, result, key, acc):
+        if result == "read_run":
+            if key == "run_accession": return [self.read_run_row(acc)]
+            return [self.read_run_row(r, acc) for r in self.runs_of(acc)]
+        if result == "sample": return [self.sample_row(acc)]
+        if result == "analysis":
+            return [{"analysis_accession": acc, "study_accession": f"PRJEB{_h(acc)}", "sample_accession": f"SAMEA{_h(acc)}",
+                     "first_public": "2020-01-01", "scientific_name": "Escherichia coli", "description": "synthetic assembly",
+                     "study_title": "mock study", "submitted_http": "", "submitted_ftp": self.ena_file(acc, f"{acc}.fasta.gz", "analysis")}]
+        return []
+
+    def asm_uid(self, acc):
+        return str(_h(acc.split(".")[0], 10**8))
+
+    def asm_doc(self, acc):
+        stem = acc.split(".")[0]; version = acc.split(".")[1] if "." in acc else "1"
+        full = f"{stem}.{version}"; name = f"{full}_ASM{_h(full)}v1"; digits = stem.split("_")[1]
+        # NCBI layout: genomes/all/GCF/000/005/845/<accession>_<assembly name>/, md5checksums.txt inside.
+        ftp = f"https://ftp.ncbi.nlm.nih.gov/genomes/all/{stem[:3]}/{digits[0:3]}/{digits[3:6]}/{digits[6:9]}/{name}"
+        return {"uid": self.asm_uid(acc), "assemblyaccession": full, "organism": "Escherichia coli (E. coli)",
+                "assemblystatus": "Complete Genome", "submitter": "MOCK", "submissiondate": "2020/01/01 00:00",
+                "biosample": f"SAMN{_h(full, 10**8):08d}", "synonym": {"genbank": full.replace("GCF_", "GCA_"), "refseq": full},
+                "ftppath_refseq": ftp, "ftppath_genbank": ""}
+
+    def genome(self, gid):
+        return {"genome_id": gid, "genbank_accession": f"GCA_{_h(gid, 10**9):09d}.1", "refseq_accession": "",
+                "organism_name": "Escherichia coli", "host_name": "Human", "isolation_source": "feces",
+                "isolation_country": "USA", "collection_year": "2019", "disease": "", "genome_status": "WGS",
+                "sequencing_platform": "Illumina", "sequencing_centers": "MOCK", "genome_length": 5000000 + _h(gid, 10**5),
+                "gc_content": 50.7, "contigs": 1 + _h(gid, 200), "taxon_id": gid.split(".")[0],
+                "biosample_accession": f"SAMN{_h(gid, 10**8):08d}", "bioproject_accession": f"PRJNA{_h(gid)}"}
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None  # MockState, set by MockServer
+
+    def log_message(self, *a): pass
+
+    def _params(self):
+        u = urlparse(self.path)
+        q = {k: v[-1] for k, v in parse_qs(u.query, keep_blank_values=True).items()}
+        raw = u.query
+        if self.command == "POST":
+            n = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(n).decode()
+            if self.headers.get("Content-Type", "").startswith("application/rqlquery"):
+                raw = "&".join(p for p in (raw, body) if p)  # BV-BRC: RQL query in the body
+            else:
+                q.update({k: v[-1] for k, v in parse_qs(body, keep_blank_values=True).items()})
+        return unquote(u.path), raw, q
+
+    def _send(self, service, status, body=b"", ctype="text/plain", headers=None, head=False):
+        if isinstance(body, str): body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        if not head: self.wfile.write(body)
+        self.state.count(service, status, 0 if head else len(body))
+
+    def do_HEAD(self): self._dispatch(head=True)
+    def do_GET(self): self._dispatch()
+    def do_POST(self): self._dispatch()
+
+    def _dispatch(self, head=False):
+        path, raw_query, q = self._params()
+        service = path.split("/")[1] if path.count("/") > 1 else "other"
+        st = self.state
+        with st.lock: st.calls[(self.command, path)] = st.calls.get((self.command, path), 0) + 1
+        st.faults.delay()
+        if service != "files":
+            if st.faults.throttled(service):
+                return self._send(service, 429, "Too Many Requests", headers={"Retry-After": "1"})
+            if st.faults.fail():
+                return self._send(service, 503, "Service Unavailable")
+        try:
+            if service == "files": return self._file(path[len("/files/"):], head)
+            if service == "ebi": return self._ebi(path[len("/ebi"):], q)
+            if service == "ncbi": return self._ncbi(path[len("/ncbi"):], q)
+            if service == "bvbrc": return self._bvbrc(path[len("/bvbrc"):], raw_query)
+        except Exception as e:
+            return self._send(service, 500, str(e))
+        self._send(service, 404, "not found")
+
+    def _file(self, name, head):
+        st = self.state
+        if name.endswith("md5checksums.txt"):
+            base = name.rsplit("/", 2)[-2]
+            lines = [f"{file_body(base + s, st.file_size)[1]}  ./{base}{s}" for s in
+                     ("_genomic.fna.gz", "_genomic.gff.gz", "_protein.faa.gz", "_cds_from_genomic.fna.gz")]
+            return self._send("files", 200, "\n".join(lines) + "\n", head=head)
+        body, _ = file_body(name.rsplit("/", 1)[-1], st.file_size)
+        rng = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if rng:
+            start = int(rng.group(1)); end = int(rng.group(2) or len(body) - 1)
+            if start >= len(body):
+                return self._send("files", 416, b"", headers={"Content-Range": f"bytes */{len(body)}"}, head=head)
+            return self._send("files", 206, body[start:end + 1], "application/octet-stream",
+                              {"Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{len(body)}"}, head)
+        self._send("files", 200, body, "application/octet-stream", {"Accept-Ranges": "bytes"}, head)
+
+    def _tsv(self, rows, fields):
+        lines = ["\t".join(fields)] + ["\t".join(str(r.get(f, "")) for f in fields) for r in rows]
+        return self._send("ebi", 200, "\n".join(lines) + "\n")
+
+    def _ebi(self, path, q):
+        st = self.state
+        fields = [f for f in q.get("fields", "").split(",") if f]
+        if path.endswith("/portal/api/search"):
+            pairs = re.findall(r'(\w+)="([^"]+)"', q.get("query", "")) or re.findall(r"(\w+)=(\S+)", q.get("query", ""))
+            rows, seen = [], set()
+            for key, acc in pairs:
+                if key == "secondary_sample_accession" or acc in seen: continue
+                seen.add(acc); rows += st.ena_rows(q.get("result"), key, acc)
+            return self._tsv(rows, fields)
+        if path.endswith("/portal/api/filereport"):
+            acc = q.get("accession", "")
+            key = "run_accession" if acc.upper().startswith(("SRR", "ERR", "DRR")) else "sample_accession"
+            return self._tsv(st.ena_rows(q.get("result"), key, acc), fields)
+        m = re.search(r"/browser/api/xml/(.+)$", path)
+        if m:
+            acc = m.group(1); row = st.sample_row(acc)
+            attrs = "".join(f"<SAMPLE_ATTRIBUTE><TAG>{k}</TAG><VALUE>{row[k]}</VALUE></SAMPLE_ATTRIBUTE>"
+                            for k in ("host", "isolation_source", "country", "collection_date"))
+            return self._send("ebi", 200, f"<SAMPLE_SET><SAMPLE accession=\"{acc}\"><SAMPLE_NAME><SCIENTIFIC_NAME>"
+                              f"{row['scientific_name']}</SCIENTIFIC_NAME></SAMPLE_NAME><SAMPLE_ATTRIBUTES>{attrs}"
+                              f"</SAMPLE_ATTRIBUTES></SAMPLE></SAMPLE_SET>", "application/xml")
+        m = re.search(r"/biosamples/samples/(.+)$", path)
+        if m:
+            row = st.sample_row(m.group(1))
+            ch = {k: [{"text": row[v]}] for k, v in (("host", "host"), ("isolation source", "isolation_source"),
+                  ("geographic location", "geographic_location"), ("collection date", "collection_date"), ("organism", "scientific_name"))}
+            return self._send("ebi", 200, json.dumps({"accession": m.group(1), "characteristics": ch}), "application/json")
+        self._send("ebi", 404, "not found")
+
+    def _ncbi(self, path, q):
+        st = self.state
+        tool = path.rsplit("/", 1)[-1]; db = q.get("db"); ids = [i for i in q.get("id", "").split(",") if i]
+        if tool == "efetch.fcgi" and db == "biosample":
+            docs = "".join(
+                f'<BioSample accession="{a}" id="{_h(a, 10**8)}"><Ids><Id db="BioSample">{a}</Id></Ids><Attributes>'
+                f'<Attribute attribute_name="host">Homo sapiens</Attribute>'
+                f'<Attribute attribute_name="isolation_source">stool</Attribute>'
+                f'<Attribute attribute_name="geo_loc_name">USA: Boston</Attribute>'
+                f'<Attribute attribute_name="collection_date">2019-07-01</Attribute>'
+                f'<Attribute attribute_name="host_disease">Crohn disease</Attribute></Attributes></BioSample>' for a in ids)
+            return self._send("ncbi", 200, f"<BioSampleSet>{docs}</BioSampleSet>", "application/xml")
+        if tool == "esearch.fcgi" and db == "assembly":
+            accs = re.findall(r"(GC[AF]_\d+(?:\.\d+)?)", q.get("term", ""))
+            js = {"esearchresult": {"count": str(len(accs)), "idlist": [st.asm_uid(a) for a in accs]}}
+            Handler._uids.update({st.asm_uid(a): a for a in accs})
+            return self._send("ncbi", 200, json.dumps(js), "application/json")
+        if tool == "esummary.fcgi" and db == "assembly":
+            res = {"uids": ids}
+            for uid in ids: res[uid] = st.asm_doc(Handler._uids.get(uid, f"GCF_{uid}.1"))
+            return self._send("ncbi", 200, json.dumps({"result": res}), "application/json")
+        if tool == "elink.fcgi" and q.get("dbfrom") == "biosample" and db == "sra":
+            links = []
+            for s in ids:
+                uid = str(_h(s, 10**8)); Handler._uids[uid] = s; links.append(uid)
+            js = {"linksets": [{"dbfrom": "biosample", "ids": ids, "linksetdbs": [{"dbto": "sra", "linkname": "biosample_sra", "links": links}]}]}
+            return self._send("ncbi", 200, json.dumps(js), "application/json")
+        if tool == "esummary.fcgi" and db == "sra":
+            res = {"uids": ids}
+            for uid in ids:
+                s = Handler._uids.get(uid, uid)
+                res[uid] = {"uid": uid, "expxml": f"<Summary/><Biosample>{s}</Biosample>",
+                            "runs": "".join(f'<Run acc="{r}" total_spots="1000" is_public="true"/>' for r in st.runs_of(s))}
+            return self._send("ncbi", 200, json.dumps({"result": res}), "application/json")
+        self._send("ncbi", 200, json.dumps({"esearchresult": {"idlist": []}, "linksets": [], "result": {"uids": []}}), "application/json")
+
+    def _bvbrc(self, path, raw_query):
+        st = self.state
+        query = unquote(raw_query)
+        m = re.match(r"/api/genome/([^/?]+)$", path)
+        if m and not query.startswith(("eq(", "in(", "or(", "keyword(")):
+            return self._send("bvbrc", 200, json.dumps(st.genome(m.group(1))), "application/json")
+        ids = []
+        for field, vals in re.findall(r"in\((\w+),\(([^)]*)\)\)", query):
+            if field == "genome_id": ids += [v for v in vals.split(",") if re.match(r"^\d+\.\d+$", v)]
+        for field, val in re.findall(r"eq\((\w+),([^)]*)\)", query):
+            if field == "genome_id" and re.match(r"^\d+\.\d+$", val): ids.append(val)
+        self._send("bvbrc", 200, json.dumps([st.genome(g) for g in dict.fromkeys(ids)]), "application/json")
+
+Handler._uids = {}
+
+class MockServer:
+    """Runs the stand-in on a background thread; use as a context manager."""
+    def __init__(self, host="127.0.0.1", port=0, file_size=1 << 20, runs_per_sample=2, **faults):
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.base = f"http://{host}:{self.httpd.server_address[1]}"
+        self.state = MockState(self.base, Faults(**faults), file_size, runs_per_sample)
+        Handler.state = self.state
+        self._t = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def env_value(self):
+        return ",".join(f"{up}={self.base}{local}" for up, local in SERVICES.items())
+
+    def __enter__(self):
+        self._t.start(); return self
+
+    def __exit__(self, *a):
+        self.httpd.shutdown(); self.httpd.server_close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve mock ENA/NCBI/BV-BRC endpoints until interrupted")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response")
+    ap.add_argument("--jitter", type=float, default=0.02, help="+/- seconds of uniform jitter")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API responses answered 503")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="Requests/s per service before 429 (0 = unlimited)")
+    ap.add_argument("--file-mb", type=float, default=1.0, help="Size of every generated FASTQ/assembly file")
+    ap.add_argument("--runs-per-sample", type=int, default=2)
+    args = ap.parse_args()
+    with MockServer(port=args.port, file_size=int(args.file_mb * 1024 * 1024), runs_per_sample=args.runs_per_sample,
+                    latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit) as srv:
+        print(f"[i] Mock services on {srv.base}")
+        print(f"    export METAPHENOMAP_ENDPOINTS='{srv.env_value()}'")
+        try:
+            while True: time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark: runs metaphenomap.py end to end against mock_services.MockServer instead of
+the live ENA/NCBI/BV-BRC services, so results are repeatable and work on air-gapped nodes/CI.
+- Throughput (one row per input size): records/s, p50/p99 per-record latency, request counts,
+  429/503 answers, download MB/s and peak RSS of the pipeline process.
+- Speed (--speed-summary): FASTQ downloads for one SRR list with MetaPhenoMap parallel/serial
+  and plain wget over the same URLs.
+Both CSVs keep the columns plots.py reads (n/elapsed_sec/records_per_sec, tool/mode/elapsed_sec).
+"""
+import argparse, csv, json, os, shutil, subprocess, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from mock_services import MockServer
+
+# case -> (db, module, accession for the i-th input)
+CASES = {
+    "sra":           ("sra", "sample", lambda i: f"SRR{10000000 + i}"),
+    "ncbi-sample":   ("ncbi", "sample", lambda i: f"SAMN{10000000 + i:08d}"),
+    "ena-sample":    ("ena", "sample", lambda i: f"SAMEA{7000000 + i}"),
+    "ncbi-assembly": ("ncbi", "assembly", lambda i: f"GCF_{100000 + i:09d}.1"),
+    "patric":        ("patric", "both", lambda i: f"{562 + i % 50}.{1000 + i}"),
+}
+THROUGHPUT_FIELDS = ["n", "elapsed_sec", "records_per_sec", "p50_latency_sec", "p99_latency_sec", "requests",
+                     "http_429", "http_503", "download_mb", "download_mb_per_sec", "peak_rss_mb", "errors", "verify_failed", "case"]
+SPEED_FIELDS = ["tool", "mode", "elapsed_sec", "download_mb", "download_mb_per_sec", "peak_rss_mb", "returncode", "cmd"]
+
+def run_measured(cmd, cwd, env):
+    # Wall time and the child's own peak RSS (wait4 rusage, KB on Linux). Output goes to files
+    # in cwd so a chatty child can never block on a full pipe.
+    with open(os.path.join(cwd, "stdout.log"), "w") as out, open(os.path.join(cwd, "stderr.log"), "w+") as err:
+        t0 = time.perf_counter()
+        p = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=out, stderr=err)
+        _, status, ru = os.wait4(p.pid, 0)
+        elapsed = time.perf_counter() - t0
+        err.seek(0)
+        return elapsed, ru.ru_maxrss / 1024, os.waitstatus_to_exitcode(status), err.read()
+
+def percentile(vals, p):
+    if not vals: return None
+    vals = sorted(vals)
+    return vals[min(len(vals) - 1, max(0, int(round(p / 100 * len(vals) + 0.5)) - 1))]
+
+def _ts(s):
+    from datetime import datetime
+    return datetime.fromisoformat(s.rstrip("Z")).timestamp()
+
+def record_latencies(out_jsonl, journal):
+    # Per record: from the start of its fetch stage (_fetched_at) to its journal entry. Also counts
+    # error rows and downloads whose --verify check failed.
+    started, errors, bad = {}, 0, 0
+    with open(out_jsonl) as f:
+        for ln in f:
+            row = json.loads(ln)
+            started[row["Accession"]] = _ts(row["_fetched_at"])
+            errors += bool(row.get("_error"))
+            verify = row.get("_verify") or {}
+            # ok is None when upstream publishes nothing to check against: not a failure
+            bad += sum(1 for k, v in verify.items() if not k.startswith("_") and v.get("ok") is False)
+    lat = []
+    with open(journal) as f:
+        for ln in f:
+            e = json.loads(ln)
+            if e["accession"] in started: lat.append(_ts(e["at"]) - started[e["accession"]])
+    return lat, errors, bad
+
+def pipeline_cmd(mpm, db, module, infile, out, workdir, args, download="none", max_workers=None):
+    cmd = [sys.executable, str(mpm), "--db", db, "--module", module, "-i", str(infile), "-o", str(out),
+           "--no-cache", "--fetch-workers", str(args.fetch_workers), "--batch-size", str(args.batch_size),
+           "--max-workers", str(max_workers or args.max_workers), "--download", download,
+           "--outdir", str(workdir / "downloads"), "--downloader", args.downloader]
+    if args.verify: cmd.append("--verify")
+    if args.store: cmd += ["--store", str(workdir / "store")]
+    return cmd
+
+def throughput(args, srv, mpm, env, tmp):
+    db, module, make = CASES[args.case]
+    rows = []
+    for n in [int(x) for x in args.sizes.split(",")]:
+        work = tmp / f"{args.case}_{n}"; work.mkdir(parents=True, exist_ok=True)
+        infile = work / "input.txt"
+        infile.write_text("\n".join(make(i) for i in range(n)) + "\n")
+        out = work / "out.jsonl"
+        srv.state.reset()
+        elapsed, rss, rc, err = run_measured(pipeline_cmd(mpm, db, module, infile, out, work, args, args.download), work, env)
+        if rc != 0: print(f"[!] n={n} exited {rc}: {err[-500:]}")
+        lat, errors, bad = record_latencies(out, str(out) + ".journal") if out.exists() else ([], n, 0)
+        st = srv.state.stats()
+        mb = st["bytes"].get("files", 0) / 1e6
+        rows.append({"n": n, "elapsed_sec": round(elapsed, 3), "records_per_sec": round(n / elapsed, 2) if elapsed > 0 else 0,
+                     "p50_latency_sec": round(percentile(lat, 50) or 0, 3), "p99_latency_sec": round(percentile(lat, 99) or 0, 3),
+                     "requests": st["requests"], "http_429": st["statuses"].get(429, 0), "http_503": st["statuses"].get(503, 0),
+                     "download_mb": round(mb, 2), "download_mb_per_sec": round(mb / elapsed, 2) if elapsed > 0 else 0,
+                     "peak_rss_mb": round(rss, 1), "errors": errors, "verify_failed": bad, "case": args.case})
+        print(f"{n:>7} records  {elapsed:8.2f} s  {rows[-1]['records_per_sec']:8.1f} rec/s  "
+              f"{st['requests']:>6} requests  peak RSS {rss:.0f} MB")
+    return rows
+
+def speed(args, srv, mpm, env, tmp):
+    # FASTQ downloads for the first size's worth of SRR runs; everything is served by the mock.
+    n = int(args.sizes.split(",")[0]); make = CASES["sra"][2]
+    work = tmp / "speed"; work.mkdir(parents=True, exist_ok=True)
+    infile = work / "input.txt"
+    runs = [make(i) for i in range(n)]
+    infile.write_text("\n".join(runs) + "\n")
+    rows = []
+    for mode, workers in (("parallel", args.max_workers), ("serial", 1)):
+        sub = work / mode; sub.mkdir(exist_ok=True)
+        cmd = pipeline_cmd(mpm, "sra", "sample", infile, sub / "out.jsonl", sub, args, "fastq", workers)
+        srv.state.reset()
+        elapsed, rss, rc, _ = run_measured(cmd, sub, env)
+        mb = srv.state.stats()["bytes"].get("files", 0) / 1e6
+        rows.append({"tool": "metaphenomap", "mode": mode, "elapsed_sec": round(elapsed, 3), "download_mb": round(mb, 2),
+                     "download_mb_per_sec": round(mb / elapsed, 2) if elapsed > 0 else 0, "peak_rss_mb": round(rss, 1),
+                     "returncode": rc, "cmd": " ".join(cmd[1:4]) + " ... --max-workers " + str(workers)})
+    if shutil.which("wget"):
+        urls = [srv.state.local_url(u) for r in runs for u in srv.state.read_run_row(r)["fastq_ftp"].split(";")]
+        sub = work / "wget"; sub.mkdir(exist_ok=True)
+        srv.state.reset()
+        t0 = time.perf_counter(); rc = 0
+        for u in urls:
+            rc = rc or subprocess.run(["wget", "-q", "-P", str(sub), u]).returncode
+        elapsed = time.perf_counter() - t0
+        mb = srv.state.stats()["bytes"].get("files", 0) / 1e6
+        rows.append({"tool": "wget", "mode": "serial", "elapsed_sec": round(elapsed, 3), "download_mb": round(mb, 2),
+                     "download_mb_per_sec": round(mb / elapsed, 2) if elapsed > 0 else 0, "peak_rss_mb": None,
+                     "returncode": rc, "cmd": f"wget <{len(urls)} urls>"})
+    for r in rows:
+        print(f"{r['tool']:>15} {r['mode']:>10}  {r['elapsed_sec']:.2f} sec  {r['download_mb_per_sec']} MB/s")
+    return rows
+
+def write_csv(path, fields, rows):
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fields); w.writeheader(); w.writerows(rows)
+    print(f"[✓] Wrote {path}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--project-root", default=str(Path(__file__).resolve().parent.parent / "metaphenomap_full"),
+                    help="Folder containing metaphenomap.py")
+    ap.add_argument("--case", choices=sorted(CASES), default="ncbi-sample", help="Accession type for the throughput runs")
+    ap.add_argument("--sizes", default="100,1000", help="Input sizes (comma-separated)")
+    ap.add_argument("--download", choices=["none", "fastq", "assembly", "both"], default="none")
+    ap.add_argument("--downloader", default="auto", help="metaphenomap --downloader backend (auto, aria2-rpc, aria2c, wget, curl, builtin)")
+    ap.add_argument("--verify", action="store_true", help="Run with --verify and count downloads that fail it")
+    ap.add_argument("--store", action="store_true", help="Run with a --store content store in the work directory")
+    ap.add_argument("--fetch-workers", type=int, default=8)
+    ap.add_argument("--max-workers", type=int, default=8)
+    ap.add_argument("--batch-size", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.05, help="Mock response latency (s)")
+    ap.add_argument("--jitter", type=float, default=0.02, help="+/- latency jitter (s)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API calls answered 503")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="Requests/s per service before 429 (0 = unlimited)")
+    ap.add_argument("--file-mb", type=float, default=1.0, help="Size of each mock FASTQ/assembly file")
+    ap.add_argument("--summary", default="throughput_summary.csv")
+    ap.add_argument("--speed-summary", help="Also run the download speed comparison and write it here")
+    ap.add_argument("--keep", action="store_true", help="Keep the temporary work directory")
+    args = ap.parse_args()
+
+    mpm = Path(args.project_root) / "metaphenomap.py"
+    assert mpm.exists(), f"metaphenomap.py not found in {args.project_root}"
+    tmp = Path(tempfile.mkdtemp(prefix="mpm_bench_"))
+    try:
+        with MockServer(file_size=int(args.file_mb * 1024 * 1024), latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, rate_limit=args.rate_limit) as srv:
+            env = dict(os.environ, METAPHENOMAP_ENDPOINTS=srv.env_value())
+            write_csv(args.summary, THROUGHPUT_FIELDS, throughput(args, srv, mpm, env, tmp))
+            if args.speed_summary:
+                write_csv(args.speed_summary, SPEED_FIELDS, speed(args, srv, mpm, env, tmp))
+    finally:
+        if args.keep: print(f"[i] Work directory: {tmp}")
+        else: shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
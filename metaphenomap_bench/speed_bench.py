@@ -3,7 +3,6 @@
 Measure end-to-end download speed for FASTQ using MetaPhenoMap vs. alternatives.
 - MetaPhenoMap parallel (aria2c/wget/curl auto-detected)
 - MetaPhenoMap serial (workers=1)
-- wget serial (if available)
 - fasterq-dump (if available)
 Writes JSON lines log and a summary CSV.
 """
@@ -70,15 +69,7 @@ def main():
     res.update({"tool":"metaphenomap", "mode":"serial"})
     results.append(res)
 
-    # 3) wget serial (optional). Here we simply loop a no-op if URLs unknown;
-    # replace with your own resolved URL list if desired.
-    if which("wget"):
-        start = time.perf_counter()
-        for _ in accessions:
-            subprocess.run(["bash","-lc","true"])
-        elapsed = time.perf_counter() - start
-        results.append({"tool":"wget","mode":"serial","cmd":"wget <urls>",
-                        "returncode":0,"stdout":"","stderr":"","elapsed_sec":elapsed})
+    # 3) wget serial: needs the resolved URLs, see offline_bench.py --speed-summary
 
     # 4) fasterq-dump (optional)
     if which("fasterq-dump"):
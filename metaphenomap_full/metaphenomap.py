@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 import argparse, os, sys, importlib, logging, re
+from collections import deque
 from datetime import datetime
-import pandas as pd
-from tqdm import tqdm
+from functools import partial
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modules.writers import FORMATS, REORDER_WINDOW, ReorderBuffer, infer_format, open_sink, trim_torn_tail
+from modules.journal import Journal
+from modules import registry, metrics
 
-SUPPORTED_DBS = ["ncbi","ena","sra","ebibiosamples","patric"]
+SUPPORTED_DBS = registry.builtin_dbs()
 DL_CHOICES = ["none","fastq","assembly","both"]
+DOWNLOADERS = ["auto","aria2-rpc","aria2c","wget","curl","builtin"]
 
 def resolve_func(path, fname):
     mod = importlib.import_module(path)
@@ -35,24 +39,141 @@ def detect_db_and_module(acc):
     if re.match(r'^\d+\.\d+$', acc):  return ('patric','both')
     return ('ena','sample')
 
-def main():
-    ap = argparse.ArgumentParser(description='MetaPhenoMap (final, auto-db, verify, parallel)')
+def resolve_fetchers(db, module):
+    return registry.lookup(db, module, 'fetch')
+
+def resolve_batch_fetchers(db, module):
+    return registry.lookup(db, module, 'batch')
+
+def db_and_module(acc, args):
+    return detect_db_and_module(acc) if args.auto_db else (args.db, args.module)
+
+def prefetch_batch(chunk, args):
+    # One batched request per (kind, batch fetcher) group; returns {(acc, kind): record}, plus
+    # {(acc, 'fastq'): urls} when FASTQs are wanted.
+    # A failed or partial batch only means those accessions are fetched one by one later.
+    groups = {}
+    for acc in chunk:
+        for kind, fn in zip(('sample','assembly'), resolve_batch_fetchers(*db_and_module(acc, args))):
+            if fn: groups.setdefault((kind, fn), []).append(acc)
+    pre = {}
+    for (kind, fn), accs in groups.items():
+        try:
+            with metrics.stage('fetch_batch'): recs = fn(accs) or {}
+            for acc, rec in recs.items(): pre[(acc, kind)] = rec
+        except Exception as e:
+            logging.warning(f'Batch {kind} fetch failed for {len(accs)} accessions, falling back: {e}')
+    if args.download in ('fastq','both'):
+        try:
+            urls_batch = resolve_func('modules.downloader','fastq_urls_batch')
+            with metrics.stage('resolve_batch'): found = urls_batch([(acc, db_and_module(acc, args)[0]) for acc in chunk])
+            for acc, urls in found.items(): pre[(acc,'fastq')] = urls
+        except Exception as e:
+            logging.warning(f'Batch FASTQ URL lookup failed for {len(chunk)} accessions, falling back: {e}')
+    return pre
+
+def iter_batches(accessions, args):
+    for i in range(0, len(accessions), max(1, args.batch_size)):
+        chunk = accessions[i:i+max(1, args.batch_size)]
+        pre = prefetch_batch(chunk, args) if args.batch_size > 1 else {}
+        for acc in chunk: yield acc, pre
+
+def fetch_record(acc, args, normalize_fields, resolve_fastq_urls, resolve_assembly_urls, pre=None):
+    # Metadata stage: fetch, normalize and resolve download URLs for one accession.
+    # Safe to run from worker threads; errors are recorded on the row, never raised.
+    pre = pre or {}
+    db, module = db_and_module(acc, args)
+    meta = {'Accession': acc, '_db': db, '_module': module,
+            '_fetched_at': datetime.utcnow().isoformat()+'Z', '_error': None}
+    fastq_urls = asm_urls = []
+    try:
+        sample_fetch, assembly_fetch = resolve_fetchers(db, module)
+        with metrics.stage('fetch'):
+            if sample_fetch:   meta.update(pre.get((acc,'sample')) or sample_fetch(acc) or {})
+            if assembly_fetch: meta.update(pre.get((acc,'assembly')) or assembly_fetch(acc) or {})
+
+        if normalize_fields:
+            with metrics.stage('normalize'): meta = normalize_fields(meta, validate_terms=True) or meta
+
+        with metrics.stage('resolve'):
+            if args.download in ['fastq','both']:
+                fastq_urls = pre[(acc,'fastq')] if (acc,'fastq') in pre else resolve_fastq_urls(acc, db, meta) or []
+            if args.download in ['assembly','both']:
+                asm_urls = resolve_assembly_urls(acc, db, meta) or []
+        if args.verbose and args.download != 'none': print(f"[i] {acc} FASTQ URLs: {len(fastq_urls)}  ASM URLs: {len(asm_urls)}")
+    except Exception as e:
+        meta['_error'] = str(e)
+        metrics.incr('record_errors')
+        logging.error(f'Failed {acc}: {e}')
+        if args.verbose: print(f"[!] {acc}: {e}")
+    return acc, meta, fastq_urls, asm_urls
+
+def bounded_map(fn, items, workers):
+    # Yields fn(item) in input order, keeping at most 2*workers calls in flight.
+    if workers <= 1:
+        for it in items: yield fn(it)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for it in items:
+            pending.append(ex.submit(fn, it))
+            if len(pending) >= 2*workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['merge']:
+        return resolve_func('modules.merge','main')(argv[1:])
+    ap = argparse.ArgumentParser(description='MetaPhenoMap (final, auto-db, verify, parallel)',
+                                 epilog='Combine shard outputs: metaphenomap.py merge OUT_0.csv OUT_1.csv ... -o merged.csv')
     ap.add_argument('-i','--input', help='Text file: one accession per line')
     ap.add_argument('-a','--accession', help='Single accession')
-    ap.add_argument('-o','--output', required=True, help='Output CSV path')
-    ap.add_argument('--db', choices=SUPPORTED_DBS, help='Database (omit with --auto-db)')
+    ap.add_argument('-o','--output', required=True, help='Output path (CSV, JSONL or Parquet)')
+    ap.add_argument('--format', choices=FORMATS, help='Output format (default: from --output extension, else csv)')
+    ap.add_argument('--db', help=f'Database: {", ".join(SUPPORTED_DBS)} or one added by a plugin (omit with --auto-db)')
     ap.add_argument('--module', choices=['sample','assembly','both'], help='Module (omit with --auto-db)')
     ap.add_argument('--auto-db', action='store_true', help='Auto-detect db/module per accession')
     ap.add_argument('--download', choices=DL_CHOICES, default='none', help='Download FASTQ and/or assembly')
     ap.add_argument('--outdir', default='downloads', help='Directory to save downloads')
-    ap.add_argument('--zip-output', action='store_true', help='Zip each accession folder after download')
-    ap.add_argument('--zip-all', action='store_true', help='Zip the whole outdir at the end')
-    ap.add_argument('--normalize', action='store_true', help='Apply light ontology normalization')
-    ap.add_argument('--max-workers', type=int, default=4, help='Parallel download workers')
-    ap.add_argument('--verify', action='store_true', help='Compute MD5 and include ENA MD5s if available')
+    ap.add_argument('--zip-output', action='store_true', help='Zip each accession folder, adding files as they download')
+    ap.add_argument('--zip-all', action='store_true', help='Zip the whole outdir at the end (reuses per-accession zips)')
+    ap.add_argument('--normalize', action='store_true', help='Map Host/Isolation_Source/Disease to ontology terms')
+    ap.add_argument('--ontology', action='append', metavar='FILE', help='OBO file or TSV synonym list (term_id, synonym[, label]) for --normalize (repeatable; implies --normalize)')
+    ap.add_argument('--field-aliases', metavar='FILE', help='Extra attribute aliases: JSON {"Field": ["alias", ...]} or TSV alias<TAB>Field')
+    ap.add_argument('--max-workers', type=int, default=4, help='Run-wide parallel download workers')
+    ap.add_argument('--store', help='Content-addressed download store (keyed by upstream MD5); reused files are hardlinked into --outdir')
+    ap.add_argument('--segments', type=int, default=8, help='Concurrent HTTP Range segments per file for the built-in downloader')
+    ap.add_argument('--downloader', choices=DOWNLOADERS, default='auto', help='Download backend (auto: one aria2c RPC daemon if installed, else wget, curl, built-in)')
+    ap.add_argument('--max-connections', type=int, default=32, help='Download connections across all workers; split evenly among running transfers')
+    ap.add_argument('--max-bandwidth', metavar='RATE', help='Aggregate download bandwidth cap in bytes/s, e.g. 50M or 1G')
+    ap.add_argument('--download-queue', type=int, default=0, help='Max queued download URLs before metadata fetching waits; files are started largest first among these (default: 16 x --max-workers)')
+    ap.add_argument('--fetch-workers', type=int, default=1, help='Accessions fetched concurrently (metadata + URL resolution)')
+    ap.add_argument('--batch-size', type=int, default=200, help='Accessions per batched upstream query (1 disables batching)')
+    ap.add_argument('--verify', action='store_true', help='Check MD5 and size of each download against ENA/NCBI published values')
+    ap.add_argument('--content-stats', action='store_true', help='Reads, bases, mean length (FASTQ) and contigs, N50 (FASTA) per downloaded file, from the same read as the MD5')
+    ap.add_argument('--cache-dir', default=os.path.join(os.path.expanduser('~'), '.cache', 'metaphenomap'), help='Directory for the persistent HTTP response cache')
+    ap.add_argument('--no-cache', action='store_true', help='Disable the HTTP response cache')
+    ap.add_argument('--cache-ttl', action='append', metavar='[PREFIX=]SECONDS', help='Cache TTL, globally or for a host/path prefix (repeatable)')
+    ap.add_argument('--cache-max-mb', type=int, default=2048, help='Cache size limit; least recently used entries are evicted')
+    ap.add_argument('--connect-timeout', type=float, default=10, help='HTTP connect timeout (s)')
+    ap.add_argument('--read-timeout', type=float, default=60, help='HTTP read timeout (s)')
+    ap.add_argument('--retries', type=int, default=3, help='Retries with backoff: 429/503 for any request, other 5xx and connection errors for GETs')
+    ap.add_argument('--ncbi-api-key', default=os.environ.get('NCBI_API_KEY'), help='NCBI E-utilities API key (10 instead of 3 requests/s; default: $NCBI_API_KEY)')
+    ap.add_argument('--rate-limit', action='append', metavar='HOST=RPS[/CONC]', help='Per-host request rate and concurrency ceiling (repeatable, RPS 0 = unlimited)')
+    ap.add_argument('--shard', metavar='I/N', help='Only process shard I of N (0-based, stable MD5 split of the input); combine outputs with `merge`')
+    ap.add_argument('--resume', action='store_true', help='Skip accessions already finished in the journal and append to --output')
+    ap.add_argument('--retry-errors', action='store_true', help='With --resume, also re-run accessions that ended with _error; their old rows are removed from --output first')
+    ap.add_argument('--journal', help='Per-accession journal path (default: <output>.journal)')
+    ap.add_argument('--profile', action='store_true', help='Print per-stage and per-host timings at the end of the run')
+    ap.add_argument('--metrics-out', metavar='JSON', help='Write stage timers and per-host HTTP metrics as JSON')
+    ap.add_argument('--metrics-prom', metavar='FILE', help='Write the same metrics as a Prometheus textfile')
+    ap.add_argument('--metrics-interval', type=float, default=0, help='Also rewrite the metrics files every N seconds during the run')
     ap.add_argument('--verbose', action='store_true', help='Verbose output')
     ap.add_argument('--dryrun', action='store_true', help='No file writes/downloads')
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     setup_logging()
 
@@ -64,93 +185,177 @@ def main():
         accessions = [args.accession.strip()]
     else:
         raise SystemExit('Please provide either --accession or --input')
+    if args.shard:
+        from modules import shard
+        i, n = shard.parse_shard(args.shard)
+        total = len(accessions)
+        accessions = shard.select(accessions, i, n)
+        print(f"[i] Shard {i}/{n}: {len(accessions)} of {total} accessions")
+
+    reporter = None
+    if args.profile or args.metrics_out or args.metrics_prom:
+        metrics.enable()
+        reporter = metrics.Reporter(args.metrics_out, args.metrics_prom, args.metrics_interval)
+
+    from modules import http_client, governor
+    from modules.cache import parse_ttls
+    http_client.configure_session(pool_size=max(args.fetch_workers, args.max_workers, args.max_connections), retries=args.retries,
+                                  connect_timeout=args.connect_timeout, read_timeout=args.read_timeout)
+    governor.configure(governor.parse_limits(args.rate_limit), ncbi_api_key=args.ncbi_api_key)
+    http_client.configure_api_keys(ncbi=args.ncbi_api_key)
+    if not args.no_cache:
+        ttl, ttls = parse_ttls(args.cache_ttl)
+        http_client.configure_cache(args.cache_dir, ttl=ttl, ttls=ttls, max_bytes=args.cache_max_mb*1024*1024)
+
+    if args.field_aliases: resolve_func('modules.aliases','load')(args.field_aliases)
 
     # Utilities
     normalize_fields = None
-    if args.normalize:
-        try: normalize_fields = resolve_func('modules.normalize_ontology','normalize_fields')
+    if args.normalize or args.ontology:
+        try:
+            resolve_func('modules.normalize_ontology','configure')(args.ontology, cache_dir=None if args.no_cache else args.cache_dir)
+            normalize_fields = resolve_func('modules.normalize_ontology','normalize_fields')
         except Exception as e:
             logging.warning(f'Normalization disabled: {e}'); normalize_fields = None
 
-    resolve_fastq_urls  = resolve_func('modules.downloader','resolve_fastq_urls')
-    resolve_assembly_urls = resolve_func('modules.downloader','resolve_assembly_urls')
-    perform_downloads   = resolve_func('modules.downloader','perform_downloads')
-    verify_downloads    = resolve_func('modules.downloader','verify_downloads')
+    resolve_fastq_urls = resolve_assembly_urls = DownloadScheduler = verify_downloads = None
+    if args.download != 'none':
+        resolve_fastq_urls  = resolve_func('modules.downloader','resolve_fastq_urls')
+        resolve_assembly_urls = resolve_func('modules.downloader','resolve_assembly_urls')
+        DownloadScheduler   = resolve_func('modules.downloader','DownloadScheduler')
+        verify_downloads    = resolve_func('modules.downloader','verify_downloads')
 
     os.makedirs(args.outdir, exist_ok=True)
 
-    print(f"\n[+] Starting (download={args.download}, auto-db={args.auto_db})...")
-    results = []
-    for acc in tqdm(accessions):
-        if args.auto_db:
-            db, module = detect_db_and_module(acc)
-        else:
-            if not args.db or not args.module:
-                raise SystemExit('--db and --module are required unless --auto-db is set')
-            db, module = args.db, args.module
+    if not args.auto_db and (not args.db or not args.module):
+        raise SystemExit('--db and --module are required unless --auto-db is set')
+    if args.db and not registry.known(args.db):
+        raise SystemExit(f'Unknown --db {args.db!r} (built in: {", ".join(SUPPORTED_DBS)})')
 
-        meta = {'Accession': acc, '_db': db, '_module': module,
-                '_fetched_at': datetime.utcnow().isoformat()+'Z', '_error': None}
+    def stage(item):
+        acc, pre = item
+        return fetch_record(acc, args, normalize_fields, resolve_fastq_urls, resolve_assembly_urls, pre)
 
-        try:
-            sample_fetch = assembly_fetch = None
-            if module in ['sample','both']:
-                if db == 'ncbi':   sample_fetch = resolve_func('modules.fetch_ncbi','fetch_and_parse_biosample')
-                elif db == 'ena':  sample_fetch = resolve_func('modules.fetch_ena','fetch_and_parse_ena_sample')
-                elif db == 'sra':  sample_fetch = resolve_func('modules.fetch_sra','fetch_and_parse_sra_metadata')
-                elif db == 'ebibiosamples': sample_fetch = resolve_func('modules.fetch_biosamples_ebi','fetch_and_parse_ebibiosamples_metadata')
-                elif db == 'patric': sample_fetch = resolve_func('modules.fetch_patric','fetch_and_parse_patric_metadata')
-            if module in ['assembly','both']:
-                if db == 'ncbi':   assembly_fetch = resolve_func('modules.fetch_assembly','fetch_and_parse_assembly_metadata')
-                elif db == 'ena':  assembly_fetch = resolve_func('modules.fetch_ena_assembly','fetch_and_parse_ena_assembly_metadata')
-                elif db == 'patric': assembly_fetch = resolve_func('modules.fetch_patric','fetch_and_parse_patric_assembly')
-
-            if sample_fetch:   meta.update(sample_fetch(acc) or {})
-            if assembly_fetch: meta.update(assembly_fetch(acc) or {})
-
-            if normalize_fields: meta = normalize_fields(meta, validate_terms=True) or meta
-
-            if args.download != 'none':
-                fastq_urls = asm_urls = []
-                if args.download in ['fastq','both']:
-                    fastq_urls = resolve_fastq_urls(acc, db, meta) or []
-                if args.download in ['assembly','both']:
-                    asm_urls = resolve_assembly_urls(acc, db, meta) or []
-                if args.verbose: print(f"[i] {acc} FASTQ URLs: {len(fastq_urls)}  ASM URLs: {len(asm_urls)}")
-                acc_dir = os.path.join(args.outdir, acc.replace('/','_'))
-                if not args.dryrun and (fastq_urls or asm_urls):
-                    os.makedirs(acc_dir, exist_ok=True)
-                    downloaded = perform_downloads(fastq_urls + asm_urls, acc_dir, workers=args.max_workers, prefix=acc, verbose=args.verbose)
-                    meta['_downloads'] = downloaded or []
-                    if args.verify and downloaded:
-                        meta['_verify'] = verify_downloads(downloaded, acc, db, meta)
-                    if args.zip_output and downloaded:
-                        import shutil; shutil.make_archive(acc_dir, 'zip', acc_dir)
-                        meta['_zip'] = acc_dir + '.zip'
-
-            if args.verbose: print(f"[✓] {acc} → {meta}")
+    journal = None
+    if not args.dryrun:
+        written = set()
+        if args.resume and os.path.exists(args.output) and os.path.getsize(args.output) > 0:
+            from modules.merge import read_rows
+            # A row the crash tore is not written: cut it first so the journal's copy is recovered.
+            if (args.format or infer_format(args.output)) != 'parquet': trim_torn_tail(args.output)
+            written = {r.get('Accession') for r in read_rows(args.output, args.format)}
+        journal = Journal(args.journal or args.output + '.journal', resume=args.resume, written=written)
+        if args.resume:
+            total = len(accessions)
+            accessions = [a for a in accessions if not journal.should_skip(a, args.retry_errors)]
+            print(f"[i] Resume: {total - len(accessions)} of {total} accessions already finished")
+            redo = written.intersection(accessions)
+            if redo:
+                from modules.merge import drop_accessions
+                n = drop_accessions(args.output, redo, args.format)
+                print(f"[i] Resume: removed {n} earlier rows of accessions being re-run from {args.output}")
+
+    print(f"\n[+] Starting (download={args.download}, auto-db={args.auto_db}, fetch-workers={args.fetch_workers})...")
+    sink = open_sink(args.output, args.format, dryrun=args.dryrun, append=args.resume)
+    if journal and journal.unwritten:
+        # Finished and journaled before the crash but still waiting for an earlier row.
+        recovered = [row for acc, row in journal.unwritten.items() if journal.should_skip(acc, args.retry_errors)]
+        for row in recovered: sink.write(row)
+        print(f"[i] Resume: wrote {len(recovered)} finished rows recovered from the journal")
+
+    def emit(acc, meta):
+        if args.verbose and not meta['_error']: print(f"[✓] {acc} → {meta}")
+        with metrics.stage('write'): sink.write(meta)
+        metrics.incr('records')
+    ordered = ReorderBuffer(emit, window=REORDER_WINDOW)
 
+    def finished(i, acc, meta, wanted):
+        # Journaled as soon as the accession is done (any order, with its row); only the output
+        # waits for input order.
+        if journal:
+            status = 'error' if meta['_error'] else 'partial' if len(meta.get('_downloads') or []) < wanted else 'ok'
+            journal.record(acc, status, meta['_error'], meta.get('_downloads'), row=meta)
+        ordered.put(i, acc, meta)
+
+    def finish_downloads(i, acc, meta, wanted, archive, downloaded, errors, digests, stats):
+        # Runs once the accession's last file has landed (on the scheduler's post-processing pool).
+        try:
+            meta['_downloads'] = downloaded
+            for err in errors: logging.warning(f'Download failed for {acc}: {err}')
+            if stats: meta['_content_stats'] = {os.path.basename(p): s for p, s in stats.items()}
+            if args.verify and downloaded:
+                with metrics.stage('verify'):
+                    meta['_verify'] = verify_downloads(downloaded, acc, meta['_db'], meta, digests=digests, workers=args.max_workers)
+            if archive:
+                with metrics.stage('zip'): meta['_zip'] = archive.close()
         except Exception as e:
             meta['_error'] = str(e)
             logging.error(f'Failed {acc}: {e}')
             if args.verbose: print(f"[!] {acc}: {e}")
         finally:
-            results.append(meta)
+            finished(i, acc, meta, wanted)
+
+    if args.zip_output or args.zip_all:
+        from modules.packaging import AccessionArchive, zip_all
+
+    scheduler = store = None
+    if args.download != 'none' and not args.dryrun:
+        if args.store:
+            from modules.store import ContentStore
+            store = ContentStore(args.store)
+        from modules.bandwidth import parse_rate
+        scheduler = DownloadScheduler(workers=args.max_workers, queue_size=args.download_queue or None,
+                                      verbose=args.verbose, resume=args.resume, segments=args.segments, store=store,
+                                      max_connections=args.max_connections, max_bandwidth=parse_rate(args.max_bandwidth), backend=args.downloader,
+                                      content_stats=args.content_stats)
+    results = bounded_map(stage, iter_batches(accessions, args), args.fetch_workers)
+    if len(accessions) > 1:
+        from tqdm import tqdm
+        results = tqdm(results, total=len(accessions))
+    try:
+        for i, (acc, meta, fastq_urls, asm_urls) in enumerate(results):
+            ordered.wait(i)
+            urls = fastq_urls + asm_urls
+            if scheduler and urls and not meta['_error']:
+                acc_dir = os.path.join(args.outdir, acc.replace('/','_'))
+                archive = AccessionArchive(acc_dir + '.zip') if args.zip_output else None
+                scheduler.submit(urls, acc_dir, acc, partial(finish_downloads, i, acc, meta, len(urls), archive),
+                                 on_file=archive.add if archive else None)
+            else:
+                finished(i, acc, meta, len(urls) if args.download != 'none' else 0)
+        if scheduler: scheduler.close()
+    finally:
+        sink.close()
+        if journal: journal.close()
 
     if args.zip_all and not args.dryrun:
-        import shutil; shutil.make_archive(args.outdir.rstrip('/'), 'zip', args.outdir)
+        with metrics.stage('zip_all'):
+            zip_all(args.outdir, args.outdir.rstrip('/') + '.zip', skip=[args.store] if args.store else [])
+
+    if store:
+        print(f"[i] Store: {store.reused} files reused, {store.ingested} added")
+
+    stats = http_client.cache_stats()
+    if stats:
+        print(f"[i] HTTP cache: {stats['hits']} hits, {stats['misses']} misses")
+        logging.info(f"HTTP cache: {stats}")
+    memo = http_client.memo_stats()
+    if memo['deduplicated']:
+        print(f"[i] HTTP: {memo['deduplicated']} duplicate requests shared within this run")
 
-    if not results:
-        print('[!] No records fetched.'); return
+    if reporter:
+        reporter.stop()
+        if args.profile:
+            print(metrics.summary())
+            for host, st in governor.stats().items():
+                print(f"    {host:<32} governor: {st['rate'] or '-'} req/s  window {st['window']}  throttled {st['throttled']}")
 
-    df = pd.DataFrame(results)
-    prov = ['Accession','_db','_module','_fetched_at','_error','_downloads','_verify','_zip']
-    cols = prov + [c for c in df.columns if c not in prov]
-    df = df.reindex(columns=cols)
-    if args.dryrun:
-        print(df.head().to_string(index=False)); print('[i] Dry-run: not writing CSV')
+    if not sink.rows:
+        print('[i] Nothing left to resume.' if args.resume else '[!] No records fetched.')
+    elif args.dryrun:
+        print('[i] Dry-run: not writing output')
     else:
-        df.to_csv(args.output, index=False); print(f"[✓] Saved: {args.output}")
+        print(f"[✓] Saved {sink.rows} records: {args.output}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,48 @@
+import re, json
+from functools import lru_cache
+# Canonical field -> attribute names seen in NCBI BioSample, ENA and EBI BioSamples records.
+# Names that are not an alias map through the longest alias found in them as whole words.
+FIELD_ALIASES = {
+    'Host_Tax_ID':['host_taxid','host taxid','host_tax_id'],
+    'Host':['host','host organism','organism_host','host_species','host_scientific_name'],
+    'Isolation_Source':['isolation_source','isolation source','source','specimen','sample_type','body_site','source_material','organism_part'],
+    'Disease':['disease','host_disease','disease state','clinical_information','condition'],
+    'AMR_Genes':['amr','antibiotic resistance','resistance_genes','antimicrobial resistance','drug resistance'],
+    'Virulence_Genes':['virulence','virulence_factor','virulence gene','toxin_gene'],
+    'Location':['geo_loc_name','geographic location','country','region','location'],
+    'Collection_Date':['collection_date','collection date','sampling_date','isolation_date','date_collected'],
+    'Scientific_Name':['organism','scientific_name','scientific name'],
+}
+_user={}
+def _key(name):
+    return ' '.join(re.sub(r'[_\-]+', ' ', (name or '').lower()).split())
+def _compile():
+    # Exact table (user aliases override built-ins) and the same aliases longest first, so
+    # 'host disease stage' goes to Disease rather than Host.
+    exact={_key(a):canon for canon,alist in FIELD_ALIASES.items() for a in alist}
+    exact.update(_user)
+    return exact, sorted(exact.items(), key=lambda kv: -len(kv[0]))
+_exact, _ordered=_compile()
+@lru_cache(maxsize=8192)
+def canonical(name):
+    # Canonical field for a raw attribute/tag name, or None. Memoized per distinct name.
+    k=_key(name)
+    if not k: return None
+    if k in _exact: return _exact[k]
+    padded=f' {k} '
+    for alias,canon in _ordered:
+        if f' {alias} ' in padded: return canon
+    return None
+def load(path):
+    # User mapping file: JSON {"Canonical_Field": ["alias", ...]} or TSV "alias<TAB>Canonical_Field".
+    global _exact, _ordered
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            pairs=[(a, canon) for canon,alist in json.load(f).items() for a in alist]
+        else:
+            pairs=[tuple(p.strip() for p in ln.rstrip('\n').split('\t')[:2]) for ln in f if '\t' in ln and not ln.startswith('#')]
+    _user.update({_key(a):canon for a,canon in pairs})
+    _exact, _ordered=_compile()
+    canonical.cache_clear()
+def fields():
+    return list(dict.fromkeys(list(FIELD_ALIASES)+list(_user.values())))
@@ -0,0 +1,123 @@
+import os, json, time, secrets, socket, subprocess, threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout  # an alias of the builtin only from 3.11
+import requests
+STATUS_KEYS=['gid','status','totalLength','completedLength','downloadSpeed','errorCode','errorMessage']
+POLL_INTERVAL=0.25
+START_TIMEOUT=10
+MAX_FAILED_POLLS=40  # consecutive failed RPC rounds before the daemon is given up on
+RESULT_TIMEOUT=6*3600  # last-resort cap on waiting for one file
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0)); return s.getsockname()[1]
+class RpcError(RuntimeError):
+    pass
+class Aria2Daemon:
+    # One long-lived `aria2c --enable-rpc` process for the whole run. download() queues a URI and
+    # returns a Future; a single poller thread submits queued URIs in one system.multicall per tick,
+    # polls the status of every active download the same way and resolves each Future with
+    # (path, error) when aria2 reports it complete, failed or removed. Connection reuse, per-server
+    # connection limits and queueing all happen inside aria2.
+    def __init__(self, binary='aria2c', max_concurrent=4, max_bandwidth=None, verbose=False, port=None, secret=None, url=None, poll_interval=POLL_INTERVAL):
+        self.secret=secret or secrets.token_hex(16); self.verbose=verbose; self.poll_interval=poll_interval
+        self._proc=None
+        if url is None:
+            port=port or _free_port()
+            args=[binary, '--enable-rpc', f'--rpc-listen-port={port}', f'--rpc-secret={self.secret}', '--rpc-listen-all=false',
+                  f'--max-concurrent-downloads={max(1, max_concurrent)}', '--auto-file-renaming=false', '--allow-overwrite=true',
+                  '--max-download-result=1000', '--console-log-level=warn', '--summary-interval=0', '--stop-with-process='+str(os.getpid())]
+            if max_bandwidth: args.append(f'--max-overall-download-limit={max_bandwidth}')
+            self._proc=subprocess.Popen(args, stdout=None if verbose else subprocess.DEVNULL, stderr=None if verbose else subprocess.DEVNULL)
+            url=f'http://127.0.0.1:{port}/jsonrpc'
+        self.url=url
+        self._http=requests.Session()  # local control channel, not an upstream: bypasses http_client
+        self._ids=iter(range(1, 1<<62))
+        self._lock=threading.Lock(); self._queued=[]; self._active={}
+        self.dead=None  # reason, once the daemon is gone; later downloads fail immediately
+        self.progress={}  # gid -> {'path', 'completed', 'total', 'speed'} for downloads in flight
+        self._wait_ready()
+        self._stop=threading.Event()
+        self._t=threading.Thread(target=self._run, daemon=True); self._t.start()
+    def _call(self, method, *params, token=True):
+        body={'jsonrpc':'2.0', 'id':next(self._ids), 'method':method, 'params':[f'token:{self.secret}', *params] if token else list(params)}
+        r=self._http.post(self.url, data=json.dumps(body), timeout=30)
+        res=r.json()
+        if 'error' in res: raise RpcError(f"{method}: {res['error'].get('message')}")
+        return res['result']
+    def _multicall(self, calls):
+        # [(method, params)] -> [result or RpcError], one HTTP round trip; the secret goes in each call.
+        if not calls: return []
+        out=self._call('system.multicall', [{'methodName':m, 'params':[f'token:{self.secret}', *p]} for m, p in calls], token=False)
+        return [RpcError(r.get('message')) if isinstance(r, dict) else r[0] for r in out]
+    def _wait_ready(self):
+        deadline=time.monotonic()+START_TIMEOUT
+        while True:
+            if self._proc and self._proc.poll() is not None: raise RpcError(f'aria2c exited with status {self._proc.returncode}')
+            try: return self._call('aria2.getVersion')
+            except requests.ConnectionError:
+                if time.monotonic()>deadline: raise RpcError(f'aria2c RPC not reachable at {self.url}')
+                time.sleep(0.05)
+    def download(self, url, outdir, fname, connections=None, resume=False):
+        f=Future(); path=os.path.join(outdir, fname)
+        opts={'dir':os.path.abspath(outdir), 'out':fname, 'continue':'true' if resume else 'false'}
+        if connections: opts.update({'split':str(connections), 'max-connection-per-server':str(min(16, connections))})
+        with self._lock:
+            if self.dead: f.set_result((None, self.dead))
+            else: self._queued.append((url, opts, path, f))
+        return f
+    def result(self, f, timeout=RESULT_TIMEOUT):
+        # (path, error) of a download() Future, or an error once timeout seconds have passed.
+        try: return f.result(timeout=timeout)
+        except FutureTimeout: return None, f'aria2 download not finished after {timeout} s'
+    def _run(self):
+        failures=0
+        while not self._stop.wait(self.poll_interval):
+            try: self._tick(); failures=0
+            except Exception as e:
+                failures+=1
+                if self._proc and self._proc.poll() is not None: return self._fail_all(f'aria2c exited with status {self._proc.returncode}')
+                if failures>=MAX_FAILED_POLLS: return self._fail_all(f'aria2 RPC unreachable: {e}')
+                if self.verbose: print(f'[!] aria2 RPC: {e}')
+    def _tick(self):
+        with self._lock: queued, self._queued=self._queued, []
+        try: gids=self._multicall([('aria2.addUri', [[url], opts]) for url, opts, *_ in queued])
+        except Exception:
+            with self._lock: self._queued[:0]=queued
+            raise
+        for (url, opts, path, f), gid in zip(queued, gids):
+            if isinstance(gid, RpcError): f.set_result((None, f'aria2 rejected {url}: {gid}'))
+            else:
+                with self._lock: self._active[gid]=(path, f)
+        with self._lock: gids=list(self._active)
+        done=[]
+        for gid, st in zip(gids, self._multicall([('aria2.tellStatus', [gid, STATUS_KEYS]) for gid in gids])):
+            path, f=self._active[gid]
+            if isinstance(st, RpcError):
+                done.append(gid); f.set_result((None, f'aria2 lost download {gid}: {st}')); continue
+            self.progress[gid]={'path':path, 'completed':int(st.get('completedLength') or 0), 'total':int(st.get('totalLength') or 0),
+                                'speed':int(st.get('downloadSpeed') or 0)}
+            if st['status']=='complete': f.set_result((path, None))
+            elif st['status']=='error': f.set_result((None, f"aria2 error {st.get('errorCode')}: {st.get('errorMessage')}"))
+            elif st['status']=='removed': f.set_result((None, 'aria2 download removed'))
+            else: continue
+            done.append(gid)
+        if done:
+            with self._lock:
+                for gid in done: self._active.pop(gid, None); self.progress.pop(gid, None)
+            self._multicall([('aria2.removeDownloadResult', [gid]) for gid in done])
+    def _fail_all(self, err):
+        with self._lock:
+            self.dead=self.dead or err
+            pending=[f for *_, f in self._queued]+[f for _, f in self._active.values()]
+            self._queued=[]; self._active.clear()
+        for f in pending:
+            if not f.done(): f.set_result((None, err))
+    def close(self):
+        self._stop.set(); self._t.join()
+        try: self._tick()
+        except Exception: pass
+        self._fail_all('aria2 daemon stopped')
+        if self._proc:
+            try: self._call('aria2.shutdown')
+            except Exception: self._proc.terminate()
+            try: self._proc.wait(timeout=10)
+            except subprocess.TimeoutExpired: self._proc.kill()
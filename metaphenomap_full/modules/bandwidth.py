@@ -0,0 +1,54 @@
+import re, time, threading
+def parse_rate(value):
+    # '50M', '1.5G', '800k', '2000000' -> bytes per second (None for empty/0).
+    if not value: return None
+    m=re.fullmatch(r'\s*([\d.]+)\s*([kKmMgG]?)[bB]?(?:/s)?\s*', str(value))
+    if not m: raise SystemExit(f'Bad bandwidth {value!r}: expected e.g. 50M, 1.5G or 800K (bytes/s)')
+    return int(float(m.group(1))*{'':1,'k':1<<10,'m':1<<20,'g':1<<30}[m.group(2).lower()]) or None
+class ConnectionBudget:
+    # Run-wide cap on open download connections. Each transfer asks for up to `want` and gets
+    # its fair share of the budget among the transfers active at that moment (at least one);
+    # a transfer that would exceed the budget waits for a release.
+    def __init__(self, total):
+        self.total=max(1, total); self.used=0; self.active=0
+        self._cond=threading.Condition()
+    def acquire(self, want):
+        with self._cond:
+            while self.used>=self.total: self._cond.wait()
+            self.active+=1
+            n=max(1, min(want, self.total//self.active, self.total-self.used))
+            self.used+=n
+            return n
+    def release(self, n):
+        with self._cond:
+            self.used-=n; self.active-=1
+            self._cond.notify_all()
+class RateShares:
+    # Splits a bytes/s cap among transfers whose rate is fixed when they start (external tools).
+    # Each asks for total/expected and gets at most what running transfers have not reserved, so
+    # the sum never exceeds the cap; it waits while less than a quarter of its share is free.
+    def __init__(self, total):
+        self.total=total; self.reserved=0
+        self._cond=threading.Condition()
+    def acquire(self, expected):
+        with self._cond:
+            want=max(1, self.total//max(1, expected))
+            while self.total-self.reserved<max(1, want//4): self._cond.wait()
+            n=min(want, self.total-self.reserved)
+            self.reserved+=n
+            return n
+    def release(self, n):
+        with self._cond:
+            self.reserved-=n
+            self._cond.notify_all()
+class TokenBucket:
+    # Shared byte-rate limit: consume(n) sleeps as long as the caller is ahead of the rate.
+    def __init__(self, rate, burst=None):
+        self.rate=rate; self.capacity=burst or rate; self.tokens=float(self.capacity)
+        self.updated=time.monotonic(); self._lock=threading.Lock()
+    def consume(self, n):
+        with self._lock:
+            now=time.monotonic()
+            self.tokens=min(self.capacity, self.tokens+(now-self.updated)*self.rate)-n; self.updated=now
+            wait=-self.tokens/self.rate if self.tokens<0 else 0
+        if wait>0: time.sleep(wait)
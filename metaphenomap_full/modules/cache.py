@@ -0,0 +1,71 @@
+import os, json, time, sqlite3, hashlib, threading
+from urllib.parse import urlparse
+DEFAULT_TTL=7*24*3600
+# Search/link results change as new records are linked upstream; keep them fresher than record bodies.
+DEFAULT_TTLS={
+    'eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi': 24*3600,
+    'eutils.ncbi.nlm.nih.gov/entrez/eutils/elink.fcgi': 24*3600,
+}
+def cache_key(method, url, params=None, data=None):
+    # str/bytes bodies (e.g. an RQL query) are part of the key verbatim.
+    norm=lambda d: d.decode() if isinstance(d, bytes) else d if isinstance(d, str) else \
+        sorted((str(k), str(v)) for k,v in (d.items() if isinstance(d,dict) else (d or [])))
+    raw=json.dumps([method.upper(), url, norm(params), norm(data)])
+    return hashlib.sha256(raw.encode()).hexdigest()
+def parse_ttls(specs, default=DEFAULT_TTL):
+    # ['3600', 'www.bv-brc.org=600'] -> (3600, {'www.bv-brc.org': 600})
+    ttls=dict(DEFAULT_TTLS)
+    for spec in specs or []:
+        prefix, sep, secs = spec.rpartition('=')
+        if sep: ttls[prefix]=int(secs)
+        else: default=int(secs)
+    return default, ttls
+class HttpCache:
+    # SQLite-backed response store shared by every fetcher; entries expire per endpoint TTL
+    # and the least recently used ones are evicted once the store grows past max_bytes.
+    def __init__(self, cache_dir, ttl=DEFAULT_TTL, ttls=None, max_bytes=2*1024**3):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path=os.path.join(cache_dir, 'http_cache.sqlite')
+        self.ttl=ttl; self.ttls=dict(DEFAULT_TTLS if ttls is None else ttls); self.max_bytes=max_bytes
+        self.hits=self.misses=0
+        self._lock=threading.Lock()
+        self._db=sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body BLOB, size INTEGER, stored_at REAL, accessed_at REAL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at)')
+        self._db.commit()
+        self._size=self._db.execute('SELECT COALESCE(SUM(size),0) FROM entries').fetchone()[0]
+    def ttl_for(self, url):
+        u=urlparse(url); target=u.netloc+u.path
+        best=None
+        for prefix,secs in self.ttls.items():
+            if target.startswith(prefix) and (best is None or len(prefix)>len(best[0])): best=(prefix,secs)
+        return best[1] if best else self.ttl
+    def get(self, key, url):
+        now=time.time()
+        with self._lock:
+            row=self._db.execute('SELECT status, headers, body, stored_at FROM entries WHERE key=?', (key,)).fetchone()
+            if not row or now-row[3] > self.ttl_for(url):
+                self.misses+=1; return None
+            self._db.execute('UPDATE entries SET accessed_at=? WHERE key=?', (now, key)); self._db.commit()
+            self.hits+=1
+        return row[0], json.loads(row[1]), row[2]
+    def put(self, key, url, status, headers, body):
+        now=time.time(); size=len(body)
+        with self._lock:
+            old=self._db.execute('SELECT size FROM entries WHERE key=?', (key,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?)',
+                             (key, url, status, json.dumps(dict(headers)), body, size, now, now))
+            self._size+=size-(old[0] if old else 0)
+            if self._size > self.max_bytes: self._evict()
+            self._db.commit()
+    def _evict(self):
+        # Drop least recently used entries until the store is back under 90% of max_bytes.
+        target=int(self.max_bytes*0.9)
+        for key,size in self._db.execute('SELECT key, size FROM entries ORDER BY accessed_at').fetchall():
+            if self._size<=target: break
+            self._db.execute('DELETE FROM entries WHERE key=?', (key,)); self._size-=size
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'bytes': self._size}
+    def close(self):
+        with self._lock: self._db.close()
@@ -0,0 +1,118 @@
+import os, re, hashlib, queue, threading
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from isal import isal_zlib as zlib  # optional: ISA-L inflate, several times faster than zlib
+except ImportError:
+    import zlib
+CHUNK=4*1024*1024
+BGZF_BATCH=64  # BGZF blocks (<= 64 KB each) per decompression task
+THREADS=min(4, os.cpu_count() or 1)
+GZIP_WBITS=31
+FASTQ_RE=re.compile(r'\.(fastq|fq)(\.gz)?$', re.I)
+FASTA_RE=re.compile(r'\.(fasta|fa|fna|ffn|fas)(\.gz)?$', re.I)
+def kind_of(path):
+    name=os.path.basename(path)
+    return 'fastq' if FASTQ_RE.search(name) else 'fasta' if FASTA_RE.search(name) else None
+class _Fastq:
+    # Counts records and bases from 4-line FASTQ without materialising records: only the
+    # sequence lines (every 4th, tracked across chunk boundaries) are measured.
+    def __init__(self):
+        self.reads=0; self.bases=0; self._tail=b''; self._phase=0
+    def feed(self, data):
+        lines=(self._tail+data).split(b'\n'); self._tail=lines.pop()
+        self.reads+=len(lines[(-self._phase)%4::4])
+        self.bases+=sum(map(len, lines[(1-self._phase)%4::4]))
+        self._phase=(self._phase+len(lines))%4
+    def result(self):
+        if self._tail: self.feed(b'\n')
+        return {'format':'fastq', 'reads':self.reads, 'bases':self.bases,
+                'mean_length':round(self.bases/self.reads, 2) if self.reads else 0}
+class _Fasta:
+    def __init__(self):
+        self.lengths=[]; self._tail=b''
+    def feed(self, data):
+        lines=(self._tail+data).split(b'\n'); self._tail=lines.pop()
+        lengths=self.lengths
+        for ln in lines:
+            if ln[:1]==b'>': lengths.append(0)
+            elif lengths: lengths[-1]+=len(ln.rstrip(b'\r'))
+    def result(self):
+        if self._tail: self.feed(b'\n')
+        lengths=sorted(self.lengths, reverse=True); total=sum(lengths); n50=acc=0
+        for n in lengths:
+            acc+=n
+            if 2*acc>=total: n50=n; break
+        return {'format':'fasta', 'contigs':len(lengths), 'bases':total,
+                'mean_length':round(total/len(lengths), 2) if lengths else 0, 'n50':n50, 'longest':lengths[0] if lengths else 0}
+def _bgzf_blocks(f, first):
+    # BGZF (bgzip) stores every block as its own gzip member with its size in the header's BC
+    # extra field, so blocks can be cut out without inflating them. Yields raw blocks.
+    buf=first
+    while True:
+        if len(buf)<18: buf+=f.read(CHUNK)
+        if not buf: return
+        if len(buf)<18 or buf[12:14]!=b'BC': raise ValueError('not BGZF')
+        size=int.from_bytes(buf[16:18], 'little')+1
+        while len(buf)<size:
+            more=f.read(CHUNK)
+            if not more: raise ValueError('truncated BGZF block')
+            buf+=more
+        yield buf[:size]; buf=buf[size:]
+def _is_bgzf(head):
+    return len(head)>=18 and head[:4]==b'\x1f\x8b\x08\x04' and head[12:14]==b'BC'
+def _inflate_stream(f, md5):
+    # Plain (possibly multi-member) gzip: one inflater, restarted at each member boundary.
+    d=zlib.decompressobj(GZIP_WBITS)
+    for raw in iter(lambda: f.read(CHUNK), b''):
+        md5.update(raw)
+        while raw:
+            yield d.decompress(raw)
+            if not d.eof: break
+            raw=d.unused_data; d=zlib.decompressobj(GZIP_WBITS)
+            if not raw.strip(b'\x00'): break
+def _inflate_bgzf(f, md5, head, threads):
+    def blocks():
+        for b in _bgzf_blocks(f, head):
+            md5.update(b); yield b
+    def inflate(batch): return b''.join(zlib.decompress(b, GZIP_WBITS) for b in batch)
+    def batches():
+        batch=[]
+        for b in blocks():
+            batch.append(b)
+            if len(batch)>=BGZF_BATCH: yield batch; batch=[]
+        if batch: yield batch
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        # map() keeps results in block order; inflate releases the GIL, so batches decompress in parallel.
+        yield from ex.map(inflate, batches())
+def _chunks(path, md5, threads):
+    with open(path, 'rb') as f:
+        head=f.read(18)
+        if head[:2]!=b'\x1f\x8b':
+            md5.update(head); yield head
+            for raw in iter(lambda: f.read(CHUNK), b''):
+                md5.update(raw); yield raw
+        elif _is_bgzf(head) and threads>1:
+            yield from _inflate_bgzf(f, md5, head, threads)
+        else:
+            f.seek(0); yield from _inflate_stream(f, md5)
+def scan(path, threads=THREADS):
+    # One read of the file: MD5 of the bytes on disk plus FASTQ/FASTA stats of the decompressed
+    # content. Reading/inflating runs on a helper thread so it overlaps with parsing.
+    # Returns (md5, stats); stats is None for files that are neither FASTQ nor FASTA.
+    kind=kind_of(path); md5=hashlib.md5()
+    parser=_Fastq() if kind=='fastq' else _Fasta() if kind=='fasta' else None
+    if parser is None:
+        with open(path, 'rb') as f:
+            for raw in iter(lambda: f.read(CHUNK), b''): md5.update(raw)
+        return md5.hexdigest(), None
+    q=queue.Queue(maxsize=8); failed=[]
+    def produce():
+        try:
+            for ch in _chunks(path, md5, threads): q.put(ch)
+        except Exception as e: failed.append(e)
+        finally: q.put(None)
+    t=threading.Thread(target=produce, daemon=True); t.start()
+    for ch in iter(q.get, None): parser.feed(ch)
+    t.join()
+    if failed: raise failed[0]
+    return md5.hexdigest(), parser.result()
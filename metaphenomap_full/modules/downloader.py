@@ -1,7 +1,21 @@
-import os, subprocess, hashlib, requests
+import os, re, subprocess, hashlib, queue, threading, itertools
+from modules import http_client, range_download, metrics
+from modules.bandwidth import ConnectionBudget, RateShares, TokenBucket
+from modules.aria2_rpc import Aria2Daemon
+from modules.store import ContentStore
+from modules import content_stats
+from modules.ena_portal import filereport, bulk_lookup, group_rows, READ_RUN_FIELDS
 from urllib.parse import urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+EUTILS = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/'
+LINK_BATCH = 200
+SUMMARY_BATCH = 500
+ARIA2_MAX_CONNECTIONS = 16
+SIZE_WORKERS = 8
+QUEUE_PER_WORKER = 16  # files waiting per worker before submit() blocks; the largest-first window
+_sizes = {}  # download URL -> bytes, from ENA fastq_bytes/submitted_bytes or a HEAD probe
+
 def _which(cmd):
     from shutil import which; return which(cmd)
 
@@ -9,130 +23,393 @@ def _friendly_name(url, prefix=None):
     base = os.path.basename(urlparse(url).path) or 'file'
     return f"{prefix}_{base}" if prefix else base
 
-def _download_one(url, outdir, toolchain, prefix=None, verbose=False):
+BACKENDS = ['auto', 'aria2-rpc', 'aria2c', 'wget', 'curl', 'builtin']
+
+def select_backend(backend='auto'):
+    # -> (backend, (aria2c, wget, curl)) with only the chosen tool's path set (all None for the
+    # built-in downloader). 'auto' takes the first installed of aria2c (as an RPC daemon), wget, curl.
+    tools = {'aria2c': _which('aria2c'), 'wget': _which('wget'), 'curl': _which('curl')}
+    binary = lambda b: tools['aria2c' if b == 'aria2-rpc' else b]
+    if backend == 'auto': backend = next((b for b in ('aria2-rpc','wget','curl') if binary(b)), 'builtin')
+    if backend == 'builtin': return backend, (None, None, None)
+    if not binary(backend): raise SystemExit(f'--downloader {backend}: {"aria2c" if backend.startswith("aria2") else backend} is not installed')
+    return backend, tuple(binary(backend) if backend.startswith(t) else None for t in ('aria2c','wget','curl'))
+
+def _tool_error(e):
+    # CalledProcessError with the tool's last stderr line, when it was captured.
+    msg = str(e) or type(e).__name__
+    if isinstance(e, subprocess.CalledProcessError) and e.stderr:
+        lines = [ln for ln in e.stderr.decode(errors='replace').splitlines() if ln.strip()]
+        if lines: msg += f': {lines[-1].strip()}'
+    return msg
+
+def _download_one(url, outdir, toolchain, prefix=None, verbose=False, resume=False, segments=8, rate=None, limiter=None, rpc=None):
+    # Returns (path, error, md5); md5 is only set when the bytes were hashed while being written.
+    # resume=True continues a partial file left by an interrupted run instead of restarting it.
+    # segments is the number of connections for this file; rate (bytes/s) caps the external tools,
+    # limiter (a shared TokenBucket) the built-in downloader. With rpc (an aria2_rpc.Aria2Daemon)
+    # the file is queued on the shared daemon instead of a new process.
+    digest = None
     fname = _friendly_name(url, prefix=prefix)
     fpath = os.path.join(outdir, fname)
     aria2, wget, curl = toolchain
+    src = http_client.endpoint(url)
     try:
+        if rpc or aria2 or wget or curl:
+            ContentStore.detach(fpath)  # the tools write in place; never through a store hardlink
+        if rpc:
+            path, err = rpc.result(rpc.download(src, outdir, fname, connections=segments, resume=resume))
+            return path, err, None
         if aria2:
-            args = [aria2, '-x16', '-s16', '-k1M', '-o', fname, '-d', outdir, url]
+            n = max(1, min(segments, ARIA2_MAX_CONNECTIONS))
+            args = [aria2, f'-x{n}', f'-s{n}', '-k1M', '-o', fname, '-d', outdir, src]
+            if resume: args.insert(1, '-c')
+            if rate: args.insert(1, f'--max-download-limit={rate}')
             subprocess.run(args, check=True, stdout=None if verbose else subprocess.PIPE, stderr=None if verbose else subprocess.PIPE)
         elif wget:
             args = [wget, '-nv'] if not verbose else [wget]
-            args += ['-O', fpath, url]
+            if resume: args.append('-c')
+            if rate: args.append(f'--limit-rate={rate}')
+            args += ['-O', fpath, src]
             subprocess.run(args, check=True)
         elif curl:
-            args = [curl, '-L', '-o', fpath, url]
+            args = [curl, '-L', '-o', fpath, src]
+            if resume: args[2:2] = ['-C', '-']
+            if rate: args[1:1] = ['--limit-rate', str(rate)]
             if not verbose: args.insert(1, '-sS')
             subprocess.run(args, check=True)
         else:
-            with requests.get(url, stream=True, timeout=60) as r:
-                r.raise_for_status()
-                with open(fpath, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=1024*1024):
-                        if chunk:
-                            f.write(chunk)
-        return fpath, None
+            # Native path: resumes from its own .part sidecar, so only a finished file needs skipping.
+            if not (resume and os.path.exists(fpath)):
+                digest = range_download.download(url, fpath, segments=segments, limiter=limiter, size=_sizes.get(url))
+        return fpath, None, digest
     except Exception as e:
-        return None, str(e)
+        return None, _tool_error(e), None
 
-def perform_downloads(urls, outdir, workers=4, prefix=None, verbose=False):
+def perform_downloads(urls, outdir, workers=4, prefix=None, verbose=False, resume=False, segments=8):
     if not urls: return []
     os.makedirs(outdir, exist_ok=True)
-    aria2 = _which('aria2c'); wget = _which('wget'); curl = _which('curl')
-    toolchain = (aria2, wget, curl)
+    backend, tools = select_backend()
+    rpc = Aria2Daemon(tools[0], max_concurrent=workers, verbose=verbose) if backend == 'aria2-rpc' else None
     results = []
-    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
-        futs = [ex.submit(_download_one, u, outdir, toolchain, prefix, verbose) for u in urls]
-        for f in as_completed(futs):
-            path, err = f.result()
-            if path and not err:
-                results.append(path)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            futs = [ex.submit(_download_one, u, outdir, tools, prefix, verbose, resume, segments, rpc=rpc) for u in urls]
+            for f in as_completed(futs):
+                path, err, _ = f.result()
+                if path and not err:
+                    results.append(path)
+    finally:
+        if rpc: rpc.close()
     return results
 
+class _Job:
+    def __init__(self, n, on_done, on_file=None):
+        self.remaining = n; self.paths = []; self.errors = []; self.digests = {}; self.stats = {}
+        self.on_done = on_done; self.on_file = on_file
+        self.lock = threading.Lock()
+
+def file_size(url):
+    # Bytes for a download URL: sizes ENA published alongside the URL, else one HEAD request.
+    if url not in _sizes:
+        try: _sizes[url] = range_download.probe(url)[0]
+        except Exception: _sizes[url] = None
+    return _sizes[url]
+
+class DownloadScheduler:
+    # One run-wide download pool. submit() takes a slot per URL (blocking once queue_size files
+    # are waiting, which throttles the metadata stage) and hands the URLs to the sizing pool; each
+    # file enters the priority queue when its size is known (published sizes at once, else after a
+    # HEAD), and a fixed set of workers drains it largest first, so a huge file does not start last
+    # and set the wall time. Ordering covers the files waiting at any moment (the run streams, so
+    # later accessions are not known yet). Workers share max_connections (each transfer gets its
+    # fair share, up to ARIA2_MAX_CONNECTIONS or segments) and, if set, max_bandwidth bytes/s.
+    # When an accession's last file lands, on_done(paths, errors, digests, stats) runs on the
+    # post-processing pool; digests maps paths to MD5s already computed during download, stats maps
+    # FASTQ/FASTA paths to their content stats (with content_stats=True, from the same read that
+    # produced the MD5). on_file(path), if given,
+    # runs on the download worker right after each file lands (e.g. to stream it into an archive).
+    def __init__(self, workers=4, queue_size=None, post_workers=2, verbose=False, resume=False, segments=8, toolchain=None, store=None,
+                 max_connections=32, max_bandwidth=None, backend='auto', content_stats=False):
+        # toolchain=(aria2c, wget, curl) overrides backend selection (always one process per file).
+        self.backend, self.toolchain = ('custom', toolchain) if toolchain else select_backend(backend)
+        self.rpc = Aria2Daemon(self.toolchain[0], max_concurrent=workers, max_bandwidth=max_bandwidth, verbose=verbose) if self.backend == 'aria2-rpc' else None
+        self.verbose = verbose; self.resume = resume; self.segments = segments; self.store = store
+        self.content_stats = content_stats
+        self._q = queue.PriorityQueue()
+        self._slots = threading.Semaphore(queue_size or QUEUE_PER_WORKER*max(1, workers))
+        self._seq = itertools.count()
+        self._budget = ConnectionBudget(max_connections)
+        self.max_bandwidth = max_bandwidth
+        self._limiter = TokenBucket(max_bandwidth) if max_bandwidth else None
+        self._shares = RateShares(max_bandwidth) if max_bandwidth else None
+        self._sizer = ThreadPoolExecutor(max_workers=SIZE_WORKERS)
+        self._post = ThreadPoolExecutor(max_workers=max(1, post_workers))
+        self._pending = []
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))]
+        for t in self._threads: t.start()
+
+    def submit(self, urls, outdir, prefix, on_done, on_file=None):
+        if not urls:
+            self._pending.append(self._post.submit(on_done, [], [], {}, {})); return
+        os.makedirs(outdir, exist_ok=True)
+        job = _Job(len(urls), on_done, on_file)
+        for u in urls:
+            self._slots.acquire()
+            self._sizer.submit(self._enqueue, u, outdir, prefix, job)
+
+    def _enqueue(self, u, outdir, prefix, job):
+        try: size = file_size(u)
+        except Exception: size = None
+        self._q.put((0, -(size or 0), next(self._seq), (u, outdir, prefix, job, size)))
+
+    def _worker(self):
+        while True:
+            item = self._q.get()[-1]
+            if item is None: return
+            self._slots.release()
+            u, outdir, prefix, job, size = item
+            path = digest = stats = None
+            try:
+                path, err, digest, stats = self._process(u, outdir, prefix, job, size)
+            except Exception as e:
+                # Anything unexpected (store, hashing, backend) fails this file, never the worker:
+                # the job must still finish so its row is written and later rows are not held back.
+                err = f'{type(e).__name__}: {e}'
+            if err: metrics.incr('download_errors')
+            with job.lock:
+                if path: job.paths.append(path)
+                if path and digest: job.digests[path] = digest
+                if stats: job.stats[path] = stats
+                if err: job.errors.append(f'{u}: {err}')
+                job.remaining -= 1; last = job.remaining == 0
+            if last: self._pending.append(self._post.submit(job.on_done, job.paths, job.errors, job.digests, job.stats))
+
+    def _process(self, u, outdir, prefix, job, size):
+        # One queued file: download (or link from the store), optional content stats, on_file hook.
+        aria2, wget, curl = self.toolchain
+        want = ARIA2_MAX_CONNECTIONS if aria2 else 1 if wget or curl else self.segments
+        if size and size < 2*range_download.MIN_SEGMENT: want = 1
+        conns = self._budget.acquire(want)
+        rate = None
+        try:
+            # An external tool's rate is fixed at start: it gets a share of the cap sized for the
+            # transfers running or waiting now (RateShares keeps the sum under the cap). The
+            # built-in downloader shares the token bucket; the aria2 daemon applies the cap itself.
+            if self._shares and not self.rpc and any(self.toolchain):
+                rate = self._shares.acquire(min(len(self._threads), self._budget.active + self._q.qsize()))
+            with metrics.stage('download'):
+                path, err, digest = self._fetch(u, outdir, prefix, conns, rate)
+        finally:
+            if rate: self._shares.release(rate)
+            self._budget.release(conns)
+        stats = None
+        if path and not err:
+            metrics.incr('files_downloaded'); metrics.incr('bytes_on_disk', os.path.getsize(path))
+        if path and not err and self.content_stats and content_stats.kind_of(path):
+            try:
+                with metrics.stage('content_stats'): md5, stats = content_stats.scan(path)
+                digest = digest or md5
+            except Exception as e: stats = {'error': str(e)}
+        if path and not err and job.on_file:
+            try:
+                with metrics.stage('zip'): job.on_file(path)
+            except Exception as e: err = f'post-download step failed: {e}'
+        return path, err, digest, stats
+
+    def _fetch(self, u, outdir, prefix, conns, rate):
+        # With a content store, a file whose upstream MD5 is already stored is linked instead of
+        # downloaded, and a fresh download that matches its upstream MD5/size is added to the store.
+        exp = None
+        if self.store:
+            try: exp = expected_for_url(u)
+            except Exception: exp = None
+        if not (exp and exp.get('md5')):
+            return _download_one(u, outdir, self.toolchain, prefix, self.verbose, self.resume, conns, rate, self._limiter, self.rpc)
+        md5 = exp['md5']
+        with self.store.lock(md5):
+            if self.store.has(md5, exp.get('bytes')):
+                fpath = self.store.link_into(md5, os.path.join(outdir, _friendly_name(u, prefix=prefix)))
+                return fpath, None, md5
+            path, err, digest = _download_one(u, outdir, self.toolchain, prefix, self.verbose, self.resume, conns, rate, self._limiter, self.rpc)
+            if path and not err:
+                digest = digest or compute_md5(path)
+                if digest == md5 and exp.get('bytes') in (None, os.path.getsize(path)):
+                    self.store.ingest(path, md5)
+            return path, err, digest
+
+    def close(self):
+        # Size and drain the queue, stop the workers, then wait for every on_done callback.
+        self._sizer.shutdown(wait=True)
+        for _ in self._threads: self._q.put((1, 0, next(self._seq), None))
+        for t in self._threads: t.join()
+        if self.rpc: self.rpc.close()
+        self._post.shutdown(wait=True)
+        for f in self._pending: f.result()
+
 def compute_md5(path, chunk=1024*1024):
     md5 = hashlib.md5()
-    with open(path, 'rb') as f:
+    with metrics.stage('hash'), open(path, 'rb') as f:
         for ch in iter(lambda: f.read(chunk), b''):
             md5.update(ch)
     return md5.hexdigest()
 
-def verify_downloads(paths, accession, db, meta):
-    report = {}
-    for p in paths:
-        report[os.path.basename(p)] = {'md5': compute_md5(p), 'expected_md5': None, 'ok': True}
-    # ENA MD5 hint per run
+def hash_files(paths, workers=4):
+    # hashlib releases the GIL on large buffers, so a thread pool hashes files in parallel.
+    if not paths: return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as ex:
+        return dict(zip(paths, ex.map(compute_md5, paths)))
+
+def _int_or_none(v):
+    return int(v) if v and v.isdigit() else None
+
+def _ena_run_expected(run):
+    # {file name: {'md5', 'bytes'}} for a run's FASTQ and submitted files, from the shared filereport.
+    rows = filereport(run, 'read_run', READ_RUN_FIELDS)
+    out = {}
+    for row in rows[:1]:
+        # md5/bytes list files in the same order as each URL column _row_urls downloads from.
+        for files, md5s, sizes in (('fastq_ftp','fastq_md5','fastq_bytes'), ('fastq_http','fastq_md5','fastq_bytes'),
+                                   ('submitted_ftp','submitted_md5','submitted_bytes'), ('submitted_http','submitted_md5','submitted_bytes')):
+            if not row.get(files): continue
+            for f, m, b in itertools.zip_longest(*((row.get(k) or '').split(';') for k in (files, md5s, sizes)), fillvalue=''):
+                if f: out.setdefault(os.path.basename(f), {'md5': m or None, 'bytes': _int_or_none(b)})
+    return out
+
+def _ncbi_assembly_expected(ftp_base):
+    # NCBI publishes md5checksums.txt next to every assembly's files.
+    r = http_client.get(ftp_base.replace('ftp://', 'https://', 1).rstrip('/') + '/md5checksums.txt')
+    if not r.ok: return {}
+    out = {}
+    for ln in r.text.splitlines():
+        parts = ln.split()
+        if len(parts) == 2: out[os.path.basename(parts[1])] = {'md5': parts[0], 'bytes': None}
+    return out
+
+def expected_for_url(url):
+    # Upstream {'md5', 'bytes'} for one download URL, or None when the source publishes none.
+    name = os.path.basename(urlparse(url).path)
+    m = re.match(r'^([SED]RR\d+)', name)
+    if m: return _ena_run_expected(m.group(1)).get(name)
+    if '/genomes/all/' in url: return _ncbi_assembly_expected(url.rsplit('/', 1)[0]).get(name)
+    return None
+
+def _upstream_name(path, accession):
+    name = os.path.basename(path)
+    return name[len(accession)+1:] if name.startswith(accession + '_') else name
+
+def verify_downloads(paths, accession, db, meta, digests=None, workers=4):
+    # MD5s come from the download itself when available, otherwise from one parallel hashing pass.
+    # Each file is matched by name to the upstream MD5/size (ENA filereport, NCBI md5checksums.txt);
+    # ok is True/False when an expectation exists and None when upstream publishes none.
+    digests = dict(digests or {})
+    digests.update(hash_files([p for p in paths if p not in digests], workers))
+    expected, from_ena = {}, {}
     try:
-        import requests
-        runs = []
-        if accession.upper().startswith(('SRR','ERR','DRR')):
-            runs = [accession]
+        runs = set()
+        if accession.upper().startswith(('SRR','ERR','DRR')): runs.add(accession.upper())
         for k in ('SRA_Run','run_accession'):
-            if meta.get(k): runs.append(meta[k])
-        runs = list({r for r in runs if r})
-        if runs:
-            base = 'https://www.ebi.ac.uk/ena/portal/api/filereport'
-            fields = 'run_accession,fastq_md5,submitted_md5'
-            for rr in runs:
-                r = requests.get(base, params={'accession': rr, 'result':'read_run', 'fields':fields, 'format':'tsv'}, timeout=30)
-                if r.ok:
-                    lines = [ln for ln in r.text.strip().split('\n') if ln]
-                    if len(lines)>=2:
-                        hdr = lines[0].split('\t'); vals = lines[1].split('\t')
-                        row = dict(zip(hdr, vals))
-                        report['_expected_from_ENA'] = {rr: row.get('fastq_md5') or row.get('submitted_md5')}
+            if meta.get(k): runs.add(meta[k])
+        for p in paths:
+            m = re.match(r'^([SED]RR\d+)', _upstream_name(p, accession))
+            if m: runs.add(m.group(1))
+        for rr in sorted(runs):
+            exp = _ena_run_expected(rr)
+            expected.update(exp)
+            if exp: from_ena[rr] = ';'.join(e['md5'] for e in exp.values() if e['md5'])
+        for k in ('FTP_Path_RefSeq','FTP_Path_GenBank'):
+            if meta.get(k) and any(_upstream_name(p, accession).startswith(os.path.basename(meta[k])) for p in paths):
+                expected.update(_ncbi_assembly_expected(meta[k])); break
     except Exception:
         pass
+    report = {}
+    for p in paths:
+        exp = expected.get(_upstream_name(p, accession)) or {}
+        size = os.path.getsize(p)
+        ok = None
+        if exp.get('md5') or exp.get('bytes') is not None:
+            ok = (not exp.get('md5') or exp['md5'] == digests[p]) and (exp.get('bytes') is None or exp['bytes'] == size)
+        report[os.path.basename(p)] = {'md5': digests[p], 'expected_md5': exp.get('md5'), 'bytes': size,
+                                       'expected_bytes': exp.get('bytes'), 'ok': ok}
+    if from_ena: report['_expected_from_ENA'] = from_ena
     return report
 
 # URL resolvers
-def _ena_run_fastq_urls(run_accession):
-    fields = 'run_accession,fastq_ftp,fastq_http,submitted_ftp,submitted_http'
-    base = 'https://www.ebi.ac.uk/ena/portal/api/filereport'
-    r = requests.get(base, params={'accession': run_accession, 'result':'read_run','fields':fields,'format':'tsv'}, timeout=30)
-    if not r.ok: return []
-    lines = [ln for ln in r.text.strip().split('\n') if ln]
-    if len(lines)<2: return []
-    hdr = lines[0].split('\t'); vals = lines[1].split('\t')
-    row = dict(zip(hdr, vals))
+def _row_urls(row):
     urls = []
-    for key in ('fastq_http','fastq_ftp','submitted_http','submitted_ftp'):
+    for key, sizes in (('fastq_http','fastq_bytes'),('fastq_ftp','fastq_bytes'),('submitted_http','submitted_bytes'),('submitted_ftp','submitted_bytes')):
         if row.get(key):
-            for p in row[key].split(';'):
-                if p.startswith('http'): urls.append(p)
-                elif p.startswith('ftp'): urls.append('https://'+p)
+            for p, b in itertools.zip_longest(row[key].split(';'), (row.get(sizes) or '').split(';'), fillvalue=''):
+                u = p if p.startswith('http') else 'https://'+p if p.startswith('ftp') else None
+                if u:
+                    urls.append(u)
+                    if _int_or_none(b) is not None: _sizes[u] = int(b)
     return urls
 
+def _ena_run_fastq_urls(run_accession):
+    rows = filereport(run_accession, 'read_run', READ_RUN_FIELDS)
+    return _row_urls(rows[0]) if rows else []
+
+def ncbi_sample_runs(samples, batch_size=LINK_BATCH):
+    # {BioSample: [run accessions]}: one elink per batch of samples, then one esummary per
+    # SUMMARY_BATCH linked SRA uids. Each experiment summary names its BioSample, which maps
+    # the runs back to the inputs however elink grouped the links.
+    samples = list(dict.fromkeys(samples))
+    wanted = {s.upper(): s for s in samples}
+    out = {s: [] for s in samples}
+    uids = []
+    for i in range(0, len(samples), batch_size):
+        r = http_client.post(EUTILS+'elink.fcgi', data={'dbfrom':'biosample','db':'sra','retmode':'json','id':','.join(samples[i:i+batch_size])})
+        r.raise_for_status()
+        for ls in r.json().get('linksets',[]):
+            for ldb in ls.get('linksetdbs',[]): uids.extend(str(u) for u in ldb.get('links',[]))
+    uids = list(dict.fromkeys(uids))
+    for i in range(0, len(uids), SUMMARY_BATCH):
+        r = http_client.post(EUTILS+'esummary.fcgi', data={'db':'sra','retmode':'json','id':','.join(uids[i:i+SUMMARY_BATCH])})
+        r.raise_for_status()
+        res = r.json().get('result',{})
+        for uid in res.get('uids',[]):
+            doc = res.get(uid) or {}
+            m = re.search(r'<Biosample>\s*([^<\s]+)', doc.get('expxml',''))
+            s = wanted.get(m.group(1).upper()) if m else (samples[0] if len(samples)==1 else None)
+            if s: out[s].extend(run for run in re.findall(r'\bacc="([^"]+)"', doc.get('runs','')) if run not in out[s])
+    return out
+
+def fastq_urls_batch(items):
+    # {accession: [FASTQ URLs]} for a batch of (accession, db) pairs: runs, ENA samples and
+    # NCBI BioSamples are each resolved with bulk queries, then every run's files come from one
+    # ENA read_run search per CHUNK_SIZE runs. Accessions this cannot handle are left out.
+    runs_of = {}; ena_samples = []; ncbi_samples = []
+    for acc, db in items:
+        u = acc.upper()
+        if u.startswith(('SRR','ERR','DRR')): runs_of[acc] = [acc]
+        elif db == 'ena' and u.startswith(('ERS','SRS','DRS','SAMEA')): ena_samples.append(acc)
+        elif db == 'ncbi' and u.startswith(('SAMN','SAMD')): ncbi_samples.append(acc)
+    rows = {}
+    if ena_samples:
+        found = group_rows('read_run', ('sample_accession','secondary_sample_accession'), ena_samples, READ_RUN_FIELDS)
+        for acc in ena_samples:
+            runs_of[acc] = [row['run_accession'] for row in found.get(acc, [])]
+            for row in found.get(acc, []): rows[row['run_accession']] = row
+    if ncbi_samples:
+        runs_of.update(ncbi_sample_runs(ncbi_samples))
+    todo = [r for runs in runs_of.values() for r in runs if r not in rows]
+    if todo:
+        rows.update(bulk_lookup('read_run', ('run_accession',), list(dict.fromkeys(todo)), READ_RUN_FIELDS))
+    out = {}
+    for acc, runs in runs_of.items():
+        urls = []
+        for run in runs: urls.extend(_row_urls(rows[run]) if run in rows else _ena_run_fastq_urls(run))
+        out[acc] = urls
+    return out
+
 def resolve_fastq_urls(accession, db, meta=None):
     acc = accession.upper()
     if acc.startswith(('SRR','ERR','DRR')): return _ena_run_fastq_urls(acc)
     if db == 'ena' and acc.startswith(('ERS','SRS','DRS','SAMEA')):
-        base = 'https://www.ebi.ac.uk/ena/portal/api/search'
-        r = requests.get(base, params={'result':'read_run','query':f'sample_accession={accession}','fields':'run_accession','format':'tsv'}, timeout=30)
-        if r.ok:
-            lines = [ln for ln in r.text.strip().split('\n') if ln]
-            if len(lines)>=2:
-                runs = [ln.split('\t')[0] for ln in lines[1:] if ln.strip()]
-                urls = []
-                for run in runs: urls.extend(_ena_run_fastq_urls(run))
-                return urls
+        return fastq_urls_batch([(accession, db)]).get(accession, [])
     if db == 'ncbi' and acc.startswith(('SAMN','SAMD')):
-        try:
-            elink = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/elink.fcgi'
-            r = requests.get(elink, params={'dbfrom':'biosample','db':'sra','id':accession,'retmode':'json'}, timeout=30)
-            if r.ok:
-                js = r.json(); links = []
-                for ls in js.get('linksets',[]):
-                    for ldb in ls.get('linksetdbs',[]):
-                        links.extend(ldb.get('links',[]))
-                urls = []
-                for uid in links[:10]:
-                    s = requests.get('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi', params={'db':'sra','id':uid,'retmode':'json'}, timeout=30)
-                    if s.ok:
-                        doc = s.json()['result'].get(str(uid),{})
-                        run = doc.get('runs',''); runs = [r.strip() for r in run.split(',') if r.strip()]
-                        for rr in runs: urls.extend(_ena_run_fastq_urls(rr))
-                return urls
+        try: return fastq_urls_batch([(accession, db)]).get(accession, [])
         except Exception: pass
     if db == 'sra': return _ena_run_fastq_urls(acc)
     return []
@@ -148,7 +425,7 @@ def resolve_assembly_urls(accession, db, meta=None):
             urls.append(f"{base}/{asm}{s}")
         return urls
     if db == 'ena':
-        r = requests.get('https://www.ebi.ac.uk/ena/portal/api/filereport', params={'accession': accession,'result':'analysis','fields':'analysis_accession,submitted_http,submitted_ftp','format':'tsv'}, timeout=30)
+        r = http_client.get('https://www.ebi.ac.uk/ena/portal/api/filereport', params={'accession': accession,'result':'analysis','fields':'analysis_accession,submitted_http,submitted_ftp','format':'tsv'})
         if r.ok:
             lines = [ln for ln in r.text.strip().split('\n') if ln]
             if len(lines)>=2:
@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+from modules import http_client
+PORTAL_SEARCH='https://www.ebi.ac.uk/ena/portal/api/search'
+FILEREPORT='https://www.ebi.ac.uk/ena/portal/api/filereport'
+CHUNK_SIZE=200
+SEARCH_MEMO=64  # parsed chunks kept for the run: metadata and FASTQ URL passes run the same read_run search
+_searched=OrderedDict(); _searched_lock=threading.Lock()
+# Every per-run filereport (SRA metadata, FASTQ URLs, MD5 checks) asks for the same fields,
+# so within one run the request is issued once and shared through http_client.
+READ_RUN_FIELDS=['run_accession','study_accession','sample_accession','experiment_accession','library_source','library_strategy',
+                 'instrument_platform','instrument_model','collection_date','country','host','scientific_name',
+                 'fastq_ftp','fastq_http','fastq_md5','fastq_bytes','submitted_ftp','submitted_http','submitted_md5','submitted_bytes']
+def filereport(accession, result, fields):
+    r=http_client.get(FILEREPORT, params={'accession':accession,'result':result,'fields':','.join(fields),'format':'tsv'})
+    if not r.ok: return []
+    lines=[ln for ln in r.text.strip().split('\n') if ln]
+    if len(lines)<2: return []
+    hdr=lines[0].split('\t')
+    return [dict(zip(hdr, ln.split('\t'))) for ln in lines[1:]]
+def search_rows(result, keys, accessions, fields, chunk_size=CHUNK_SIZE):
+    # One POSTed Portal search per chunk, OR-ing every accession over every key field.
+    # Rows are streamed off the TSV body as dicts rather than through the response cache/memo,
+    # which would hold the raw body whole; the parsed rows of a fully read chunk are kept
+    # (SEARCH_MEMO chunks, LRU) so a later pass over the same chunk sends nothing.
+    fields=list(dict.fromkeys(list(fields)+list(keys)))
+    for i in range(0, len(accessions), chunk_size):
+        chunk=accessions[i:i+chunk_size]
+        key=(result, tuple(keys), tuple(chunk), tuple(fields))
+        with _searched_lock:
+            rows=_searched.get(key)
+            if rows is not None: _searched.move_to_end(key)
+        if rows is not None:
+            yield from rows; continue
+        query=' OR '.join(f'{k}="{a}"' for a in chunk for k in keys)
+        rows=[]
+        with http_client.post(PORTAL_SEARCH, data={'result':result,'query':query,'fields':','.join(fields),'format':'tsv','limit':0},
+                              stream=True, cache=False) as r:
+            r.raise_for_status(); r.encoding=r.encoding or 'utf-8'
+            lines=r.iter_lines(decode_unicode=True)
+            hdr=(next(lines,'') or '').split('\t')
+            for ln in lines:
+                if ln:
+                    row=dict(zip(hdr, ln.split('\t'))); rows.append(row); yield row
+        with _searched_lock:
+            _searched[key]=rows
+            while len(_searched)>SEARCH_MEMO: _searched.popitem(last=False)
+def bulk_lookup(result, keys, accessions, fields, chunk_size=CHUNK_SIZE):
+    # {accession: first row whose key field matches it}; accessions without a row are omitted.
+    wanted={a.upper():a for a in accessions}
+    out={}
+    for row in search_rows(result, keys, list(wanted.values()), fields, chunk_size):
+        for k in keys:
+            a=wanted.get((row.get(k) or '').upper())
+            if a and a not in out: out[a]=row
+    return out
+def group_rows(result, keys, accessions, fields, chunk_size=CHUNK_SIZE):
+    # {accession: [every row whose key field matches it]}, e.g. all runs of a sample.
+    wanted={a.upper():a for a in accessions}
+    out={}
+    for row in search_rows(result, keys, list(wanted.values()), fields, chunk_size):
+        for a in dict.fromkeys(wanted.get((row.get(k) or '').upper()) for k in keys):
+            if a: out.setdefault(a, []).append(row)
+    return out
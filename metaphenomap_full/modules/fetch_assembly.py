@@ -1,11 +1,24 @@
-import requests
+from modules import http_client
+EUTILS='https://eutils.ncbi.nlm.nih.gov/entrez/eutils'
+BATCH_SIZE=200
+def _map(doc):
+    return {
+        'Assembly_Accession': doc.get('assemblyaccession'),
+        'Organism': doc.get('organism'),
+        'Assembly_Level': doc.get('assemblystatus'),
+        'Submitter': doc.get('submitter'),
+        'Submission_Date': doc.get('submissiondate'),
+        'BioSample': doc.get('biosample'),
+        'FTP_Path_GenBank': doc.get('ftppath_genbank'),
+        'FTP_Path_RefSeq': doc.get('ftppath_refseq'),
+    }
 def fetch_and_parse_assembly_metadata(accession):
-    r=requests.get('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi',
-                   params={'db':'assembly','term':accession,'retmode':'json'}, timeout=20); r.raise_for_status()
+    r=http_client.get(f'{EUTILS}/esearch.fcgi',
+                   params={'db':'assembly','term':accession,'retmode':'json'}); r.raise_for_status()
     ids=r.json().get('esearchresult',{}).get('idlist',[])
     if not ids:
-        link=requests.get('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/elink.fcgi',
-                          params={'dbfrom':'biosample','db':'assembly','id':accession,'retmode':'json'}, timeout=20)
+        link=http_client.get(f'{EUTILS}/elink.fcgi',
+                          params={'dbfrom':'biosample','db':'assembly','id':accession,'retmode':'json'})
         if link.ok:
             js=link.json(); linksets=js.get('linksets',[])
             if linksets and 'linksetdbs' in linksets[0]:
@@ -13,16 +26,33 @@ def fetch_and_parse_assembly_metadata(accession):
                     if ls.get('links'): ids=ls['links']; break
     if not ids: return {'Assembly_Accession': None}
     uid=ids[0]
-    summ=requests.get('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi',
-                      params={'db':'assembly','id':uid,'retmode':'json'}, timeout=20).json()
+    summ=http_client.get(f'{EUTILS}/esummary.fcgi',
+                      params={'db':'assembly','id':uid,'retmode':'json'}).json()
     doc=summ['result'][uid]
-    return {
-        'Assembly_Accession': doc.get('assemblyaccession'),
-        'Organism': doc.get('organism'),
-        'Assembly_Level': doc.get('assemblystatus'),
-        'Submitter': doc.get('submitter'),
-        'Submission_Date': doc.get('submissiondate'),
-        'BioSample': doc.get('biosample'),
-        'FTP_Path_GenBank': doc.get('ftppath_genbank'),
-        'FTP_Path_RefSeq': doc.get('ftppath_refseq'),
-    }
+    return _map(doc)
+def _doc_accessions(doc):
+    syn=doc.get('synonym') or {}
+    accs={doc.get('assemblyaccession'), syn.get('genbank'), syn.get('refseq')}
+    return {a.upper() for a in accs if a}
+def fetch_and_parse_assembly_batch(accessions, batch_size=BATCH_SIZE):
+    # esearch + esummary for a whole batch (two POSTs instead of 2-3 GETs per accession).
+    # Versioned inputs must match exactly; unversioned ones match any version. Misses are omitted.
+    out={}
+    accs=list(dict.fromkeys(accessions))
+    for i in range(0, len(accs), batch_size):
+        chunk=accs[i:i+batch_size]
+        term=' OR '.join(f'{a}[Assembly Accession]' for a in chunk)
+        r=http_client.post(f'{EUTILS}/esearch.fcgi', data={'db':'assembly','term':term,'retmax':len(chunk)*4,'retmode':'json'}); r.raise_for_status()
+        ids=r.json().get('esearchresult',{}).get('idlist',[])
+        if not ids: continue
+        s=http_client.post(f'{EUTILS}/esummary.fcgi', data={'db':'assembly','id':','.join(ids),'retmode':'json'}); s.raise_for_status()
+        res=s.json().get('result',{})
+        by_acc={}
+        for uid in res.get('uids',[]):
+            doc=res.get(uid) or {}
+            for a in _doc_accessions(doc):
+                by_acc.setdefault(a, doc); by_acc.setdefault(a.split('.')[0], doc)
+        for a in chunk:
+            doc=by_acc.get(a.upper())
+            if doc: out[a]=_map(doc)
+    return out
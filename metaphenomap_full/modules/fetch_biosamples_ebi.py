@@ -1,21 +1,21 @@
-import requests
+from modules import http_client, aliases
 def fetch_and_parse_ebibiosamples_metadata(accession):
     url=f'https://www.ebi.ac.uk/biosamples/samples/{accession}'
-    r=requests.get(url, timeout=20)
+    r=http_client.get(url)
     if not r.ok: return {}
     js=r.json(); ch=js.get('characteristics',{}) or {}
-    def pick(*keys):
-        for k in keys:
-            v=ch.get(k)
-            if isinstance(v,list) and v: return v[0].get('text')
-            if isinstance(v,dict): return v.get('text')
-        return None
+    picked={}
+    for k,v in ch.items():
+        canon=aliases.canonical(k)
+        if not canon or canon in picked: continue
+        if isinstance(v,list) and v: v=v[0]
+        if isinstance(v,dict) and v.get('text'): picked[canon]=v['text']
     return {
         'Accession': accession,
-        'Host': pick('host','host organism'),
-        'Isolation_Source': pick('isolation source','isolation_source','source'),
-        'Disease': pick('disease','host disease'),
-        'Location': pick('geographic location','geo_loc_name','country'),
-        'Collection_Date': pick('collection date','collection_date'),
-        'Scientific_Name': pick('organism','scientific name'),
+        'Host': picked.get('Host'),
+        'Isolation_Source': picked.get('Isolation_Source'),
+        'Disease': picked.get('Disease'),
+        'Location': picked.get('Location'),
+        'Collection_Date': picked.get('Collection_Date'),
+        'Scientific_Name': picked.get('Scientific_Name'),
     }
@@ -1,9 +1,16 @@
-import requests
+from modules import http_client
+from modules.ena_portal import bulk_lookup
+FIELDS='analysis_accession,study_accession,sample_accession,first_public,scientific_name,description,study_title'
 def fetch_and_parse_ena_assembly_metadata(accession):
-    r=requests.get('https://www.ebi.ac.uk/ena/portal/api/filereport',
-                   params={'accession':accession,'result':'analysis','fields':'analysis_accession,study_accession,sample_accession,first_public,scientific_name,description,study_title','format':'tsv'}, timeout=20)
+    r=http_client.get('https://www.ebi.ac.uk/ena/portal/api/filereport',
+                   params={'accession':accession,'result':'analysis','fields':FIELDS,'format':'tsv'})
     if not r.ok or len(r.text.strip().splitlines())<2: return {'ENA_Analysis_Accession': None}
     hdr,row=r.text.strip().splitlines()[:2]; cols=dict(zip(hdr.split('\t'), row.split('\t')))
+    return _map(cols)
+def fetch_and_parse_ena_assembly_batch(accessions):
+    rows=bulk_lookup('analysis', ('analysis_accession','sample_accession'), accessions, FIELDS.split(','))
+    return {acc:_map(cols) for acc,cols in rows.items()}
+def _map(cols):
     return {
         'ENA_Analysis_Accession': cols.get('analysis_accession'),
         'ENA_Study': cols.get('study_accession'),
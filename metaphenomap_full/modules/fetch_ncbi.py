@@ -1,27 +1,32 @@
-import requests, xml.etree.ElementTree as ET
-FIELD_ALIASES = {
-    'Host':['host','host organism','organism_host','host_species','host taxid'],
-    'Isolation_Source':['isolation_source','isolation source','source','specimen','sample_type','body_site','source_material'],
-    'Disease':['disease','host_disease','disease state','clinical_information','condition'],
-    'AMR_Genes':['amr','antibiotic resistance','resistance_genes','antimicrobial resistance','drug resistance'],
-    'Virulence_Genes':['virulence','virulence_factor','virulence gene','toxin_gene'],
-    'Location':['geo_loc_name','geographic location','country','region','location'],
-    'Collection_Date':['collection_date','sampling_date','isolation_date','date_collected'],
-}
-def _canonical(name):
-    n=(name or '').lower()
-    for canon,alist in FIELD_ALIASES.items():
-        for a in alist:
-            if a in n: return canon
-    return None
-def fetch_and_parse_biosample(accession):
-    url='https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi'
-    r=requests.get(url, params={'db':'biosample','id':accession,'retmode':'xml'}, timeout=20); r.raise_for_status()
-    root=ET.fromstring(r.content)
-    out={k:None for k in FIELD_ALIASES}; out['Accession']=accession
-    for attr in root.iter('Attribute'):
+import xml.etree.ElementTree as ET
+from modules import http_client, aliases
+EFETCH='https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi'
+BATCH_SIZE=200
+def _parse_biosample(el, accession):
+    out={k:None for k in aliases.fields()}; out['Accession']=accession
+    for attr in el.iter('Attribute'):
         name=attr.attrib.get('attribute_name',''); val=(attr.text or '').strip()
         if not val: continue
-        key=_canonical(name)
+        key=aliases.canonical(name)
         if key and not out.get(key): out[key]=val
     return out
+def _biosample_ids(el):
+    ids={el.attrib.get('accession',''), el.attrib.get('id','')}
+    ids.update((i.text or '').strip() for i in el.iter('Id'))
+    return {i.upper() for i in ids if i}
+def fetch_and_parse_biosample(accession):
+    r=http_client.get(EFETCH, params={'db':'biosample','id':accession,'retmode':'xml'}); r.raise_for_status()
+    return _parse_biosample(ET.fromstring(r.content), accession)
+def fetch_and_parse_biosamples(accessions, batch_size=BATCH_SIZE):
+    # One POSTed efetch per batch; the <BioSampleSet> is split back per requested accession.
+    # Accessions missing from the response are left out so callers can fall back to fetch_and_parse_biosample.
+    out={}
+    accs=list(dict.fromkeys(accessions))
+    for i in range(0, len(accs), batch_size):
+        chunk=accs[i:i+batch_size]
+        r=http_client.post(EFETCH, data={'db':'biosample','id':','.join(chunk),'retmode':'xml'}); r.raise_for_status()
+        wanted={a.upper():a for a in chunk}
+        for el in ET.fromstring(r.content).iter('BioSample'):
+            for hit in _biosample_ids(el) & wanted.keys():
+                out[wanted[hit]]=_parse_biosample(el, wanted[hit])
+    return out
@@ -1,31 +1,65 @@
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from modules import http_client, governor
 BASE='https://www.bv-brc.org/api'; HEADERS={'Accept':'application/json'}
+# Batch lookups send the RQL as a POST body: BATCH_SIZE ids x ID_FIELDS is ~10 KB, past
+# what the API front end accepts in a GET URL (414/400).
+RQL_HEADERS=dict(HEADERS, **{'Content-Type':'application/rqlquery+x-www-form-urlencoded'})
+# Only what _map/_map_assembly read; genome documents are otherwise several KB each.
+FIELDS=['genome_id','genbank_accession','refseq_accession','organism_name','host_name','isolation_source',
+        'isolation_country','geographic_location','collection_year','collection_date','disease','genome_status',
+        'sequencing_platform','sequencing_centers','genome_length','gc_content','contigs','taxon_id',
+        'biosample_accession','bioproject_accession']
+SELECT='select('+','.join(FIELDS)+')'
+ID_FIELDS=('genome_id','refseq_accession','genbank_accession')
+BATCH_SIZE=200
+FALLBACK_WORKERS=4
 def _get(url, params=None):
-    r=requests.get(url, params=params, headers=HEADERS, timeout=30); r.raise_for_status(); return r.json()
+    r=http_client.get(url, params=params, headers=HEADERS); r.raise_for_status(); return r.json()
 def _first(rows):
     if isinstance(rows,list) and rows: return rows[0]
     if isinstance(rows,dict) and rows.get('genome_id'): return rows
     return None
+def _query(rql):
+    return _first(_get(f'{BASE}/genome/?{rql}&{SELECT}&limit(1)&http_accept=application/json'))
+@lru_cache(maxsize=4096)  # --module both resolves the same genome for metadata and assembly
 def _search_genome(q):
-    try:
-        doc=_get(f'{BASE}/genome/{q}?http_accept=application/json')
-        if isinstance(doc,dict) and doc.get('genome_id'): return doc
-    except Exception: pass
-    for field in ('genome_id','refseq_accession','genbank_accession','organism_name'):
-        url=f'{BASE}/genome/?eq({field},{q})&limit(1)&http_accept=application/json'
-        try:
-            doc=_first(_get(url)); if doc: return doc
-        except Exception: continue
-    try:
-        if str(q).isdigit():
-            url=f'{BASE}/genome/?eq(taxon_id,{q})&sort(+genome_length)&limit(1)&http_accept=application/json'
-            doc=_first(_get(url)); if doc: return doc
-    except Exception: pass
-    try:
-        url=f'{BASE}/genome/?keyword({q})&sort(+genome_length)&limit(1)&http_accept=application/json'
-        doc=_first(_get(url)); if doc: return doc
-    except Exception: pass
+    # Fallback chain for inputs the batch lookup missed by ID (so the ID fields are not retried):
+    # organism name, taxon id, then keyword, one request at a time until one finds a genome.
+    attempts=[f'eq(organism_name,{q})']
+    if str(q).isdigit(): attempts.append(f'eq(taxon_id,{q})&sort(+genome_length)')
+    attempts.append(f'keyword({q})&sort(+genome_length)')
+    for rql in attempts:
+        # A miss is "not found"; throttling that outlived the retries is an error, not a miss.
+        try: doc=_query(rql)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code in governor.THROTTLE_STATUSES: raise
+            doc=None
+        except Exception: doc=None
+        if doc: return doc
     return None
+@lru_cache(maxsize=8)  # the sample and assembly batches of one chunk share a lookup
+def _lookup_batch(accessions):
+    # {accession: genome doc}: one projected or(in(genome_id,..),in(refseq_accession,..),..) query
+    # per BATCH_SIZE inputs, then the fallback chain for whatever is still missing (FALLBACK_WORKERS
+    # misses at a time, each trying its candidates in turn).
+    wanted={a.upper():a for a in accessions}; out={}
+    for i in range(0, len(accessions), BATCH_SIZE):
+        ids=','.join(accessions[i:i+BATCH_SIZE])
+        rql='or('+','.join(f'in({f},({ids}))' for f in ID_FIELDS)+')'
+        r=http_client.post(f'{BASE}/genome/', data=f'{rql}&{SELECT}&limit({len(ID_FIELDS)*BATCH_SIZE})', headers=RQL_HEADERS)
+        r.raise_for_status(); rows=r.json()
+        for f in ID_FIELDS:
+            for row in rows if isinstance(rows,list) else []:
+                a=wanted.get(str(row.get(f) or '').upper())
+                if a and a not in out: out[a]=row
+    misses=[a for a in accessions if a not in out]
+    if misses:
+        with ThreadPoolExecutor(max_workers=FALLBACK_WORKERS) as ex:
+            for a, doc in zip(misses, ex.map(_search_genome, misses)):
+                if doc: out[a]=doc
+    return out
 def _map(doc):
     return {
         'Accession': doc.get('genome_id') or doc.get('genbank_accession') or doc.get('refseq_accession'),
@@ -45,12 +79,10 @@ def _map(doc):
         'BioProject': doc.get('bioproject_accession'),
     }
 def fetch_and_parse_patric_metadata(accession):
-    doc=_search_genome(accession)
+    doc=_lookup_batch((accession,)).get(accession)
     if not doc: return {}
     return _map(doc)
-def fetch_and_parse_patric_assembly(accession):
-    doc=_search_genome(accession)
-    if not doc: return {}
+def _map_assembly(doc):
     return {
         'Assembly_Accession': doc.get('refseq_accession') or doc.get('genbank_accession'),
         'Assembly_Level': doc.get('genome_status'),
@@ -58,3 +90,11 @@ def fetch_and_parse_patric_assembly(accession):
         'BioSample': doc.get('biosample_accession'),
         'BioProject': doc.get('bioproject_accession'),
     }
+def fetch_and_parse_patric_assembly(accession):
+    doc=_lookup_batch((accession,)).get(accession)
+    if not doc: return {}
+    return _map_assembly(doc)
+def fetch_and_parse_patric_batch(accessions):
+    return {a:_map(doc) for a,doc in _lookup_batch(tuple(dict.fromkeys(accessions))).items()}
+def fetch_and_parse_patric_assembly_batch(accessions):
+    return {a:_map_assembly(doc) for a,doc in _lookup_batch(tuple(dict.fromkeys(accessions))).items()}
@@ -1,9 +1,12 @@
-import requests
+from modules.ena_portal import bulk_lookup, filereport, READ_RUN_FIELDS
 def fetch_and_parse_sra_metadata(accession):
-    fields='run_accession,study_accession,sample_accession,experiment_accession,library_source,library_strategy,instrument_platform,instrument_model,collection_date,country,host,scientific_name'
-    r=requests.get('https://www.ebi.ac.uk/ena/portal/api/filereport', params={'accession':accession,'result':'read_run','fields':fields,'format':'tsv'}, timeout=20)
-    if not r.ok or len(r.text.strip().splitlines())<2: return {}
-    hdr,row=r.text.strip().splitlines()[:2]; cols=dict(zip(hdr.split('\t'), row.split('\t')))
+    rows=filereport(accession, 'read_run', READ_RUN_FIELDS)
+    if not rows: return {}
+    return _map(accession, rows[0])
+def fetch_and_parse_sra_batch(accessions):
+    rows=bulk_lookup('read_run', ('run_accession',), accessions, READ_RUN_FIELDS)
+    return {acc:_map(acc,cols) for acc,cols in rows.items()}
+def _map(accession, cols):
     return {
         'Accession': accession,
         'SRA_Run': cols.get('run_accession'),
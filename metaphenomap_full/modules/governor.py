@@ -0,0 +1,84 @@
+import time, threading
+from email.utils import parsedate_to_datetime
+# Published/observed limits per upstream host: (requests per second, max concurrent requests).
+# NCBI allows 3 req/s per client, 10 with an API key.
+DEFAULT_LIMITS={
+    'eutils.ncbi.nlm.nih.gov': (3, 3),
+    'www.ebi.ac.uk': (20, 16),
+    'www.bv-brc.org': (10, 8),
+}
+NCBI_KEYED=(10, 10)
+DEFAULT_CONCURRENCY=64
+THROTTLE_STATUSES=(429, 503)
+_lock=threading.Lock()
+_limits=dict(DEFAULT_LIMITS)
+_hosts={}
+def retry_after_seconds(value):
+    if not value: return None
+    try: return max(0.0, float(value))
+    except ValueError: pass
+    try: return max(0.0, parsedate_to_datetime(value).timestamp()-time.time())
+    except (TypeError, ValueError): return None
+class HostGovernor:
+    # Token bucket (rate) plus a concurrency window, both adapted AIMD-style: a 429/503 halves
+    # them and honours Retry-After before anything else is sent to the host; each success
+    # grows them back towards the configured ceiling.
+    def __init__(self, rate=None, concurrency=DEFAULT_CONCURRENCY, min_rate=0.2):
+        self.max_rate=rate; self.rate=rate; self.min_rate=min_rate
+        self.max_window=concurrency; self.window=float(concurrency)
+        self.tokens=float(rate or 0); self.updated=time.monotonic()
+        self.active=0; self.resume_at=0.0; self.throttled=0
+        self._cond=threading.Condition()
+    def acquire(self):
+        with self._cond:
+            while True:
+                now=time.monotonic(); wait=self.resume_at-now
+                if wait<=0 and self.active<max(1, int(self.window)):
+                    if not self.rate:
+                        self.active+=1; return
+                    self.tokens=min(max(1.0, self.rate), self.tokens+(now-self.updated)*self.rate); self.updated=now
+                    if self.tokens>=1:
+                        self.tokens-=1; self.active+=1; return
+                    wait=(1-self.tokens)/self.rate
+                self._cond.wait(wait if wait>0 else None)
+    def release(self, status=None, retry_after=None):
+        with self._cond:
+            self.active-=1
+            if status in THROTTLE_STATUSES:
+                self.throttled+=1
+                self.window=max(1.0, self.window/2)
+                if self.rate: self.rate=max(self.min_rate, self.rate/2)
+                pause=retry_after_seconds(retry_after)
+                if pause is None: pause=1.0/(self.rate or 1.0)
+                self.resume_at=max(self.resume_at, time.monotonic()+pause)
+            elif status is not None and status<500:
+                self.window=min(self.max_window, self.window+1.0/self.window)
+                if self.rate: self.rate=min(self.max_rate, self.rate+self.max_rate/20)
+            self._cond.notify_all()
+    def stats(self):
+        return {'rate':self.rate, 'window':round(self.window, 2), 'throttled':self.throttled}
+def configure(limits=None, ncbi_api_key=None):
+    # limits: {host: (rate or None, concurrency)} overriding the defaults; governors are rebuilt.
+    with _lock:
+        _limits.clear(); _limits.update(DEFAULT_LIMITS)
+        if ncbi_api_key: _limits['eutils.ncbi.nlm.nih.gov']=NCBI_KEYED
+        _limits.update(limits or {})
+        _hosts.clear()
+def parse_limits(specs):
+    # ['www.ebi.ac.uk=50', 'www.bv-brc.org=5/4'] -> {host: (rate, concurrency)}; rate 0 = unlimited.
+    out={}
+    for spec in specs or []:
+        host, sep, val=spec.partition('=')
+        if not sep: raise SystemExit(f'Bad --rate-limit {spec!r}: expected HOST=RPS[/CONCURRENCY]')
+        rate, _, conc=val.partition('/')
+        out[host.strip()]=(float(rate) or None, int(conc) if conc else _limits.get(host.strip(), (None, DEFAULT_CONCURRENCY))[1])
+    return out
+def for_host(host):
+    with _lock:
+        g=_hosts.get(host)
+        if g is None:
+            rate, conc=_limits.get(host, (None, DEFAULT_CONCURRENCY))
+            g=_hosts[host]=HostGovernor(rate, conc)
+        return g
+def stats():
+    with _lock: return {h:g.stats() for h, g in _hosts.items()}
@@ -0,0 +1,166 @@
+import os, time, threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+from modules.cache import HttpCache, cache_key
+from modules import metrics, governor
+_cache=None
+_session=None
+_session_lock=threading.Lock()
+_settings={'pool_size': 10, 'retries': 3, 'backoff': 0.5, 'connect_timeout': 10, 'read_timeout': 60}
+RETRY_STATUSES=(429, 500, 502, 503, 504)
+IDEMPOTENT=('GET','HEAD')
+NCBI_HOST='eutils.ncbi.nlm.nih.gov'
+_api_keys={}
+_endpoints={}
+MEMO_BYTES=64<<20  # completed 2xx bodies kept for the run, least recently used evicted first
+_memo=OrderedDict()
+_memo_lock=threading.Lock()
+_memo_hits=0; _memo_bytes=0
+class _Flight:
+    def __init__(self):
+        self.done=threading.Event(); self.result=None; self.size=0
+def configure_cache(cache_dir=None, ttl=None, ttls=None, max_bytes=None):
+    # Called once by main(); with no cache_dir every request goes straight upstream.
+    global _cache
+    if _cache: _cache.close()
+    _cache=None
+    if cache_dir:
+        kw={k:v for k,v in (('ttl',ttl),('ttls',ttls),('max_bytes',max_bytes)) if v is not None}
+        _cache=HttpCache(cache_dir, **kw)
+    return _cache
+def cache_stats():
+    return _cache.stats() if _cache else None
+def memo_stats():
+    with _memo_lock: return {'deduplicated': _memo_hits, 'entries': len(_memo), 'bytes': _memo_bytes}
+def configure_endpoints(mapping=None):
+    # {'https://www.ebi.ac.uk': 'http://127.0.0.1:8000/ebi', ...}: upstream URL prefixes served
+    # elsewhere (benchmarks, mirrors, air-gapped stand-ins). Defaults to $METAPHENOMAP_ENDPOINTS,
+    # a comma-separated list of PREFIX=REPLACEMENT.
+    if mapping is None:
+        spec=os.environ.get('METAPHENOMAP_ENDPOINTS','')
+        mapping=dict(p.split('=',1) for p in spec.split(',') if '=' in p)
+    _endpoints.clear(); _endpoints.update(mapping)
+def endpoint(url):
+    for prefix, repl in _endpoints.items():
+        if url.startswith(prefix): return repl+url[len(prefix):]
+    return url
+configure_endpoints()
+def configure_session(**settings):
+    # pool_size, retries, backoff, connect_timeout, read_timeout; the session is rebuilt on next use.
+    global _session
+    unknown=set(settings)-set(_settings)
+    if unknown: raise ValueError(f'Unknown HTTP settings: {sorted(unknown)}')
+    _settings.update({k:v for k,v in settings.items() if v is not None})
+    with _session_lock:
+        if _session: _session.close()
+        _session=None
+def session():
+    # One process-wide Session: keep-alive pools per host sized to the run's concurrency.
+    # urllib3 only retries connection/read errors here (its own Retry-After handling is off too);
+    # status retries (429/5xx) go through _send() so the per-host governor sees every throttling answer.
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry=Retry(total=_settings['retries'], backoff_factor=_settings['backoff'], status_forcelist=(),
+                        allowed_methods=frozenset(IDEMPOTENT), raise_on_status=False,
+                        respect_retry_after_header=False)
+            adapter=HTTPAdapter(pool_connections=16, pool_maxsize=max(1, _settings['pool_size']), max_retries=retry)
+            s=requests.Session()
+            s.hooks['response'].append(metrics.observe_response)
+            s.mount('https://', adapter); s.mount('http://', adapter)
+            _session=s
+        return _session
+def configure_api_keys(ncbi=None):
+    # NCBI E-utilities accept api_key on every call (10 req/s instead of 3).
+    _api_keys.clear()
+    if ncbi: _api_keys[NCBI_HOST]=ncbi
+def _with_key(host, method, params, data):
+    key=_api_keys.get(host)
+    if not key: return params, data
+    if method=='POST' and isinstance(data, dict): return params, dict(data, api_key=key)
+    return dict(params or {}, api_key=key), data
+def _send(method, url, params=None, data=None, headers=None, stream=False):
+    # Every upstream call: per-host governor slot (rate, concurrency, Retry-After), status retries
+    # with backoff (429/503 for any method, other 5xx for GET/HEAD only). The governor is keyed on
+    # the upstream host even when endpoint() redirects the call elsewhere.
+    host=urlparse(url).netloc
+    gov=governor.for_host(host)
+    params, data=_with_key(host, method, params, data)
+    target=endpoint(url)
+    for attempt in range(_settings['retries']+1):
+        gov.acquire(); status=retry_after=None
+        try:
+            r=session().request(method, target, params=params, data=data, headers=headers, timeout=timeout(), stream=stream)
+            status=r.status_code; retry_after=r.headers.get('Retry-After')
+        finally:
+            gov.release(status, retry_after)
+        retry=status in governor.THROTTLE_STATUSES or (status in RETRY_STATUSES and method in IDEMPOTENT)
+        if not retry or attempt==_settings['retries']: return r
+        metrics.incr('http_status_retries'); r.close()
+        if status not in governor.THROTTLE_STATUSES: time.sleep(_settings['backoff']*2**attempt)
+def timeout():
+    return (_settings['connect_timeout'], _settings['read_timeout'])
+def _response(url, status, headers, body):
+    r=requests.Response()
+    r.status_code=status; r.url=url; r.reason='OK'
+    r.headers=CaseInsensitiveDict(headers); r.encoding=get_encoding_from_headers(r.headers)
+    r._content=body; r._content_consumed=True
+    return r
+def _join(key):
+    # Per-run memo: the first caller of a key becomes the leader and fetches; concurrent and
+    # later callers get its result, so the metadata, URL and verify passes share one response
+    # with or without the disk cache. Only 2xx results are kept (MEMO_BYTES of bodies, LRU):
+    # waiters of a leader that failed or got an error status retry on their own.
+    global _memo_hits
+    while True:
+        with _memo_lock:
+            f=_memo.get(key)
+            if f is None:
+                f=_memo[key]=_Flight()
+                return f, True
+            _memo.move_to_end(key)
+        f.done.wait()
+        if f.result is not None:
+            with _memo_lock: _memo_hits+=1
+            return f, False
+def request(method, url, params=None, data=None, headers=None, stream=False, cache=True):
+    # Unless cache=False, bodies are read whole so they can be shared and stored.
+    send=lambda stream: _send(method, url, params, data, headers, stream)
+    if not cache:
+        return send(stream)
+    key=cache_key(method, url, params, data)
+    f, leader=_join(key)
+    if not leader: return _response(url, *f.result)
+    try:
+        hit=_cache.get(key, url) if _cache else None
+        if hit:
+            metrics.incr('http_cache_hits')
+            f.result=hit; return _response(url, *hit)
+        r=send(False)
+        if 'content-length' not in r.headers: metrics.add_bytes(r.url, len(r.content))
+        if r.ok:
+            f.result=(r.status_code, dict(r.headers), r.content)
+            if _cache: _cache.put(key, url, r.status_code, r.headers, r.content)
+        return r
+    finally:
+        _settle(key, f)
+def _settle(key, f):
+    # Keeps a leader's 2xx result within the MEMO_BYTES budget, else frees its key.
+    global _memo_bytes
+    size=len(f.result[2]) if f.result else 0
+    with _memo_lock:
+        if _memo.get(key) is f:
+            if f.result is None or size>MEMO_BYTES//4: del _memo[key]; f.size=0
+            else: f.size=size; _memo_bytes+=size
+        if _memo_bytes>MEMO_BYTES:
+            for k in [k for k, g in _memo.items() if g.done.is_set()]:
+                _memo_bytes-=_memo.pop(k).size
+                if _memo_bytes<=MEMO_BYTES: break
+    f.done.set()
+def get(url, params=None, **kw): return request('GET', url, params=params, **kw)
+def post(url, data=None, **kw): return request('POST', url, data=data, **kw)
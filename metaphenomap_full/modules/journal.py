@@ -0,0 +1,45 @@
+import os, json, threading
+from datetime import datetime
+from modules.writers import trim_torn_tail
+class Journal:
+    # Append-only JSONL log of finished accessions, one line per outcome, flushed as soon as an
+    # accession finishes (in completion order, not input order). Each line carries the finished
+    # row, so rows a crash kept from reaching the in-order output can be written on resume without
+    # redoing them. The last line for an accession wins when a run is resumed.
+    def __init__(self, path, resume=False, written=None):
+        self.path=path
+        self.done, self.unwritten=self.load(path, written) if resume else ({}, {})
+        self._lock=threading.Lock()
+        if resume and os.path.exists(path): trim_torn_tail(path)  # else the next entry joins a torn line
+        self._f=open(path, 'a' if resume else 'w')
+    @staticmethod
+    def load(path, written=None):
+        # -> (done, unwritten): the last entry per accession (without its row), and the rows of
+        # journaled accessions missing from the output, given the set of accessions it holds.
+        done={}; unwritten={}
+        if not os.path.exists(path): return done, unwritten
+        with open(path) as f:
+            for ln in f:
+                try: e=json.loads(ln)
+                except ValueError: continue  # torn last line from a crash
+                acc=e.get('accession')
+                if not acc: continue
+                row=e.pop('row', None)
+                done[acc]=e
+                if row is not None and written is not None and acc not in written: unwritten[acc]=row
+                else: unwritten.pop(acc, None)
+        return done, unwritten
+    def should_skip(self, accession, retry_errors=False):
+        e=self.done.get(accession)
+        if not e: return False
+        if e['status']=='ok': return True
+        return e['status']=='error' and not retry_errors
+    def record(self, accession, status, error=None, downloads=None, row=None):
+        e={'accession':accession,'status':status,'error':error,'downloads':downloads or [],
+           'at':datetime.utcnow().isoformat()+'Z'}
+        line=json.dumps(dict(e, row=row) if row is not None else e, default=str)
+        with self._lock:
+            self._f.write(line+'\n'); self._f.flush()
+            self.done[accession]=e
+    def close(self):
+        self._f.close()
@@ -0,0 +1,93 @@
+import os, csv, json, sys
+from modules.writers import schema, infer_format, open_sink
+def _header(path, fmt):
+    if fmt=='csv':
+        with open(path, newline='') as f: return next(csv.reader(f), [])
+    if fmt=='parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    return []  # JSONL: keys are collected per row
+def _raw(path, fmt):
+    if fmt=='csv':
+        csv.field_size_limit(sys.maxsize)
+        with open(path, newline='') as f:
+            for r in csv.DictReader(f): yield {k:(v if v!='' else None) for k,v in r.items()}
+    elif fmt=='parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(): yield from batch.to_pylist()
+    else:
+        with open(path) as f:
+            for ln in f:
+                if ln.strip(): yield json.loads(ln)
+def read_rows(path, fmt=None):
+    # Rows of a metaphenomap output as dicts, with _extra expanded back into keys.
+    return map(_expand, _raw(path, fmt or infer_format(path)))
+def _expand(row):
+    extra=row.pop('_extra', None)
+    if isinstance(extra, str):
+        try: extra=json.loads(extra)
+        except ValueError: extra={'_extra':extra}
+    if isinstance(extra, dict):
+        for k, v in extra.items(): row.setdefault(k, v)
+    return row
+def drop_accessions(path, accessions, fmt=None):
+    # Rewrites a CSV/JSONL output without the rows of the given accessions (atomic replace), so a
+    # resumed run can re-do them without leaving the old row behind. Torn rows (short CSV rows,
+    # unparsable JSON lines) are left out too. Returns the rows dropped.
+    kind=fmt or infer_format(path); tmp=path+'.tmp'; dropped=0
+    if kind=='parquet': raise SystemExit('Parquet files cannot be appended to; resume with CSV or JSONL output')
+    if kind=='csv': csv.field_size_limit(sys.maxsize)
+    with open(path, newline='') as f, open(tmp, 'w', newline='') as out:
+        if kind=='csv':
+            r=csv.reader(f); w=csv.writer(out); header=next(r, [])
+            w.writerow(header); i=header.index('Accession')
+            for row in r:
+                if len(row)<len(header): continue
+                if row[i] in accessions: dropped+=1
+                else: w.writerow(row)
+        else:
+            for ln in f:
+                try: acc=json.loads(ln).get('Accession')
+                except ValueError: continue
+                if acc in accessions: dropped+=1
+                else: out.write(ln)
+    os.replace(tmp, path)
+    return dropped
+def merge(inputs, output, fmt=None):
+    # Two streaming passes so memory is one entry per accession, not per row: the first picks the
+    # winning row per accession (latest _fetched_at; later inputs win ties), the second writes
+    # winners in input order. Columns are the standard schema plus any extra column a (legacy)
+    # input carried, so shards from different versions line up.
+    extra=[]; best={}
+    for fi, path in enumerate(inputs):
+        kind=infer_format(path); cols=dict.fromkeys(_header(path, kind))
+        for ri, row in enumerate(_raw(path, kind)):
+            if kind=='jsonl': cols.update(dict.fromkeys(row))
+            acc=row.get('Accession')
+            if not acc: continue
+            key=(row.get('_fetched_at') or '', fi, ri)
+            if acc not in best or key>best[acc]: best[acc]=key
+        extra+=[c for c in cols if c not in extra]
+    columns=schema([c for c in extra if c not in schema()])
+    winners={(fi, ri) for _, fi, ri in best.values()}
+    sink=open_sink(output, fmt, columns)
+    try:
+        for fi, path in enumerate(inputs):
+            for ri, row in enumerate(read_rows(path)):
+                if (fi, ri) in winners: sink.write(row)
+    finally:
+        sink.close()
+    return sink.rows
+def main(argv):
+    import argparse
+    from modules.writers import FORMATS
+    ap=argparse.ArgumentParser(prog='metaphenomap merge', description='Combine shard outputs into one file (one row per accession, latest _fetched_at wins)')
+    ap.add_argument('inputs', nargs='+', help='Shard outputs (CSV, JSONL or Parquet, mixed formats allowed)')
+    ap.add_argument('-o','--output', required=True, help='Merged output path')
+    ap.add_argument('--format', choices=FORMATS, help='Output format (default: from --output extension, else csv)')
+    args=ap.parse_args(argv)
+    missing=[p for p in args.inputs if not os.path.exists(p)]
+    if missing: raise SystemExit(f'Input not found: {", ".join(missing)}')
+    if os.path.abspath(args.output) in map(os.path.abspath, args.inputs): raise SystemExit('--output must not be one of the inputs')
+    n=merge(args.inputs, args.output, args.format)
+    print(f'[✓] Merged {len(args.inputs)} files into {n} records: {args.output}')
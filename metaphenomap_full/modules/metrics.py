@@ -0,0 +1,124 @@
+import os, json, time, threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+# Latency histogram upper bounds (s), shared by stages and HTTP requests.
+BUCKETS=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+_lock=threading.Lock()
+_enabled=False
+_started=time.time()
+_stages={}
+_hosts={}
+_counters={}
+class _Hist:
+    def __init__(self):
+        self.count=0; self.total=0.0; self.max=0.0; self.buckets=[0]*len(BUCKETS)
+    def add(self, secs):
+        self.count+=1; self.total+=secs; self.max=max(self.max, secs)
+        for i, b in enumerate(BUCKETS):
+            if secs<=b: self.buckets[i]+=1; break
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation.
+        seen=0
+        for b, n in zip(BUCKETS, self.buckets):
+            seen+=n
+            if seen>=q*self.count: return b if b!=float('inf') else self.max
+        return self.max
+    def as_dict(self):
+        return {'count':self.count, 'total_sec':round(self.total, 4), 'mean_sec':round(self.total/self.count, 4) if self.count else 0,
+                'max_sec':round(self.max, 4), 'p50_sec':self.quantile(0.5), 'p99_sec':self.quantile(0.99),
+                'buckets':{('+Inf' if b==float('inf') else str(b)):n for b, n in zip(BUCKETS, self.buckets)}}
+def enable():
+    global _enabled, _started
+    _enabled=True; _started=time.time()
+def enabled():
+    return _enabled
+@contextmanager
+def stage(name):
+    # Wall time of one unit of work in a pipeline stage (fetch, normalize, resolve, download, ...).
+    if not _enabled:
+        yield; return
+    t0=time.perf_counter()
+    try: yield
+    finally:
+        secs=time.perf_counter()-t0
+        with _lock: _stages.setdefault(name, _Hist()).add(secs)
+def incr(name, n=1):
+    if not _enabled: return
+    with _lock: _counters[name]=_counters.get(name, 0)+n
+def observe_response(r, *args, **kwargs):
+    # requests response hook: per-host count, status, latency (time to headers), retries, bytes.
+    if not _enabled: return
+    host=urlparse(r.url).netloc or 'unknown'
+    history=getattr(getattr(r.raw, 'retries', None), 'history', None) or ()
+    size=int(r.headers.get('content-length') or 0)  # bodies without one are added by add_bytes()
+    with _lock:
+        h=_host(host)
+        h['requests']+=1; h['retries']+=len(history); h['bytes']+=size
+        h['throttled']+=sum(1 for e in history if e.status==429)+(r.status_code==429)
+        h['status'][str(r.status_code)]=h['status'].get(str(r.status_code), 0)+1
+        h['latency'].add(r.elapsed.total_seconds())
+def _host(host):
+    return _hosts.setdefault(host, {'requests':0, 'retries':0, 'throttled':0, 'bytes':0, 'status':{}, 'latency':_Hist()})
+def add_bytes(url, n):
+    if not _enabled: return
+    with _lock: _host(urlparse(url).netloc or 'unknown')['bytes']+=n
+def snapshot():
+    with _lock:
+        return {
+            'started_at':_started, 'elapsed_sec':round(time.time()-_started, 3),
+            'stages':{k:v.as_dict() for k, v in sorted(_stages.items())},
+            'hosts':{k:dict(v, status=dict(v['status']), latency=v['latency'].as_dict()) for k, v in sorted(_hosts.items())},
+            'counters':dict(sorted(_counters.items())),
+        }
+def _atomic_write(path, text):
+    tmp=path+'.tmp'
+    with open(tmp, 'w') as f: f.write(text)
+    os.replace(tmp, path)
+def write_json(path):
+    _atomic_write(path, json.dumps(snapshot(), indent=1))
+def prometheus_text(snap=None):
+    snap=snap or snapshot(); out=[]
+    def hist(metric, labels, h):
+        acc=0
+        for le, n in h['buckets'].items():
+            acc+=n; out.append(f'{metric}_bucket{{{labels},le="{le}"}} {acc}')
+        out.append(f'{metric}_sum{{{labels}}} {h["total_sec"]}'); out.append(f'{metric}_count{{{labels}}} {h["count"]}')
+    out.append('# TYPE metaphenomap_stage_seconds histogram')
+    for name, h in snap['stages'].items(): hist('metaphenomap_stage_seconds', f'stage="{name}"', h)
+    out.append('# TYPE metaphenomap_http_request_seconds histogram')
+    for host, v in snap['hosts'].items(): hist('metaphenomap_http_request_seconds', f'host="{host}"', v['latency'])
+    for key, kind in (('requests','requests_total'), ('retries','retries_total'), ('throttled','throttled_total'), ('bytes','bytes_total')):
+        out.append(f'# TYPE metaphenomap_http_{kind} counter')
+        for host, v in snap['hosts'].items(): out.append(f'metaphenomap_http_{kind}{{host="{host}"}} {v[key]}')
+    out.append('# TYPE metaphenomap_events_total counter')
+    for name, n in snap['counters'].items(): out.append(f'metaphenomap_events_total{{event="{name}"}} {n}')
+    return '\n'.join(out)+'\n'
+def write_prometheus(path):
+    _atomic_write(path, prometheus_text())
+class Reporter:
+    # Writes the JSON and/or Prometheus textfile every interval seconds (if > 0) and on stop().
+    def __init__(self, json_path=None, prom_path=None, interval=0):
+        self.json_path=json_path; self.prom_path=prom_path; self.interval=interval
+        self._stop=threading.Event(); self._t=None
+        if interval and (json_path or prom_path):
+            self._t=threading.Thread(target=self._run, daemon=True); self._t.start()
+    def _run(self):
+        while not self._stop.wait(self.interval): self.write()
+    def write(self):
+        if self.json_path: write_json(self.json_path)
+        if self.prom_path: write_prometheus(self.prom_path)
+    def stop(self):
+        self._stop.set()
+        if self._t: self._t.join()
+        self.write()
+def summary():
+    # Plain-text table for --profile.
+    snap=snapshot(); lines=[f"[i] Profile ({snap['elapsed_sec']:.1f} s wall)"]
+    for name, h in snap['stages'].items():
+        lines.append(f"    {name:<14} {h['count']:>7} x  total {h['total_sec']:>9.2f} s  mean {h['mean_sec']:>7.3f} s  p99 <= {h['p99_sec']} s")
+    for host, v in snap['hosts'].items():
+        lat=v['latency']
+        lines.append(f"    {host:<32} {v['requests']:>6} req  {v['retries']:>4} retries  {v['throttled']:>4} x429  "
+                     f"{v['bytes']/1e6:>9.1f} MB  mean {lat['mean_sec']:.3f} s  p99 <= {lat['p99_sec']} s")
+    for name, n in snap['counters'].items(): lines.append(f"    {name:<14} {n}")
+    return '\n'.join(lines)
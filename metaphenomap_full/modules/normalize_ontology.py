@@ -1,11 +1,148 @@
+import os, re, json, pickle, hashlib
+from collections import deque
+from functools import lru_cache
+OBO_IRI='http://purl.obolibrary.org/obo/'
+FIELDS=('Host','Isolation_Source','Disease')
+# Ontologies per field. Host and Disease are only normalized when one of theirs is loaded (a stool
+# ENVO term says nothing about a disease); fields in FALLBACK_FIELDS use every loaded term instead.
+FIELD_PREFIXES={
+    'Host': ('NCBITaxon',),
+    'Isolation_Source': ('ENVO','UBERON','PO'),
+    'Disease': ('DOID','MONDO'),
+}
+FALLBACK_FIELDS=('Isolation_Source',)
+# Used when no --ontology file is given (the original hard-coded rules).
+BUILTIN_TERMS=[
+    ('ENVO:02000044','feces',['stool','faeces']),
+    ('PO:0020148','shoot apical meristem',[]),
+]
+INDEX_VERSION=1
+def _norm(s):
+    return ' '.join(re.sub(r'[_\-/,;:()]+', ' ', s.lower()).split())
+def iri(term_id):
+    return term_id if term_id.startswith('http') else OBO_IRI+term_id.replace(':','_')
+class Matcher:
+    # Aho-Corasick automaton over normalized synonyms: one pass over a value finds every
+    # synonym occurring in it, however many terms are loaded. Plain lists/dicts so it pickles.
+    def __init__(self, patterns):
+        self.goto=[{}]; self.fail=[0]; self.out=[[]]
+        for text, payload in patterns:
+            node=0
+            for ch in text:
+                nxt=self.goto[node].get(ch)
+                if nxt is None:
+                    nxt=len(self.goto); self.goto[node][ch]=nxt
+                    self.goto.append({}); self.fail.append(0); self.out.append([])
+                node=nxt
+            self.out[node].append((len(text), payload))
+        queue=deque(self.goto[0].values())
+        while queue:
+            node=queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                f=self.fail[node]
+                while f and ch not in self.goto[f]: f=self.fail[f]
+                self.fail[nxt]=self.goto[f].get(ch, 0)
+                self.out[nxt]=self.out[nxt]+self.out[self.fail[nxt]]
+                queue.append(nxt)
+    def find(self, text):
+        # Yields (start, end, payload) for whole-word matches only.
+        node=0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]: node=self.fail[node]
+            node=self.goto[node].get(ch, 0)
+            for n, payload in self.out[node]:
+                s=i-n+1
+                if (s==0 or not text[s-1].isalnum()) and (i+1==len(text) or not text[i+1].isalnum()):
+                    yield s, i+1, payload
+class OntologyIndex:
+    def __init__(self, terms):
+        # terms: [(term_id, label, [(synonym, rank)])]; rank 0 = label/EXACT, 1 = other synonyms
+        self.terms=[(tid, label) for tid, label, _ in terms]
+        self.prefixes={tid.split(':')[0] for tid, _ in self.terms}
+        patterns={}
+        for idx, (tid, label, syns) in enumerate(terms):
+            for text, rank in [(label, 0)]+list(syns):
+                key=_norm(text)
+                if key and (key not in patterns or rank<patterns[key][1]): patterns[key]=(idx, rank)
+        self.matcher=Matcher(sorted(patterns.items()))
+    def match(self, value, field=None):
+        # Best term for a raw value: preferred ontology for the field, then longest span, then rank.
+        wanted=FIELD_PREFIXES.get(field, ())
+        restrict=bool(self.prefixes.intersection(wanted))
+        if wanted and not restrict and field not in FALLBACK_FIELDS: return None
+        best=None
+        for s, e, (idx, rank) in self.matcher.find(_norm(value)):
+            tid=self.terms[idx][0]
+            if restrict and tid.split(':')[0] not in wanted: continue
+            score=(e-s, -rank)
+            if best is None or score>best[0]: best=(score, idx)
+        return self.terms[best[1]] if best else None
+def parse_obo(path):
+    terms=[]; cur=None
+    def flush():
+        if cur and cur.get('id') and cur.get('name') and not cur.get('obsolete'):
+            terms.append((cur['id'], cur['name'], cur['syns']))
+    with open(path, encoding='utf-8') as f:
+        for ln in f:
+            ln=ln.strip()
+            if ln.startswith('['):
+                flush(); cur={'syns':[]} if ln=='[Term]' else None
+            elif cur is not None and ': ' in ln:
+                tag, val=ln.split(': ', 1)
+                if tag=='id': cur['id']=val
+                elif tag=='name': cur['name']=val
+                elif tag=='is_obsolete' and val.startswith('true'): cur['obsolete']=True
+                elif tag=='synonym':
+                    m=re.match(r'"((?:[^"\\]|\\.)*)"\s+(\w+)', val)
+                    if m: cur['syns'].append((m.group(1).replace('\\"','"'), 0 if m.group(2)=='EXACT' else 1))
+    flush()
+    return terms
+def parse_synonym_table(path):
+    # TSV: term_id <tab> synonym [<tab> label]; the first synonym seen for an id becomes its label.
+    by_id={}
+    with open(path, encoding='utf-8') as f:
+        for ln in f:
+            parts=ln.rstrip('\n').split('\t')
+            if len(parts)<2 or ln.startswith('#'): continue
+            tid, syn=parts[0].strip(), parts[1].strip()
+            entry=by_id.setdefault(tid, [parts[2].strip() if len(parts)>2 and parts[2].strip() else syn, []])
+            entry[1].append((syn, 0))
+    return [(tid, label, syns) for tid, (label, syns) in by_id.items()]
+def load_index(paths, cache_dir=None):
+    # Compiled indexes are pickled under cache_dir, keyed on the files' paths, sizes and mtimes.
+    stamp=[(os.path.abspath(p), os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in paths]
+    key=hashlib.sha1(json.dumps([INDEX_VERSION, stamp]).encode()).hexdigest()
+    cached=os.path.join(cache_dir, f'ontology-{key}.pkl') if cache_dir else None
+    if cached and os.path.exists(cached):
+        try:
+            with open(cached, 'rb') as f: return pickle.load(f)
+        except Exception: pass
+    terms=[]
+    for p in paths:
+        terms+=parse_obo(p) if p.lower().endswith('.obo') else parse_synonym_table(p)
+    index=OntologyIndex(terms)
+    if cached:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp=cached+'.tmp'
+        with open(tmp, 'wb') as f: pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cached)
+    return index
+_index=OntologyIndex([(tid, label, [(s, 0) for s in syns]) for tid, label, syns in BUILTIN_TERMS])
+def configure(paths, cache_dir=None):
+    global _index
+    if paths: _index=load_index(paths, cache_dir)
+    _match.cache_clear()
+@lru_cache(maxsize=1<<18)
+def _match(field, value):
+    # Values repeat heavily across samples, so each distinct (field, value) is matched once.
+    return _index.match(value, field)
 def normalize_fields(d, validate_terms=True):
     norm=dict(d)
-    if isinstance(d.get('Isolation_Source'), str):
-        v=d['Isolation_Source'].lower()
-        if 'feces' in v or 'stool' in v:
-            norm['Isolation_Source_normalized']='feces'
-            norm['Isolation_Source_IRI']='http://purl.obolibrary.org/obo/ENVO_02000044'
-        elif 'shoot apical meristem' in v:
-            norm['Isolation_Source_normalized']='shoot apical meristem'
-            norm['Isolation_Source_IRI']='http://purl.obolibrary.org/obo/PO_0020148'
+    for field in FIELDS:
+        v=d.get(field)
+        if not isinstance(v, str) or not v.strip(): continue
+        hit=_match(field, v)
+        if hit:
+            norm[f'{field}_normalized']=hit[1]
+            norm[f'{field}_IRI']=iri(hit[0])
     return norm
@@ -0,0 +1,53 @@
+import os, json, zipfile, threading
+# Already-compressed payloads gain nothing from Deflate; store them as-is.
+COMPRESSED_EXT=('.gz','.bgz','.bz2','.xz','.zst','.zip','.7z','.bam','.cram','.sra')
+MANIFEST='MANIFEST.json'
+def compress_type(name):
+    return zipfile.ZIP_STORED if name.lower().endswith(COMPRESSED_EXT) else zipfile.ZIP_DEFLATED
+class AccessionArchive:
+    # Per-accession zip filled while downloads land: add() is called from the download worker
+    # that just finished a file (page cache still warm), close() publishes <acc_dir>.zip atomically.
+    def __init__(self, zip_path):
+        self.zip_path=zip_path; self.members=[]
+        self._tmp=zip_path+'.part'; self._zf=None; self._lock=threading.Lock()
+    def add(self, path, arcname=None):
+        arcname=arcname or os.path.basename(path)
+        with self._lock:
+            if self._zf is None: self._zf=zipfile.ZipFile(self._tmp, 'w', allowZip64=True)
+            if arcname in self.members: return
+            self._zf.write(path, arcname, compress_type=compress_type(arcname))
+            self.members.append(arcname)
+    def close(self):
+        with self._lock:
+            if self._zf is None: return None
+            self._zf.close(); self._zf=None
+            os.replace(self._tmp, self.zip_path)
+            return self.zip_path
+def zip_all(outdir, zip_path, skip=()):
+    # Packs outdir into one archive without double-packing: an accession folder that already has
+    # a sibling <folder>.zip is represented by that zip (stored) only. A MANIFEST.json member
+    # indexes what each entry contains.
+    outdir=os.path.abspath(outdir); skip={os.path.abspath(p) for p in skip}
+    tmp=zip_path+'.part'; manifest={}
+    with zipfile.ZipFile(tmp, 'w', allowZip64=True) as zf:
+        for entry in sorted(os.listdir(outdir)):
+            full=os.path.join(outdir, entry)
+            if full in skip or entry.endswith(('.part','.part.json','.link')): continue
+            if os.path.isdir(full):
+                if os.path.isfile(full+'.zip'): continue
+                members=[]
+                for root, _, files in os.walk(full):
+                    for f in sorted(files):
+                        if f.endswith(('.part','.part.json','.link')): continue
+                        p=os.path.join(root, f); arc=os.path.relpath(p, outdir)
+                        zf.write(p, arc, compress_type=compress_type(f)); members.append(arc)
+                manifest[entry]={'type':'folder','members':members}
+            else:
+                zf.write(full, entry, compress_type=compress_type(entry))
+                if entry.endswith('.zip'):
+                    with zipfile.ZipFile(full) as inner: manifest[entry]={'type':'archive','members':inner.namelist()}
+                else:
+                    manifest[entry]={'type':'file'}
+        zf.writestr(MANIFEST, json.dumps(manifest, indent=1))
+    os.replace(tmp, zip_path)
+    return zip_path
@@ -0,0 +1,112 @@
+import os, json, hashlib, threading
+from modules import http_client
+MIN_SEGMENT=8*1024*1024
+CHUNK=1024*1024
+SAVE_EVERY=16*1024*1024
+def probe(url):
+    r=http_client.request('HEAD', url, cache=False)
+    if not r.ok: return None, False
+    size=int(r.headers.get('Content-Length') or 0)
+    return size or None, r.headers.get('Accept-Ranges','').lower()=='bytes'
+def _plan(size, segments):
+    n=max(1, min(segments, size//MIN_SEGMENT))
+    step=-(-size//n)
+    return [[i*step, min(size, (i+1)*step)-1, 0] for i in range(n)]  # [start, end (inclusive), bytes done]
+class _State:
+    # Sidecar <file>.part.json: url, size and per-segment progress, rewritten atomically.
+    def __init__(self, path, url, size, segments):
+        self.path=path; self.url=url; self.size=size; self.segments=segments
+        self.lock=threading.Lock(); self.unsaved=0
+    @classmethod
+    def load(cls, path, url, size):
+        try:
+            with open(path) as f: st=json.load(f)
+        except (OSError, ValueError):
+            return None
+        if st.get('url')!=url or st.get('size')!=size: return None
+        return cls(path, url, size, st['segments'])
+    def advance(self, seg, n):
+        with self.lock:
+            seg[2]+=n; self.unsaved+=n
+            if self.unsaved>=SAVE_EVERY: self._save()
+    def save(self):
+        with self.lock: self._save()
+    def _save(self):
+        tmp=self.path+'.tmp'
+        with open(tmp,'w') as f: json.dump({'url':self.url,'size':self.size,'segments':self.segments}, f)
+        os.replace(tmp, self.path); self.unsaved=0
+def _fetch_segment(url, fd, seg, state, limiter=None):
+    start, end, done=seg
+    if start+done>end: return
+    headers={'Range': f'bytes={start+done}-{end}'}
+    with http_client.get(url, headers=headers, stream=True, cache=False) as r:
+        r.raise_for_status()
+        if r.status_code!=206 and start+done>0:
+            raise IOError(f'Server ignored Range request for {url}')
+        for chunk in r.iter_content(chunk_size=CHUNK):
+            if not chunk: continue
+            mv=memoryview(chunk)[:end-start-seg[2]+1]
+            while mv:
+                n=os.pwrite(fd, mv, start+seg[2]); mv=mv[n:]
+                state.advance(seg, n)
+                if limiter: limiter.consume(n)
+            if start+seg[2]>end: break
+    if start+seg[2]<=end: raise IOError(f'Short read for {url} at byte {start+seg[2]}')
+def _single_stream(url, part, limiter=None):
+    # Bytes are hashed as they are written; a resumed prefix is hashed from disk first.
+    md5=hashlib.md5()
+    have=os.path.getsize(part) if os.path.exists(part) else 0
+    headers={'Range': f'bytes={have}-'} if have else None
+    with http_client.get(url, headers=headers, stream=True, cache=False) as r:
+        if r.status_code!=416: r.raise_for_status()
+        if r.status_code in (206, 416):
+            with open(part, 'rb') as f:
+                for ch in iter(lambda: f.read(CHUNK), b''): md5.update(ch)
+        if r.status_code==416: return md5.hexdigest()
+        with open(part, 'ab' if r.status_code==206 else 'wb') as f:
+            for chunk in r.iter_content(chunk_size=CHUNK):
+                if not chunk: continue
+                f.write(chunk); md5.update(chunk)
+                if limiter: limiter.consume(len(chunk))
+    return md5.hexdigest()
+def download(url, path, segments=8, limiter=None, size=None):
+    # Fetches url into path via <path>.part: concurrent HTTP Range segments written in place with
+    # os.pwrite when the server advertises ranges and the file is large enough, else one resumable
+    # stream. Progress lives in <path>.part.json, so a rerun continues where it stopped; path only
+    # appears (atomic rename) once every byte is there. Returns the MD5 when it could be computed
+    # in stream order (single stream), else None. limiter (bandwidth.TokenBucket) caps the rate.
+    # A known size that is too small to split skips the HEAD probe.
+    part=path+'.part'; side=part+'.json'
+    size, ranged=(size, False) if size and size<2*MIN_SEGMENT else probe(url)
+    if not size or not ranged or size<2*MIN_SEGMENT or segments<=1 or not hasattr(os,'pwrite'):
+        if os.path.exists(side):  # preallocated by an earlier segmented attempt; not a valid prefix
+            os.remove(side)
+            if os.path.exists(part): os.remove(part)
+        digest=_single_stream(url, part, limiter)
+        os.replace(part, path)
+        return digest
+    state=_State.load(side, url, size) if os.path.exists(part) else None
+    if state is None:
+        state=_State(side, url, size, _plan(size, segments))
+        fd=os.open(part, os.O_RDWR|os.O_CREAT|os.O_TRUNC, 0o644)
+        try:
+            if hasattr(os,'posix_fallocate'): os.posix_fallocate(fd, 0, size)
+            else: os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+        state.save()
+    fd=os.open(part, os.O_RDWR)
+    errors=[]
+    def run(seg):
+        try: _fetch_segment(url, fd, seg, state, limiter)
+        except Exception as e: errors.append(e)
+    try:
+        threads=[threading.Thread(target=run, args=(seg,), daemon=True) for seg in state.segments]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        os.fsync(fd)
+    finally:
+        os.close(fd); state.save()
+    if errors: raise errors[0]
+    os.replace(part, path); os.remove(side)
+    return None
@@ -0,0 +1,52 @@
+import importlib, logging
+from functools import lru_cache
+# (db, kind) -> {'fetch': per-accession fetcher, 'batch': batched fetcher}, as "module:function"
+# strings so nothing is imported until a db is actually used.
+BUILTIN = {
+    ('ncbi','sample'):            {'fetch':'modules.fetch_ncbi:fetch_and_parse_biosample', 'batch':'modules.fetch_ncbi:fetch_and_parse_biosamples'},
+    ('ena','sample'):             {'fetch':'modules.fetch_ena:fetch_and_parse_ena_sample', 'batch':'modules.fetch_ena:fetch_and_parse_ena_samples'},
+    ('sra','sample'):             {'fetch':'modules.fetch_sra:fetch_and_parse_sra_metadata', 'batch':'modules.fetch_sra:fetch_and_parse_sra_batch'},
+    ('ebibiosamples','sample'):   {'fetch':'modules.fetch_biosamples_ebi:fetch_and_parse_ebibiosamples_metadata'},
+    ('patric','sample'):          {'fetch':'modules.fetch_patric:fetch_and_parse_patric_metadata', 'batch':'modules.fetch_patric:fetch_and_parse_patric_batch'},
+    ('ncbi','assembly'):          {'fetch':'modules.fetch_assembly:fetch_and_parse_assembly_metadata', 'batch':'modules.fetch_assembly:fetch_and_parse_assembly_batch'},
+    ('ena','assembly'):           {'fetch':'modules.fetch_ena_assembly:fetch_and_parse_ena_assembly_metadata', 'batch':'modules.fetch_ena_assembly:fetch_and_parse_ena_assembly_batch'},
+    ('patric','assembly'):        {'fetch':'modules.fetch_patric:fetch_and_parse_patric_assembly', 'batch':'modules.fetch_patric:fetch_and_parse_patric_assembly_batch'},
+}
+PLUGIN_GROUP = 'metaphenomap.fetchers'
+KINDS = {'sample':('sample',), 'assembly':('assembly',), 'both':('sample','assembly')}
+def builtin_dbs():
+    return sorted({db for db, _ in BUILTIN})
+@lru_cache(maxsize=None)
+def plugins():
+    # Entry points in group metaphenomap.fetchers load to {(db, kind): {'fetch': fn|"mod:fn", 'batch': ...}}
+    # (or a callable returning one). Only scanned when a db outside BUILTIN is requested.
+    from importlib.metadata import entry_points
+    found = {}
+    for ep in entry_points(group=PLUGIN_GROUP):
+        try:
+            table = ep.load()
+            found.update(table() if callable(table) else table)
+        except Exception as e:
+            logging.warning(f'Fetcher plugin {ep.name} failed to load: {e}')
+    return found
+def _table(db):
+    return BUILTIN if any(d == db for d, _ in BUILTIN) else plugins()
+def known(db):
+    return any(d == db for d, _ in _table(db))
+@lru_cache(maxsize=None)
+def _load(ref):
+    if callable(ref): return ref
+    mod, _, fname = ref.partition(':')
+    fn = getattr(importlib.import_module(mod), fname, None)
+    if not callable(fn):
+        raise ImportError(f"Module '{mod}' does not define required function '{fname}()'.")
+    return fn
+@lru_cache(maxsize=None)
+def lookup(db, module, role):
+    # (sample_fn, assembly_fn) for role 'fetch' or 'batch'; None where the db has no such entry.
+    table = _table(db)
+    out = []
+    for kind in ('sample','assembly'):
+        ref = table.get((db, kind), {}).get(role) if kind in KINDS.get(module, ()) else None
+        out.append(_load(ref) if ref else None)
+    return tuple(out)
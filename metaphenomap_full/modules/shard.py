@@ -0,0 +1,16 @@
+import hashlib
+def parse_shard(spec):
+    # 'I/N' with 0 <= I < N, e.g. $SLURM_ARRAY_TASK_ID/$SLURM_ARRAY_TASK_COUNT.
+    try:
+        i, n=(int(x) for x in spec.split('/'))
+    except ValueError:
+        raise SystemExit(f'Bad --shard {spec!r}: expected I/N, e.g. 0/16')
+    if n<1 or not 0<=i<n: raise SystemExit(f'Bad --shard {spec!r}: need 0 <= I < N')
+    return i, n
+def shard_of(accession, n):
+    # MD5 of the normalized accession: the same shard on every node, Python version and run
+    # (unlike hash(), which is salted per process).
+    digest=hashlib.md5(accession.strip().upper().encode()).digest()
+    return int.from_bytes(digest[:8], 'big')%n
+def select(accessions, i, n):
+    return [a for a in accessions if shard_of(a, n)==i]
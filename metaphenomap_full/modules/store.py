@@ -0,0 +1,51 @@
+import os, errno, shutil, threading
+FICLONE=0x40049409  # linux/fs.h: share extents with another file (btrfs, xfs, ...)
+def _reflink(src, dst):
+    import fcntl
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+class ContentStore:
+    # Verified files keyed by upstream MD5 under <root>/<md5[:2]>/<md5>. Accession folders get
+    # hardlinks (same filesystem), else reflinks, else plain copies. File modes are left alone,
+    # since a hardlink shares them with the outdir name; instead the downloader unlinks an outdir
+    # name that shares its inode (see detach) before a tool rewrites that path in place.
+    def __init__(self, root):
+        self.root=root; self.reused=0; self.ingested=0
+        self._locks={}; self._guard=threading.Lock()
+        os.makedirs(root, exist_ok=True)
+    def path_for(self, md5):
+        return os.path.join(self.root, md5[:2], md5)
+    def lock(self, md5):
+        # Serializes work on one MD5 so two accessions sharing a file download it once.
+        with self._guard: return self._locks.setdefault(md5, threading.Lock())
+    def has(self, md5, size=None):
+        p=self.path_for(md5)
+        return os.path.isfile(p) and (size is None or os.path.getsize(p)==size)
+    def _place(self, src, dst):
+        tmp=dst+'.link'
+        if os.path.exists(tmp): os.remove(tmp)
+        try:
+            os.link(src, tmp)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP): raise
+            try: _reflink(src, tmp)
+            except (OSError, ImportError): shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    @staticmethod
+    def detach(path):
+        # Drops path if it is one of several names for its inode, so writing it cannot change the store.
+        try:
+            if os.stat(path).st_nlink>1: os.remove(path)
+        except FileNotFoundError: pass
+    def link_into(self, md5, dest):
+        os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+        self._place(self.path_for(md5), dest)
+        with self._guard: self.reused+=1
+        return dest
+    def ingest(self, path, md5):
+        dst=self.path_for(md5)
+        if os.path.isfile(dst): return dst
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        self._place(path, dst)
+        with self._guard: self.ingested+=1
+        return dst
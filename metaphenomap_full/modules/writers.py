@@ -0,0 +1,132 @@
+import os, csv, json, threading
+PROVENANCE=['Accession','_db','_module','_fetched_at','_error','_downloads','_verify','_content_stats','_zip']
+# Every key a fetcher or normalizer can emit. The output schema is fixed up front from this list;
+# anything else a record carries is kept as JSON in the trailing _extra column.
+RECORD_FIELDS=[
+    'Scientific_Name','Organism','Taxon_ID','Host','Host_normalized','Host_IRI','Host_Tax_ID','Sex','Age',
+    'Isolation_Source','Isolation_Source_normalized','Isolation_Source_IRI',
+    'Disease','Disease_normalized','Disease_IRI','AMR_Genes','Virulence_Genes','Location','Collection_Date','Center_Name',
+    'SRA_Run','SRA_Experiment','SRA_Sample','SRA_Study','Library_Strategy','Platform','Instrument',
+    'Assembly_Accession','Assembly_Level','Submitter','Submission_Date','BioSample','BioProject',
+    'FTP_Path_GenBank','FTP_Path_RefSeq',
+    'ENA_Analysis_Accession','ENA_Study','ENA_Sample','ENA_First_Public','ENA_Scientific_Name','ENA_Study_Title','ENA_Assembly_Description',
+    'Genome_Status','Genome_Length','GC_Content','Contigs',
+]
+FIELD_TYPES={'Genome_Length':'int64','Contigs':'int64','GC_Content':'float64'}
+FORMATS=['csv','jsonl','parquet']
+REORDER_WINDOW=1024  # finished rows held back waiting for an earlier, slower accession
+def schema(extra_fields=()):
+    cols=PROVENANCE+[f for f in RECORD_FIELDS if f not in PROVENANCE]
+    cols+=[f for f in extra_fields if f not in cols]
+    return cols+['_extra']
+def infer_format(path):
+    ext=os.path.splitext(path)[1].lower().lstrip('.')
+    return {'jsonl':'jsonl','ndjson':'jsonl','parquet':'parquet','pq':'parquet'}.get(ext,'csv')
+def _split(row, columns):
+    out={c:row.get(c) for c in columns if c!='_extra'}
+    extra={k:v for k,v in row.items() if k not in out}
+    out['_extra']=extra or None
+    return out
+def _cell(v):
+    if v is None: return ''
+    if isinstance(v,(list,dict)): return json.dumps(v, default=str)
+    return v
+def _appending(path, append):
+    return append and os.path.exists(path) and os.path.getsize(path)>0
+def trim_torn_tail(path, block=1<<16):
+    # A crash can leave a half-written last line; cut the file back to its last newline so the
+    # next append starts a fresh line. Returns the bytes removed.
+    with open(path, 'rb+') as f:
+        size=pos=f.seek(0, 2)
+        while pos>0:
+            n=min(pos, block); f.seek(pos-n); i=f.read(n).rfind(b'\n')
+            if i>=0: pos=pos-n+i+1; break
+            pos-=n
+        if pos<size: f.truncate(pos)
+    return size-pos
+class CsvSink:
+    def __init__(self, path, columns, append=False):
+        self.columns=columns; self.rows=0
+        if _appending(path, append): trim_torn_tail(path)
+        if _appending(path, append):
+            with open(path, newline='') as f: header=next(csv.reader(f), [])
+            if header!=columns: raise SystemExit(f'Cannot append to {path}: its columns differ from this run')
+            self._f=open(path, 'a', newline='')
+            self._w=csv.DictWriter(self._f, fieldnames=columns)
+        else:
+            self._f=open(path, 'w', newline='')
+            self._w=csv.DictWriter(self._f, fieldnames=columns); self._w.writeheader()
+    def write(self, row):
+        self._w.writerow({k:_cell(v) for k,v in _split(row, self.columns).items()})
+        self._f.flush(); self.rows+=1
+    def close(self):
+        self._f.close()
+class JsonlSink:
+    def __init__(self, path, columns, append=False):
+        self.columns=columns; self.rows=0
+        if _appending(path, append): trim_torn_tail(path)
+        self._f=open(path, 'a' if append else 'w')
+    def write(self, row):
+        self._f.write(json.dumps(_split(row, self.columns), default=str)+'\n')
+        self._f.flush(); self.rows+=1
+    def close(self):
+        self._f.close()
+class ParquetSink:
+    # Rows are buffered and flushed as one row group every row_group_size records.
+    def __init__(self, path, columns, append=False, row_group_size=10000):
+        if _appending(path, append): raise SystemExit('Parquet files cannot be appended to; resume with CSV or JSONL output')
+        try:
+            import pyarrow as pa, pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit('Parquet output needs pyarrow (pip install pyarrow)')
+        self._pa=pa; self.columns=columns; self.rows=0; self.row_group_size=row_group_size
+        self._schema=pa.schema([(c, getattr(pa, FIELD_TYPES.get(c,'string'))()) for c in columns])
+        self._w=pq.ParquetWriter(path, self._schema); self._buf=[]
+    def _typed(self, c, v):
+        if v is None or v=='': return None
+        t=FIELD_TYPES.get(c)
+        try:
+            if t=='int64': return int(float(v))
+            if t=='float64': return float(v)
+        except (TypeError, ValueError):
+            return None
+        return json.dumps(v, default=str) if isinstance(v,(list,dict)) else str(v)
+    def write(self, row):
+        self._buf.append({c:self._typed(c,v) for c,v in _split(row, self.columns).items()}); self.rows+=1
+        if len(self._buf)>=self.row_group_size: self._flush()
+    def _flush(self):
+        if self._buf:
+            self._w.write_table(self._pa.Table.from_pylist(self._buf, schema=self._schema)); self._buf=[]
+    def close(self):
+        self._flush(); self._w.close()
+class PreviewSink:
+    # --dryrun: print the first few rows instead of writing a file.
+    def __init__(self, path, columns, append=False, limit=5):
+        self.columns=columns; self.rows=0; self.limit=limit
+    def write(self, row):
+        if self.rows<self.limit:
+            print('  '+', '.join(f'{k}={v}' for k,v in _split(row, self.columns).items() if v not in (None,'')))
+        self.rows+=1
+    def close(self): pass
+class ReorderBuffer:
+    # Rows finish out of order once downloads are pipelined; put(i, ...) holds them until every
+    # earlier index has arrived and then hands the contiguous run to emit() in input order.
+    # wait(i) blocks the producer while i is window or more rows ahead, so held rows stay bounded.
+    def __init__(self, emit, window=None):
+        self.emit=emit; self.window=window; self._next=0; self._held={}
+        self._cond=threading.Condition()
+    def put(self, index, *item):
+        with self._cond:
+            self._held[index]=item
+            while self._next in self._held:
+                self.emit(*self._held.pop(self._next)); self._next+=1
+            self._cond.notify_all()
+    def wait(self, index):
+        if not self.window: return
+        with self._cond:
+            while index-self._next>=self.window: self._cond.wait()
+def open_sink(path, fmt=None, columns=None, dryrun=False, append=False):
+    columns=columns or schema()
+    if dryrun: return PreviewSink(path, columns)
+    fmt=fmt or infer_format(path)
+    return {'csv':CsvSink,'jsonl':JsonlSink,'parquet':ParquetSink}[fmt](path, columns, append=append)
@@ -1 +1,28 @@
-print('metaphenomap CLI placeholder')
+import os, sys, importlib.util
+_HERE = os.path.dirname(os.path.abspath(__file__))
+# Where the pipeline (metaphenomap.py + modules/) lives, first match wins: $METAPHENOMAP_HOME,
+# metaphenomap_full/ next to src/ (checkout or editable install), else the copy a regular
+# install ships as metaphenomap/_pipeline.
+CANDIDATES = [os.path.join(_HERE, '..', '..', 'metaphenomap_full'), os.path.join(_HERE, '_pipeline')]
+
+def home():
+    env = os.environ.get('METAPHENOMAP_HOME')
+    if env: return os.path.abspath(env)
+    for path in CANDIDATES:
+        if os.path.isfile(os.path.join(path, 'metaphenomap.py')): return os.path.abspath(path)
+    return os.path.abspath(CANDIDATES[-1])
+
+def _load():
+    path = os.path.join(home(), 'metaphenomap.py')
+    if not os.path.isfile(path):
+        raise SystemExit(f'metaphenomap: pipeline not found at {path}; set METAPHENOMAP_HOME')
+    spec = importlib.util.spec_from_file_location('metaphenomap_pipeline', path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def main(argv=None):
+    return _load().main(argv)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,6 @@
+import os, sys
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# The pipeline imports its helpers as `modules.X` from metaphenomap_full/; the console
+# script package lives under src/.
+sys.path.insert(0, os.path.join(ROOT, 'metaphenomap_full'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
@@ -0,0 +1,30 @@
+import json
+import pytest
+from modules import aliases
+
+@pytest.fixture(autouse=True)
+def restore():
+    yield
+    aliases._user.clear(); aliases._exact, aliases._ordered = aliases._compile(); aliases.canonical.cache_clear()
+
+@pytest.mark.parametrize('name, field', [
+    ('host', 'Host'), ('Host-Organism', 'Host'), ('host_taxid', 'Host_Tax_ID'), ('geo_loc_name', 'Location'),
+    ('isolation source', 'Isolation_Source'), ('disease_stage', 'Disease'), ('host disease stage', 'Disease'), ('organism_part', 'Isolation_Source'),
+    ('organism', 'Scientific_Name'), ('host scientific name', 'Host'), ('hostname', None), ('resource', None), ('favourite colour', None), ('', None),
+])
+def test_canonical(name, field):
+    assert aliases.canonical(name) == field
+
+def test_load_json_overrides_builtins(tmp_path):
+    p = tmp_path / 'aliases.json'
+    p.write_text(json.dumps({'Host': ['animal'], 'Body_Mass': ['weight_kg']}))
+    assert aliases.canonical('animal') is None
+    aliases.load(str(p))
+    assert aliases.canonical('animal') == 'Host' and aliases.canonical('Weight-KG') == 'Body_Mass'
+    assert aliases.fields()[-1] == 'Body_Mass'
+
+def test_load_tsv(tmp_path):
+    p = tmp_path / 'aliases.tsv'
+    p.write_text('# alias\tfield\nsource\tSample_Source\nno tab here\n')
+    aliases.load(str(p))
+    assert aliases.canonical('source') == 'Sample_Source'
@@ -0,0 +1,103 @@
+import functools, itertools, json, os, threading
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from modules import aria2_rpc
+
+class FakeAria2:
+    # Stand-in for `aria2c --enable-rpc`: the JSON-RPC methods Aria2Daemon uses, with addUri
+    # fetching the URI on a thread and reporting it complete or in error like aria2 does.
+    def __init__(self, secret):
+        self.secret = secret; self.downloads = {}; self.ids = itertools.count(1)
+    def dispatch(self, method, params):
+        if method == 'system.multicall':
+            out = []
+            for c in params[0]:
+                try: out.append([self.dispatch(c['methodName'], c['params'])])
+                except Exception as e: out.append({'code': 1, 'message': str(e)})
+            return out
+        if params[:1] != [f'token:{self.secret}']: raise ValueError('Unauthorized')
+        p = params[1:]
+        if method == 'aria2.getVersion': return {'version': 'fake'}
+        if method == 'aria2.addUri':
+            gid = f'{next(self.ids):016x}'; self.downloads[gid] = {'status': 'active', 'completedLength': '0', 'totalLength': '0'}
+            threading.Thread(target=self.fetch, args=(gid, p[0][0], p[1]), daemon=True).start()
+            return gid
+        if method == 'aria2.tellStatus': return dict(self.downloads[p[0]], gid=p[0])
+        if method == 'aria2.removeDownloadResult': self.downloads.pop(p[0]); return 'OK'
+        if method == 'aria2.shutdown': return 'OK'
+        raise ValueError(f'unknown method {method}')
+    def fetch(self, gid, url, opts):
+        r = requests.get(url)
+        if not r.ok:
+            self.downloads[gid].update(status='error', errorCode='3', errorMessage=f'HTTP {r.status_code}'); return
+        with open(os.path.join(opts['dir'], opts['out']), 'wb') as f: f.write(r.content)
+        n = str(len(r.content))
+        self.downloads[gid].update(status='complete', completedLength=n, totalLength=n)
+
+def _serve(handler):
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+@pytest.fixture
+def rpc_server():
+    fake = FakeAria2('s3cret')
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a): pass
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            try: res = {'id': body['id'], 'result': fake.dispatch(body['method'], body['params'])}
+            except Exception as e: res = {'id': body['id'], 'error': {'code': 1, 'message': str(e)}}
+            data = json.dumps(res).encode()
+            self.send_response(200); self.send_header('Content-Length', str(len(data))); self.end_headers()
+            self.wfile.write(data)
+    srv = _serve(Handler)
+    yield srv
+    srv.shutdown(); srv.server_close()
+
+@pytest.fixture
+def files(tmp_path):
+    root = tmp_path / 'srv'; root.mkdir()
+    (root / 'a.fastq.gz').write_bytes(b'x' * 1000)
+    class Quiet(SimpleHTTPRequestHandler):
+        def log_message(self, *a): pass
+    srv = _serve(functools.partial(Quiet, directory=str(root)))
+    yield f'http://127.0.0.1:{srv.server_address[1]}'
+    srv.shutdown(); srv.server_close()
+
+def _daemon(srv):
+    return aria2_rpc.Aria2Daemon(url=f'http://127.0.0.1:{srv.server_address[1]}/jsonrpc', secret='s3cret', poll_interval=0.02)
+
+def test_download_and_error(rpc_server, files, tmp_path):
+    d = _daemon(rpc_server)
+    try:
+        ok = d.download(f'{files}/a.fastq.gz', str(tmp_path), 'a.fastq.gz')
+        missing = d.download(f'{files}/b.fastq.gz', str(tmp_path), 'b.fastq.gz')
+        assert d.result(ok, timeout=10) == (str(tmp_path / 'a.fastq.gz'), None)
+        assert (tmp_path / 'a.fastq.gz').stat().st_size == 1000
+        path, err = d.result(missing, timeout=10)
+        assert path is None and 'HTTP 404' in err
+    finally:
+        d.close()
+
+def test_dead_daemon_fails_downloads(rpc_server, files, tmp_path, monkeypatch):
+    monkeypatch.setattr(aria2_rpc, 'MAX_FAILED_POLLS', 3)
+    d = _daemon(rpc_server)
+    rpc_server.shutdown(); rpc_server.server_close()
+    path, err = d.result(d.download(f'{files}/a.fastq.gz', str(tmp_path), 'a.fastq.gz'), timeout=10)
+    assert path is None and 'unreachable' in err
+    d._t.join(timeout=10)
+    assert d.dead and not d._t.is_alive()
+    # the poller is gone: later downloads must fail at once instead of waiting forever
+    f = d.download(f'{files}/a.fastq.gz', str(tmp_path), 'a.fastq.gz')
+    assert f.done() and f.result()[0] is None
+    d.close()
+
+def test_result_timeout(rpc_server):
+    d = _daemon(rpc_server)
+    try:
+        from concurrent.futures import Future
+        assert d.result(Future(), timeout=0.05) == (None, 'aria2 download not finished after 0.05 s')
+    finally:
+        d.close()
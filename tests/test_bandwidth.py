@@ -0,0 +1,45 @@
+import threading, time
+import pytest
+from modules.bandwidth import ConnectionBudget, RateShares, TokenBucket, parse_rate
+
+@pytest.mark.parametrize('value, rate', [('50M', 50 << 20), ('1.5G', int(1.5 * (1 << 30))), ('800k', 800 << 10),
+                                         ('2000000', 2000000), ('10MB/s', 10 << 20), (None, None), ('0', None)])
+def test_parse_rate(value, rate):
+    assert parse_rate(value) == rate
+
+def test_parse_rate_rejects_garbage():
+    with pytest.raises(SystemExit):
+        parse_rate('fast')
+
+def test_connection_budget_fair_share():
+    b = ConnectionBudget(30)
+    assert b.acquire(8) == 8     # alone: all it asks for
+    assert b.acquire(30) == 15   # 30 // 2 active
+    assert b.acquire(30) == 7    # 30 // 3 would be 10, only 7 left
+    assert b.used == 30 and b.active == 3
+
+def test_connection_budget_blocks_when_spent():
+    b = ConnectionBudget(2)
+    a = b.acquire(2)
+    got = []
+    t = threading.Thread(target=lambda: got.append(b.acquire(2))); t.start()
+    t.join(0.1); assert got == []
+    b.release(a); t.join(1)
+    assert got == [2]
+
+def test_rate_shares_never_exceed_the_cap():
+    s = RateShares(1000)
+    shares = [s.acquire(1)]          # alone: the whole cap
+    got = []
+    t = threading.Thread(target=lambda: got.append(s.acquire(4))); t.start()
+    t.join(0.1); assert got == []    # nothing left until the first finishes
+    s.release(shares[0]); t.join(1)
+    assert got == [250]
+    shares = [s.acquire(4) for _ in range(3)]
+    assert sum(shares) + got[0] == 1000 and s.reserved == 1000
+
+def test_token_bucket_paces_consumers():
+    b = TokenBucket(100_000, burst=10_000)
+    t0 = time.monotonic()
+    for _ in range(5): b.consume(10_000)  # 50 KB at 100 KB/s, one burst free
+    assert 0.3 < time.monotonic() - t0 < 1.0
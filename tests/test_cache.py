@@ -0,0 +1,9 @@
+from modules.cache import cache_key
+
+def test_string_bodies_keyed_verbatim():
+    # anagram bodies must not share a cache entry
+    a = cache_key('POST', 'https://www.bv-brc.org/api/genome/', data='in(genome_id,(1.2,2.1))')
+    b = cache_key('POST', 'https://www.bv-brc.org/api/genome/', data='in(genome_id,(2.1,1.2))')
+    assert a != b
+    assert a == cache_key('POST', 'https://www.bv-brc.org/api/genome/', data=b'in(genome_id,(1.2,2.1))')
+    assert cache_key('GET', 'u', {'a': 1, 'b': 2}) == cache_key('GET', 'u', {'b': 2, 'a': 1})
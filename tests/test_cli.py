@@ -1,2 +1,58 @@
-def test_true():
-    assert True
+import os
+from types import SimpleNamespace
+import pytest
+from metaphenomap import cli
+from modules import registry, writers
+
+def fetch_demo(acc): return {'Accession': acc, 'Host': 'demo'}
+
+@pytest.fixture
+def plugin(monkeypatch):
+    import importlib.metadata
+    loaded = []
+    table = {('demo', 'sample'): {'fetch': fetch_demo, 'batch': 'modules.fetch_sra:fetch_and_parse_sra_batch'}}
+    ep = SimpleNamespace(name='demo', load=lambda: (loaded.append(1), table)[1])
+    monkeypatch.setattr(importlib.metadata, 'entry_points', lambda group: [ep] if group == registry.PLUGIN_GROUP else [])
+    registry.plugins.cache_clear(); registry.lookup.cache_clear()
+    yield loaded
+    registry.plugins.cache_clear(); registry.lookup.cache_clear()
+
+def test_builtin_dbs_do_not_scan_plugins(plugin):
+    assert registry.known('sra') and 'sra' in registry.builtin_dbs()
+    fetch, batch = registry.lookup('sra', 'sample', 'fetch')
+    assert fetch.__name__ == 'fetch_and_parse_sra_metadata' and batch is None
+    assert plugin == []
+
+def test_entry_point_fetchers_are_discovered(plugin):
+    assert registry.known('demo') and plugin == [1]
+    assert registry.lookup('demo', 'both', 'fetch') == (fetch_demo, None)
+    assert registry.lookup('demo', 'sample', 'batch')[0].__name__ == 'fetch_and_parse_sra_batch'
+    assert not registry.known('nope')
+
+def test_home_prefers_env_then_checkout(monkeypatch, tmp_path):
+    monkeypatch.setenv('METAPHENOMAP_HOME', str(tmp_path))
+    assert cli.home() == str(tmp_path)
+    monkeypatch.delenv('METAPHENOMAP_HOME')
+    assert cli.home() == os.path.abspath(cli.CANDIDATES[0])  # this checkout's metaphenomap_full/
+
+def test_missing_pipeline_is_reported(monkeypatch, tmp_path):
+    monkeypatch.setenv('METAPHENOMAP_HOME', str(tmp_path))
+    with pytest.raises(SystemExit, match='pipeline not found'):
+        cli.main(['--help'])
+
+def test_dispatches_to_pipeline(monkeypatch, tmp_path):
+    (tmp_path / 'metaphenomap.py').write_text('def main(argv=None):\n    return ("ran", argv)\n')
+    monkeypatch.setenv('METAPHENOMAP_HOME', str(tmp_path))
+    assert cli.main(['-a', 'SRR1', '-o', 'x.csv']) == ('ran', ['-a', 'SRR1', '-o', 'x.csv'])
+
+def test_merge_subcommand_runs_through_cli(tmp_path, capsys):
+    a, b, out = tmp_path / 'a.csv', tmp_path / 'b.csv', tmp_path / 'm.csv'
+    for path, host in ((a, 'x'), (b, 'y')):
+        sink = writers.open_sink(str(path)); sink.write({'Accession': 'A', 'Host': host}); sink.close()
+    cli.main(['merge', str(a), str(b), '-o', str(out)])
+    assert 'into 1 records' in capsys.readouterr().out
+
+def test_help_exits_cleanly(capsys):
+    with pytest.raises(SystemExit) as e:
+        cli.main(['--help'])
+    assert e.value.code == 0 and '--output' in capsys.readouterr().out
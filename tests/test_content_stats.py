@@ -0,0 +1,43 @@
+import gzip, hashlib, struct, zlib
+import pytest
+from modules import content_stats
+
+FASTQ = b''.join(b'@r%d\n%s\n+\n%s\n' % (i, b'A' * (50 + i), b'I' * (50 + i)) for i in range(100))
+FASTA = b'>c1\nACGTACGTAC\nACGTACGTAC\n>c2\nACGTA\n>c3\nACGTACGTACGTACG\n>c4\nAC\r\n'
+
+def _bgzf(data, block=1000):
+    # bgzip layout: gzip members with a BC extra field holding the block size, plus the EOF block.
+    out = b''
+    for i in range(0, len(data) + 1, block):
+        chunk = data[i:i + block]
+        c = zlib.compressobj(6, zlib.DEFLATED, -15); raw = c.compress(chunk) + c.flush()
+        out += (b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00' + struct.pack('<H', len(raw) + 25)
+                + raw + struct.pack('<II', zlib.crc32(chunk), len(chunk)))
+    return out
+
+def _fastq_expected():
+    return {'format': 'fastq', 'reads': 100, 'bases': sum(50 + i for i in range(100)), 'mean_length': 99.5}
+
+@pytest.mark.parametrize('encode', [
+    lambda d: d,
+    gzip.compress,
+    lambda d: gzip.compress(d[:3000]) + gzip.compress(d[3000:]),  # multi-member (concatenated) gzip
+    _bgzf,
+], ids=['plain', 'gzip', 'multi-member', 'bgzf'])
+@pytest.mark.parametrize('threads', [1, 4])
+def test_fastq(tmp_path, monkeypatch, encode, threads):
+    monkeypatch.setattr(content_stats, 'CHUNK', 777)  # records straddle read boundaries
+    p = tmp_path / 'reads.fastq.gz'; data = encode(FASTQ); p.write_bytes(data)
+    md5, stats = content_stats.scan(str(p), threads=threads)
+    assert md5 == hashlib.md5(data).hexdigest()
+    assert stats == _fastq_expected()
+
+def test_fasta_n50(tmp_path):
+    p = tmp_path / 'asm.fna.gz'; p.write_bytes(gzip.compress(FASTA))
+    _, stats = content_stats.scan(str(p))
+    # lengths 20, 15, 5, 2 (total 42): 20 + 15 >= 21, so N50 is 15
+    assert stats == {'format': 'fasta', 'contigs': 4, 'bases': 42, 'mean_length': 10.5, 'n50': 15, 'longest': 20}
+
+def test_other_files_are_only_hashed(tmp_path):
+    p = tmp_path / 'x.bam'; p.write_bytes(b'BAM\x01')
+    assert content_stats.scan(str(p)) == (hashlib.md5(b'BAM\x01').hexdigest(), None)
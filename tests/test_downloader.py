@@ -0,0 +1,120 @@
+import threading
+from modules import downloader
+
+class BrokenStore:
+    def lock(self, md5): return threading.Lock()
+    def has(self, md5, size): raise OSError('store unavailable')
+
+def test_worker_survives_store_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'expected_for_url', lambda u: {'md5': 'abc', 'bytes': None})
+    monkeypatch.setattr(downloader, 'file_size', lambda u: None)
+    done = []
+    s = downloader.DownloadScheduler(workers=1, toolchain=(None, None, None), store=BrokenStore())
+    for acc in ('A', 'B'):
+        s.submit([f'https://example.org/{acc}_1.fastq.gz'], str(tmp_path / acc), acc,
+                 lambda paths, errors, digests, stats, acc=acc: done.append((acc, paths, errors)))
+    s.close()
+    assert sorted(a for a, _, _ in done) == ['A', 'B']
+    for _, paths, errors in done:
+        assert paths == [] and len(errors) == 1 and 'store unavailable' in errors[0]
+
+def test_ena_expected_pairs_http_columns(monkeypatch):
+    row = {'fastq_ftp': '', 'fastq_http': 'https://h/SRR1_1.fastq.gz;https://h/SRR1_2.fastq.gz',
+           'fastq_md5': 'aa;bb', 'fastq_bytes': '10;20',
+           'submitted_http': 'https://h/x.bam', 'submitted_md5': 'cc', 'submitted_bytes': '30'}
+    monkeypatch.setattr(downloader, 'filereport', lambda *a: [row])
+    exp = downloader._ena_run_expected('SRR1')
+    assert exp == {'SRR1_1.fastq.gz': {'md5': 'aa', 'bytes': 10}, 'SRR1_2.fastq.gz': {'md5': 'bb', 'bytes': 20},
+                   'x.bam': {'md5': 'cc', 'bytes': 30}}
+
+def test_tool_error_never_empty():
+    from concurrent.futures import TimeoutError as FutureTimeout
+    assert downloader._tool_error(FutureTimeout()) == 'TimeoutError'
+    assert downloader._tool_error(OSError('disk full')) == 'disk full'
+
+def test_scheduler_starts_largest_waiting_file_first(tmp_path, monkeypatch):
+    sizes = {'gate': 1, 'small': 10, 'big': 1000, 'mid': 100}
+    monkeypatch.setattr(downloader, 'file_size', lambda u: sizes[u])
+    s = downloader.DownloadScheduler(workers=1, toolchain=(None, None, None))
+    started, release = [], threading.Event()
+    def process(u, outdir, prefix, job, size):
+        started.append(u)
+        if u == 'gate': release.wait(5)
+        return None, None, None, None
+    s._process = process
+    s.submit(['gate'], str(tmp_path), 'A', lambda *a: None)
+    while not started: release.wait(0.01)
+    s.submit(['small', 'big', 'mid'], str(tmp_path), 'B', lambda *a: None)
+    while s._q.qsize() < 3: release.wait(0.01)
+    release.set(); s.close()
+    assert started == ['gate', 'big', 'mid', 'small']
+
+def test_submit_does_not_wait_for_sizes(tmp_path, monkeypatch):
+    head = threading.Event()
+    monkeypatch.setattr(downloader, 'file_size', lambda u: head.wait(5) and None)
+    s = downloader.DownloadScheduler(workers=1, toolchain=(None, None, None))
+    s._process = lambda *a: (None, None, None, None)
+    done = []
+    s.submit(['https://example.org/slow.fastq.gz'], str(tmp_path), 'A', lambda *a: done.append(a))
+    assert not head.is_set()  # submit returned while the HEAD is still pending
+    head.set(); s.close()
+    assert len(done) == 1
+
+def test_tool_rates_stay_under_bandwidth_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'file_size', lambda u: None)
+    s = downloader.DownloadScheduler(workers=3, toolchain=(None, 'wget', None), max_bandwidth=900)
+    lock, running, peak, rates = threading.Lock(), [], [0], []
+    def fetch(u, outdir, prefix, conns, rate):
+        with lock:
+            running.append(rate); rates.append(rate); peak[0] = max(peak[0], sum(running))
+        threading.Event().wait(0.05)
+        with lock: running.remove(rate)
+        return None, 'skipped', None
+    s._fetch = fetch
+    s.submit([f'https://example.org/{i}.fastq.gz' for i in range(9)], str(tmp_path), 'A', lambda *a: None)
+    s.close()
+    assert len(rates) == 9 and all(rates) and peak[0] <= 900
+
+class Resp:
+    def __init__(self, js): self.js = js
+    def raise_for_status(self): pass
+    def json(self): return self.js
+
+def _summary(uid, sample, *runs):
+    return {'expxml': f'<Summary/><Biosample>{sample}</Biosample>' if sample else '<Summary/>',
+            'runs': ''.join(f'<Run acc="{r}" total_spots="1"/>' for r in runs)}
+
+def test_ncbi_sample_runs_maps_runs_back_to_samples(monkeypatch):
+    calls = []
+    docs = {'11': _summary('11', 'SAMN1', 'SRR1', 'SRR2'), '12': _summary('12', 'samn2', 'SRR3'),
+            '13': _summary('13', 'SAMN1', 'SRR2'), '14': _summary('14', 'SAMN9', 'SRR9')}
+    def post(url, data=None):
+        calls.append((url.rsplit('/', 1)[-1], data['id']))
+        if 'elink' in url:  # one linkset for the whole batch: links are not grouped per sample
+            return Resp({'linksets': [{'linksetdbs': [{'links': [11, 12]}, {'links': [13, 14, 11]}]}]})
+        return Resp({'result': {'uids': data['id'].split(','), **{u: docs[u] for u in data['id'].split(',')}}})
+    monkeypatch.setattr(downloader.http_client, 'post', post)
+    monkeypatch.setattr(downloader, 'SUMMARY_BATCH', 3)
+    out = downloader.ncbi_sample_runs(['SAMN1', 'SAMN2', 'SAMN3', 'SAMN1'], batch_size=2)
+    assert out == {'SAMN1': ['SRR1', 'SRR2'], 'SAMN2': ['SRR3'], 'SAMN3': []}
+    assert calls == [('elink.fcgi', 'SAMN1,SAMN2'), ('elink.fcgi', 'SAMN3'),
+                     ('esummary.fcgi', '11,12,13'), ('esummary.fcgi', '14')]
+
+def test_ncbi_sample_runs_single_sample_without_biosample_tag(monkeypatch):
+    def post(url, data=None):
+        if 'elink' in url: return Resp({'linksets': [{'linksetdbs': [{'links': ['5']}]}]})
+        return Resp({'result': {'uids': ['5'], '5': _summary('5', None, 'ERR5')}})
+    monkeypatch.setattr(downloader.http_client, 'post', post)
+    assert downloader.ncbi_sample_runs(['SAMN5']) == {'SAMN5': ['ERR5']}
+
+def test_fastq_urls_batch_resolves_ncbi_samples_through_one_run_lookup(monkeypatch):
+    monkeypatch.setattr(downloader, 'ncbi_sample_runs', lambda samples: {'SAMN1': ['SRR1', 'SRR2'], 'SAMN2': []})
+    looked = []
+    def bulk_lookup(result, keys, accs, fields):
+        looked.append(accs)
+        return {r: {'run_accession': r, 'fastq_ftp': f'ftp.sra.ebi.ac.uk/{r}.fastq.gz', 'fastq_bytes': '7'} for r in accs}
+    monkeypatch.setattr(downloader, 'bulk_lookup', bulk_lookup)
+    out = downloader.fastq_urls_batch([('SAMN1', 'ncbi'), ('SAMN2', 'ncbi'), ('SRR2', 'sra'), ('XYZ', 'ncbi')])
+    assert looked == [['SRR2', 'SRR1']]
+    assert out == {'SRR2': ['https://ftp.sra.ebi.ac.uk/SRR2.fastq.gz'], 'SAMN2': [],
+                   'SAMN1': ['https://ftp.sra.ebi.ac.uk/SRR1.fastq.gz', 'https://ftp.sra.ebi.ac.uk/SRR2.fastq.gz']}
@@ -0,0 +1,42 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import pytest
+from modules import ena_portal, http_client
+
+@pytest.fixture
+def portal():
+    posts = []
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a): pass
+        def do_POST(self):
+            q = {k: v[0] for k, v in parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode()).items()}
+            posts.append(q)
+            accs = [t.split('"')[1] for t in q['query'].split(' OR ')]
+            body = ('sample_accession\thost\n' + ''.join(f'{a}\tHomo sapiens\n' for a in accs)).encode()
+            self.send_response(200); self.send_header('Content-Length', str(len(body))); self.end_headers()
+            self.wfile.write(body)
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    http_client.configure_endpoints({'https://www.ebi.ac.uk': f'http://127.0.0.1:{srv.server_address[1]}'})
+    ena_portal._searched.clear()
+    yield posts
+    http_client.configure_endpoints(); srv.shutdown(); srv.server_close()
+
+def test_search_rows_streams_chunks(portal):
+    accs = [f'SAMEA{i}' for i in range(5)]
+    rows = list(ena_portal.search_rows('sample', ['sample_accession'], accs, ['host'], chunk_size=2))
+    assert [r['sample_accession'] for r in rows] == accs and rows[0]['host'] == 'Homo sapiens'
+    assert len(portal) == 3 and portal[0]['fields'] == 'host,sample_accession'
+
+def test_repeated_search_is_served_from_parsed_rows(portal):
+    accs = ['SRR1', 'SRR2']
+    first = ena_portal.bulk_lookup('read_run', ('run_accession',), accs, ['host'])
+    again = ena_portal.bulk_lookup('read_run', ('run_accession',), accs, ['host'])
+    assert first == again and len(portal) == 1
+
+def test_abandoned_search_is_not_kept(portal):
+    rows = ena_portal.search_rows('sample', ['sample_accession'], ['S1', 'S2'], ['host'])
+    next(rows); rows.close()
+    assert list(ena_portal.search_rows('sample', ['sample_accession'], ['S1', 'S2'], ['host']))[1]['sample_accession'] == 'S2'
+    assert len(portal) == 2
@@ -0,0 +1,56 @@
+import json
+from modules import fetch_ncbi, fetch_assembly
+
+class Resp:
+    def __init__(self, body): self.content = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+    def raise_for_status(self): pass
+    def json(self): return json.loads(self.content)
+
+BIOSAMPLES = '''<?xml version="1.0"?>
+<BioSampleSet>
+  <BioSample accession="SAMN00000001" id="101">
+    <Ids><Id db="BioSample">SAMN00000001</Id><Id db="SRA">SRS000001</Id></Ids>
+    <Attributes>
+      <Attribute attribute_name="host">Homo sapiens</Attribute>
+      <Attribute attribute_name="host_disease">Sepsis</Attribute>
+      <Attribute attribute_name="geo_loc_name">Kenya</Attribute>
+      <Attribute attribute_name="isolation_source"> </Attribute>
+    </Attributes>
+  </BioSample>
+  <BioSample accession="SAMN00000002" id="102">
+    <Attributes><Attribute attribute_name="Isolation-Source">blood</Attribute></Attributes>
+  </BioSample>
+</BioSampleSet>'''
+
+def test_biosample_set_splits_per_accession(monkeypatch):
+    posts = []
+    monkeypatch.setattr(fetch_ncbi.http_client, 'post', lambda url, data=None: posts.append(data) or Resp(BIOSAMPLES))
+    out = fetch_ncbi.fetch_and_parse_biosamples(['samn00000001', 'SRS000001', '102', 'SAMN09999999', 'samn00000001'])
+    assert len(posts) == 1 and posts[0]['id'] == 'samn00000001,SRS000001,102,SAMN09999999'
+    assert set(out) == {'samn00000001', 'SRS000001', '102'}  # the missing accession is left out
+    first = out['samn00000001']
+    assert first['Accession'] == 'samn00000001' and first['Host'] == 'Homo sapiens'
+    assert first['Disease'] == 'Sepsis' and first['Location'] == 'Kenya' and first['Isolation_Source'] is None
+    assert out['SRS000001']['Host'] == 'Homo sapiens' and out['SRS000001']['Accession'] == 'SRS000001'
+    assert out['102']['Isolation_Source'] == 'blood' and out['102']['Host'] is None
+
+def test_biosample_batches_by_size(monkeypatch):
+    posts = []
+    monkeypatch.setattr(fetch_ncbi.http_client, 'post', lambda url, data=None: posts.append(data['id']) or Resp('<BioSampleSet/>'))
+    assert fetch_ncbi.fetch_and_parse_biosamples([f'SAMN{i}' for i in range(5)], batch_size=2) == {}
+    assert posts == ['SAMN0,SAMN1', 'SAMN2,SAMN3', 'SAMN4']
+
+def test_assembly_batch_matches_versions_and_synonyms(monkeypatch):
+    summary = {'result': {'uids': ['1', '2'],
+        '1': {'assemblyaccession': 'GCF_000005845.2', 'synonym': {'genbank': 'GCA_000005845.2'}, 'organism': 'E. coli'},
+        '2': {'assemblyaccession': 'GCA_000001405.29', 'organism': 'H. sapiens', 'biosample': 'SAMN1'}}}
+    posts = []
+    def post(url, data=None):
+        posts.append((url.rsplit('/', 1)[-1], data))
+        return Resp({'esearchresult': {'idlist': ['1', '2']}} if 'esearch' in url else summary)
+    monkeypatch.setattr(fetch_assembly.http_client, 'post', post)
+    out = fetch_assembly.fetch_and_parse_assembly_batch(['GCA_000005845.2', 'GCA_000001405', 'GCA_000001405.28', 'GCF_9.1'])
+    assert [p[0] for p in posts] == ['esearch.fcgi', 'esummary.fcgi'] and posts[1][1]['id'] == '1,2'
+    assert out['GCA_000005845.2']['Organism'] == 'E. coli'          # via the GenBank synonym
+    assert out['GCA_000001405']['BioSample'] == 'SAMN1'             # unversioned matches any version
+    assert 'GCA_000001405.28' not in out and 'GCF_9.1' not in out   # versioned must match exactly
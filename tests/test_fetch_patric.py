@@ -0,0 +1,50 @@
+import pytest
+from modules import fetch_patric
+
+class Resp:
+    def __init__(self, rows): self.rows = rows
+    def raise_for_status(self): pass
+    def json(self): return self.rows
+
+@pytest.fixture
+def bvbrc(monkeypatch):
+    calls = {'post': [], 'query': []}
+    rows = [{'genome_id': '562.1001', 'organism_name': 'E. coli', 'host_name': 'Human'},
+            {'genome_id': '999.1', 'refseq_accession': 'GCF_000005845.2', 'genbank_accession': 'GCA_000005845.2'},
+            {'genome_id': '777.1', 'genbank_accession': 'gca_000001.1'}]
+    def post(url, data=None, headers=None):
+        calls['post'].append(data); return Resp(rows)
+    def query(rql):
+        calls['query'].append(rql)
+        return {'genome_id': '123.4'} if rql.startswith('keyword(Listeria') else None
+    monkeypatch.setattr(fetch_patric.http_client, 'post', post)
+    monkeypatch.setattr(fetch_patric, '_query', query)
+    fetch_patric._lookup_batch.cache_clear(); fetch_patric._search_genome.cache_clear()
+    yield calls
+    fetch_patric._lookup_batch.cache_clear(); fetch_patric._search_genome.cache_clear()
+
+def test_rows_map_back_to_accessions(bvbrc):
+    out = fetch_patric._lookup_batch(('562.1001', 'GCF_000005845.2', 'GCA_000001.1', 'Listeria', 'nothing'))
+    assert out['562.1001']['host_name'] == 'Human'
+    assert out['GCF_000005845.2']['genome_id'] == '999.1'
+    assert out['GCA_000001.1']['genome_id'] == '777.1'  # IDs compare case-insensitively
+    assert out['Listeria'] == {'genome_id': '123.4'} and 'nothing' not in out
+    assert len(bvbrc['post']) == 1
+    body = bvbrc['post'][0]
+    assert body.startswith('or(in(genome_id,(562.1001,GCF_000005845.2,') and 'in(genbank_accession,(' in body
+
+def test_fallback_tries_candidates_in_turn(bvbrc):
+    fetch_patric._lookup_batch(('Listeria', '42'))
+    queries = sorted(bvbrc['query'])
+    # no ID-field retries; Listeria stops at its first hit, 42 tries name, taxon id and keyword
+    assert queries == ['eq(organism_name,42)', 'eq(organism_name,Listeria)', 'eq(taxon_id,42)&sort(+genome_length)',
+                       'keyword(42)&sort(+genome_length)', 'keyword(Listeria)&sort(+genome_length)']
+
+def test_batches_of_batch_size(bvbrc, monkeypatch):
+    monkeypatch.setattr(fetch_patric, 'BATCH_SIZE', 2)
+    fetch_patric._lookup_batch(('562.1001', '999.1', '777.1'))
+    assert len(bvbrc['post']) == 2
+
+def test_single_lookup_uses_the_batch_query(bvbrc):
+    assert fetch_patric.fetch_and_parse_patric_metadata('562.1001')['Host'] == 'Human'
+    assert bvbrc['query'] == []
@@ -0,0 +1,72 @@
+import threading, time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from modules import governor, http_client
+
+@pytest.fixture(autouse=True)
+def fresh():
+    governor.configure(); yield; governor.configure()
+
+def test_throttle_halves_and_success_ramps_back():
+    g = governor.HostGovernor(rate=10, concurrency=8)
+    g.acquire(); g.release(429, '0')
+    assert g.rate == 5 and g.window == 4 and g.throttled == 1
+    for _ in range(200): g.active += 1; g.release(200)
+    assert g.rate == 10 and g.window == 8  # capped at the configured ceiling
+
+def test_rate_floor_and_server_errors_do_not_ramp():
+    g = governor.HostGovernor(rate=1, concurrency=2, min_rate=0.2)
+    for _ in range(5): g.active += 1; g.release(503, '0')
+    assert g.rate == 0.2 and g.window == 1
+    g.active += 1; g.release(500)
+    assert g.rate == 0.2 and g.window == 1
+
+@pytest.mark.parametrize('value, low, high', [('2', 2, 2), ('0.5', 0.5, 0.5), ('-3', 0, 0)])
+def test_retry_after_seconds(value, low, high):
+    assert low <= governor.retry_after_seconds(value) <= high
+
+def test_retry_after_http_date_and_garbage():
+    assert 8 <= governor.retry_after_seconds(formatdate(time.time() + 10, usegmt=True)) <= 10
+    assert governor.retry_after_seconds('soon') is None and governor.retry_after_seconds(None) is None
+
+def test_acquire_waits_out_retry_after():
+    g = governor.HostGovernor(concurrency=4)
+    g.acquire(); g.release(429, '0.3')
+    t = time.monotonic(); g.acquire()
+    assert time.monotonic() - t >= 0.25
+
+def test_rate_paces_requests():
+    g = governor.HostGovernor(rate=20, concurrency=4)
+    t = time.monotonic()
+    for _ in range(41): g.acquire(); g.release(200)
+    assert time.monotonic() - t >= 0.9  # a one-second burst up front, then 20/s
+
+def test_parse_limits():
+    assert governor.parse_limits(['www.ebi.ac.uk=50/32', 'www.bv-brc.org=5', 'x.org=0']) == {
+        'www.ebi.ac.uk': (50.0, 32), 'www.bv-brc.org': (5.0, 8), 'x.org': (None, governor.DEFAULT_CONCURRENCY)}
+    with pytest.raises(SystemExit): governor.parse_limits(['www.ebi.ac.uk'])
+
+def test_configure_uses_keyed_ncbi_limits():
+    governor.configure(ncbi_api_key='k')
+    assert governor.for_host('eutils.ncbi.nlm.nih.gov').max_rate == 10
+
+def test_send_retries_throttled_request_after_retry_after():
+    hits = []
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a): pass
+        def do_GET(self):
+            hits.append(time.monotonic())
+            throttled = len(hits) == 1
+            self.send_response(429 if throttled else 200)
+            if throttled: self.send_header('Retry-After', '0.3')
+            self.send_header('Content-Length', '2'); self.end_headers(); self.wfile.write(b'ok')
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        host = f'127.0.0.1:{srv.server_address[1]}'
+        r = http_client.get(f'http://{host}/x', cache=False)
+        assert r.status_code == 200 and len(hits) == 2 and hits[1] - hits[0] >= 0.25
+        assert governor.stats()[host]['throttled'] == 1
+    finally:
+        srv.shutdown(); srv.server_close()
@@ -0,0 +1,44 @@
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from modules import http_client
+
+@pytest.fixture
+def server():
+    hits = []
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a): pass
+        def do_GET(self):
+            hits.append(self.path); time.sleep(0.2)
+            status = 404 if self.path.startswith('/missing') else 200
+            body = self.path.encode()
+            self.send_response(status); self.send_header('Content-Length', str(len(body))); self.end_headers()
+            self.wfile.write(body)
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{srv.server_address[1]}', hits
+    srv.shutdown(); srv.server_close()
+
+def _fetch_concurrently(url, n=4):
+    with ThreadPoolExecutor(n) as ex:
+        return list(ex.map(lambda _: http_client.get(url), range(n)))
+
+def test_concurrent_requests_share_one_fetch(server):
+    base, hits = server
+    rs = _fetch_concurrently(f'{base}/ok')
+    assert [r.text for r in rs] == ['/ok'] * 4 and hits == ['/ok']
+    assert http_client.get(f'{base}/ok').text == '/ok' and hits == ['/ok']  # later repeats too
+
+def test_memo_is_bounded(server, monkeypatch):
+    base, hits = server
+    monkeypatch.setattr(http_client, 'MEMO_BYTES', 12)  # four 3-byte bodies
+    for p in ('/a1', '/a2', '/a3', '/a4', '/a5', '/a1'):
+        http_client.get(base + p)
+    assert hits == ['/a1', '/a2', '/a3', '/a4', '/a5', '/a1']  # /a1 was evicted
+    assert http_client.memo_stats()['bytes'] <= 12
+
+def test_error_statuses_are_not_shared(server):
+    base, hits = server
+    rs = _fetch_concurrently(f'{base}/missing')
+    assert [r.status_code for r in rs] == [404] * 4 and len(hits) == 4
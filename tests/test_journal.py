@@ -0,0 +1,25 @@
+from modules.journal import Journal
+
+def test_unwritten_rows_are_recovered(tmp_path):
+    path = str(tmp_path / 'out.journal')
+    j = Journal(path)
+    j.record('A', 'ok', row={'Accession': 'A'})
+    j.record('B', 'ok', row={'Accession': 'B'})
+    j.record('C', 'error', 'boom', row={'Accession': 'C', '_error': 'boom'})
+    j.close()
+    j = Journal(path, resume=True, written={'A'})
+    assert set(j.unwritten) == {'B', 'C'}
+    assert j.should_skip('B') and not j.should_skip('C', retry_errors=True)
+    assert 'row' not in j.done['B']
+    j.close()
+
+def test_resume_after_crash_drops_torn_entry(tmp_path):
+    path = tmp_path / 'out.journal'
+    j = Journal(str(path))
+    j.record('A', 'ok', row={'Accession': 'A'}); j.close()
+    with open(path, 'a') as f: f.write('{"accession": "B", "status": "o')  # killed mid-entry
+    j = Journal(str(path), resume=True, written=set())
+    j.record('C', 'ok', row={'Accession': 'C'}); j.close()
+    done, unwritten = Journal.load(str(path), written=set())
+    assert set(done) == {'A', 'C'} and set(unwritten) == {'A', 'C'}
+    assert len(path.read_text().splitlines()) == 2
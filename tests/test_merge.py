@@ -0,0 +1,39 @@
+import pytest
+from modules import merge
+from modules.writers import open_sink
+
+def _write(path, rows):
+    sink = open_sink(str(path))
+    for r in rows: sink.write(r)
+    sink.close()
+
+@pytest.mark.parametrize('name', ['out.csv', 'out.jsonl'])
+def test_drop_accessions(tmp_path, name):
+    path = tmp_path / name
+    _write(path, [{'Accession': 'A', '_error': 'HTTP 503'}, {'Accession': 'B', 'Host': 'x'}, {'Accession': 'C', '_error': 'boom'}])
+    assert merge.drop_accessions(str(path), {'A', 'C'}) == 2
+    assert [r['Accession'] for r in merge.read_rows(str(path))] == ['B']
+    if name.endswith('.csv'):  # the header survives so the resumed run can append
+        assert path.read_text().splitlines()[0].startswith('Accession,')
+
+def test_merge_keeps_latest_row_per_accession(tmp_path):
+    a, b, out = tmp_path / 'shard0.csv', tmp_path / 'shard1.jsonl', tmp_path / 'merged.csv'
+    _write(a, [{'Accession': 'A', '_fetched_at': '2024-01-01T00:00:00Z', '_error': 'HTTP 503'},
+               {'Accession': 'B', '_fetched_at': '2024-01-01T00:00:00Z', 'Host': 'old'}])
+    _write(b, [{'Accession': 'A', '_fetched_at': '2024-01-02T00:00:00Z', 'Host': 'Homo sapiens'},
+               {'Accession': 'B', '_fetched_at': '2023-12-31T00:00:00Z', 'Host': 'older'},
+               {'Accession': 'C', '_fetched_at': '2024-01-02T00:00:00Z', 'custom': 'x'}])
+    assert merge.merge([str(a), str(b)], str(out)) == 3
+    rows = {r['Accession']: r for r in merge.read_rows(str(out))}
+    assert sorted(rows) == ['A', 'B', 'C']
+    assert rows['A']['Host'] == 'Homo sapiens' and not rows['A']['_error']
+    assert rows['B']['Host'] == 'old'
+    assert rows['C']['custom'] == 'x'  # extra keys survive the round trip
+
+@pytest.mark.parametrize('name, torn', [('out.csv', 'C,'), ('out.jsonl', '{"Accession": "C", "_err')])
+def test_drop_accessions_skips_torn_rows(tmp_path, name, torn):
+    path = tmp_path / name
+    _write(path, [{'Accession': 'A', '_error': 'boom'}, {'Accession': 'B'}])
+    with open(path, 'a') as f: f.write(torn)  # crash mid-row
+    assert merge.drop_accessions(str(path), {'A', 'C'}) == 1
+    assert [r['Accession'] for r in merge.read_rows(str(path))] == ['B']
@@ -0,0 +1,83 @@
+import json, re
+from datetime import timedelta
+from types import SimpleNamespace
+import pytest
+from modules import metrics
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    for name in ('_stages', '_hosts', '_counters'): monkeypatch.setattr(metrics, name, {})
+    monkeypatch.setattr(metrics, '_enabled', False)
+    metrics.enable()
+
+def _response(url, status, secs, length=None):
+    return SimpleNamespace(url=url, status_code=status, elapsed=timedelta(seconds=secs), raw=None,
+                           headers={'content-length': str(length)} if length is not None else {})
+
+def _record():
+    for secs in (0.01, 0.2, 3):
+        metrics._stages.setdefault('fetch', metrics._Hist()).add(secs)
+    metrics.incr('http_cache_hits'); metrics.incr('http_cache_hits', 2)
+    metrics.observe_response(_response('https://www.ebi.ac.uk/ena/x', 200, 0.07, 100))
+    metrics.observe_response(_response('https://www.ebi.ac.uk/ena/y', 429, 0.3))
+    metrics.add_bytes('https://www.ebi.ac.uk/ena/y', 50)
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, '_enabled', False)
+    with metrics.stage('fetch'): pass
+    metrics.incr('x'); metrics.observe_response(_response('https://h/x', 200, 0.1, 5))
+    snap = metrics.snapshot()
+    assert snap['stages'] == {} and snap['hosts'] == {} and snap['counters'] == {}
+
+def test_histogram_quantiles_are_bucket_bounds():
+    h = metrics._Hist()
+    for secs in [0.01] * 98 + [0.7, 100]: h.add(secs)
+    assert h.quantile(0.5) == 0.05 and h.quantile(0.99) == 1 and h.quantile(1) == 100  # +Inf reports the max
+    d = h.as_dict()
+    assert d['count'] == 100 and d['buckets']['0.05'] == 98 and d['buckets']['+Inf'] == 1
+
+def test_json_snapshot(tmp_path):
+    _record()
+    with metrics.stage('write'): pass
+    path = tmp_path / 'run.json'
+    metrics.write_json(str(path))
+    snap = json.loads(path.read_text())
+    assert snap['stages']['fetch']['count'] == 3 and snap['stages']['write']['count'] == 1
+    assert snap['counters'] == {'http_cache_hits': 3}
+    host = snap['hosts']['www.ebi.ac.uk']
+    assert host['requests'] == 2 and host['throttled'] == 1 and host['bytes'] == 150
+    assert host['status'] == {'200': 1, '429': 1} and host['latency']['count'] == 2
+    assert not (tmp_path / 'run.json.tmp').exists()
+
+def test_prometheus_textfile(tmp_path):
+    _record()
+    path = tmp_path / 'run.prom'
+    metrics.write_prometheus(str(path))
+    text = path.read_text()
+    samples = dict(re.findall(r'^(\S+) (\S+)$', text, re.M))
+    # buckets are cumulative and end at the count
+    assert samples['metaphenomap_stage_seconds_bucket{stage="fetch",le="0.05"}'] == '1'
+    assert samples['metaphenomap_stage_seconds_bucket{stage="fetch",le="5"}'] == '3'
+    assert samples['metaphenomap_stage_seconds_bucket{stage="fetch",le="+Inf"}'] == '3'
+    assert samples['metaphenomap_stage_seconds_count{stage="fetch"}'] == '3'
+    assert samples['metaphenomap_http_request_seconds_count{host="www.ebi.ac.uk"}'] == '2'
+    assert samples['metaphenomap_http_requests_total{host="www.ebi.ac.uk"}'] == '2'
+    assert samples['metaphenomap_http_throttled_total{host="www.ebi.ac.uk"}'] == '1'
+    assert samples['metaphenomap_http_bytes_total{host="www.ebi.ac.uk"}'] == '150'
+    assert samples['metaphenomap_events_total{event="http_cache_hits"}'] == '3'
+    types = re.findall(r'^# TYPE (\S+) (\S+)$', text, re.M)
+    assert ('metaphenomap_stage_seconds', 'histogram') in types and ('metaphenomap_http_requests_total', 'counter') in types
+    assert text.endswith('\n')
+
+def test_reporter_refreshes_and_writes_on_stop(tmp_path):
+    json_path, prom_path = tmp_path / 'm.json', tmp_path / 'm.prom'
+    r = metrics.Reporter(str(json_path), str(prom_path), interval=0.05)
+    metrics.incr('rows')
+    for _ in range(100):
+        if json_path.exists(): break
+        r._stop.wait(0.02)
+    assert json_path.exists() and prom_path.exists()
+    metrics.incr('rows')
+    r.stop()
+    assert json.loads(json_path.read_text())['counters'] == {'rows': 2}
+    assert 'metaphenomap_events_total{event="rows"} 2' in prom_path.read_text()
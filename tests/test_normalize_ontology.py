@@ -0,0 +1,20 @@
+import pytest
+from modules import normalize_ontology as no
+
+@pytest.fixture
+def builtin():
+    index = no._index
+    yield
+    no._index = index; no._match.cache_clear()
+
+def test_builtin_terms_only_normalize_isolation_source(builtin):
+    out = no.normalize_fields({'Isolation_Source': 'human stool', 'Disease': 'blood in stool', 'Host': 'stool sample'})
+    assert out['Isolation_Source_normalized'] == 'feces' and out['Isolation_Source_IRI'].endswith('ENVO_02000044')
+    assert 'Disease_normalized' not in out and 'Host_normalized' not in out
+
+def test_disease_needs_a_disease_ontology(builtin, tmp_path):
+    table = tmp_path / 'terms.tsv'
+    table.write_text('ENVO:02000044\tstool\tfeces\nDOID:8778\tcrohn disease\tCrohn\'s disease\n')
+    no.configure([str(table)])
+    out = no.normalize_fields({'Disease': "Crohn disease, blood in stool", 'Host': 'Homo sapiens'})
+    assert out['Disease_normalized'] == "Crohn's disease" and 'Host_normalized' not in out
@@ -0,0 +1,38 @@
+import json, zipfile
+from modules import packaging
+
+def _members(path):
+    with zipfile.ZipFile(path) as zf:
+        return {i.filename: i.compress_type for i in zf.infolist()}
+
+def test_accession_archive_stores_compressed_and_publishes_on_close(tmp_path):
+    (tmp_path / 'A_1.fastq.gz').write_bytes(b'\x1f\x8b' + b'x' * 100)
+    (tmp_path / 'A.fna').write_text('>c\nACGT\n' * 50)
+    archive = packaging.AccessionArchive(str(tmp_path / 'A.zip'))
+    assert archive.close() is None and not (tmp_path / 'A.zip').exists()  # nothing landed
+    archive.add(str(tmp_path / 'A_1.fastq.gz')); archive.add(str(tmp_path / 'A.fna'))
+    archive.add(str(tmp_path / 'A.fna'))  # a retried file is not added twice
+    assert not (tmp_path / 'A.zip').exists() and (tmp_path / 'A.zip.part').exists()
+    assert archive.close() == str(tmp_path / 'A.zip') and not (tmp_path / 'A.zip.part').exists()
+    assert _members(tmp_path / 'A.zip') == {'A_1.fastq.gz': zipfile.ZIP_STORED, 'A.fna': zipfile.ZIP_DEFLATED}
+
+def test_zip_all_reuses_accession_zips_and_writes_manifest(tmp_path):
+    out = tmp_path / 'downloads'
+    for acc in ('A', 'B'):
+        (out / acc).mkdir(parents=True)
+        (out / acc / f'{acc}_1.fastq.gz').write_bytes(b'reads')
+    (out / 'B' / 'nested').mkdir(); (out / 'B' / 'nested' / 'B.fna').write_text('>c\nAC\n')
+    (out / 'B' / 'half.fastq.gz.part').write_bytes(b'partial')
+    with zipfile.ZipFile(out / 'A.zip', 'w') as zf: zf.writestr('A_1.fastq.gz', b'reads')
+    (out / 'summary.csv').write_text('acc\nA\n')
+    (out / 'store').mkdir(); (out / 'store' / 'blob').write_bytes(b'x')
+    path = packaging.zip_all(str(out), str(tmp_path / 'downloads.zip'), skip=[str(out / 'store')])
+    members = _members(path)
+    # A is represented by its zip only (stored, not deflated again); partial files are skipped
+    assert set(members) == {'A.zip', 'B/B_1.fastq.gz', 'B/nested/B.fna', 'summary.csv', packaging.MANIFEST}
+    assert members['A.zip'] == zipfile.ZIP_STORED and members['B/nested/B.fna'] == zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(path) as zf: manifest = json.loads(zf.read(packaging.MANIFEST))
+    assert manifest == {'A.zip': {'type': 'archive', 'members': ['A_1.fastq.gz']},
+                        'B': {'type': 'folder', 'members': ['B/B_1.fastq.gz', 'B/nested/B.fna']},
+                        'summary.csv': {'type': 'file'}}
+    assert not (tmp_path / 'downloads.zip.part').exists()
@@ -0,0 +1,56 @@
+import json, os, re, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from modules import range_download
+
+DATA = bytes(range(256)) * 256  # 64 KB
+
+@pytest.fixture
+def server():
+    ranges = []
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a): pass
+        def _head(self, code, body, extra=()):
+            self.send_response(code)
+            self.send_header('Accept-Ranges', 'bytes'); self.send_header('Content-Length', str(len(body)))
+            for k, v in extra: self.send_header(k, v)
+            self.end_headers()
+        def do_HEAD(self): self._head(200, DATA)
+        def do_GET(self):
+            m = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+            if not m: self._head(200, DATA); self.wfile.write(DATA); return
+            start, end = int(m.group(1)), int(m.group(2) or len(DATA) - 1)
+            ranges.append((start, end))
+            body = DATA[start:end + 1]
+            self._head(206, body, [('Content-Range', f'bytes {start}-{end}/{len(DATA)}')]); self.wfile.write(body)
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{srv.server_address[1]}/reads.fastq.gz', ranges
+    srv.shutdown(); srv.server_close()
+
+def test_segmented_resume_from_sidecar(server, tmp_path, monkeypatch):
+    url, ranges = server
+    monkeypatch.setattr(range_download, 'MIN_SEGMENT', 8 * 1024)
+    path = str(tmp_path / 'reads.fastq.gz'); part = path + '.part'
+    # an earlier run got 1000 bytes of the first segment and all of the second
+    segments = range_download._plan(len(DATA), 4)
+    segments[0][2] = 1000; segments[1][2] = segments[1][1] - segments[1][0] + 1
+    buf = bytearray(len(DATA))
+    buf[:1000] = DATA[:1000]; buf[segments[1][0]:segments[1][1] + 1] = DATA[segments[1][0]:segments[1][1] + 1]
+    with open(part, 'wb') as f: f.write(buf)
+    with open(part + '.json', 'w') as f: json.dump({'url': url, 'size': len(DATA), 'segments': segments}, f)
+    range_download.download(url, path, segments=4)
+    assert open(path, 'rb').read() == DATA
+    assert not os.path.exists(part) and not os.path.exists(part + '.json')
+    assert sorted(ranges) == [(1000, segments[0][1]), (segments[2][0], segments[2][1]), (segments[3][0], segments[3][1])]
+
+def test_stale_sidecar_restarts(server, tmp_path, monkeypatch):
+    url, ranges = server
+    monkeypatch.setattr(range_download, 'MIN_SEGMENT', 8 * 1024)
+    path = str(tmp_path / 'reads.fastq.gz'); part = path + '.part'
+    with open(part, 'wb') as f: f.write(b'\xff' * len(DATA))
+    with open(part + '.json', 'w') as f:
+        json.dump({'url': url + '?old', 'size': len(DATA), 'segments': [[0, len(DATA) - 1, len(DATA)]]}, f)
+    range_download.download(url, path, segments=4)
+    assert open(path, 'rb').read() == DATA
+    assert sorted(s for s, _ in ranges) == [s for s, _, _ in range_download._plan(len(DATA), 4)]
@@ -0,0 +1,30 @@
+import os, subprocess, sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'metaphenomap_bench'))
+from mock_services import MockServer
+
+def _run(tmp_path, srv, *extra):
+    (tmp_path / 'in.txt').write_text('SRR1000001\n')
+    srv.state.reset()
+    cmd = [sys.executable, str(ROOT / 'metaphenomap_full' / 'metaphenomap.py'), '--db', 'sra', '--module', 'sample',
+           '-i', 'in.txt', '-o', 'out.jsonl', '--no-cache', '--download', 'fastq', '--verify', '--outdir', 'dl', *extra]
+    r = subprocess.run(cmd, cwd=tmp_path, env=dict(os.environ, METAPHENOMAP_ENDPOINTS=srv.env_value()),
+                       capture_output=True, text=True, timeout=120)
+    assert r.returncode == 0, r.stderr[-2000:]
+    return {k: v for k, v in srv.state.calls.items() if not k[1].startswith('/files/')}
+
+@pytest.fixture(scope='module')
+def srv():
+    with MockServer(file_size=20000) as s:
+        yield s
+
+def test_one_filereport_per_run_without_disk_cache(tmp_path, srv):
+    # metadata, FASTQ URL resolution and --verify all read the same filereport
+    assert _run(tmp_path, srv, '--batch-size', '1') == {('GET', '/ebi/ena/portal/api/filereport'): 1}
+
+def test_batch_mode_searches_read_runs_once(tmp_path, srv):
+    # the metadata fetch and FASTQ URL resolution share one read_run search per chunk
+    assert _run(tmp_path, srv) == {('POST', '/ebi/ena/portal/api/search'): 1, ('GET', '/ebi/ena/portal/api/filereport'): 1}
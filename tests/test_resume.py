@@ -0,0 +1,32 @@
+import os, subprocess, sys
+from pathlib import Path
+import pytest
+from modules import merge
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'metaphenomap_bench'))
+from mock_services import MockServer
+
+RUNS = ['SRR1000001', 'SRR1000002', 'SRR1000003']
+
+def _run(tmp_path, srv, output, *extra):
+    cmd = [sys.executable, str(ROOT / 'metaphenomap_full' / 'metaphenomap.py'), '--db', 'sra', '--module', 'sample',
+           '-i', 'in.txt', '-o', output, '--no-cache', *extra]
+    r = subprocess.run(cmd, cwd=tmp_path, env=dict(os.environ, METAPHENOMAP_ENDPOINTS=srv.env_value()),
+                       capture_output=True, text=True, timeout=120)
+    assert r.returncode == 0, r.stderr[-2000:]
+
+@pytest.mark.parametrize('output', ['out.csv', 'out.jsonl'])
+def test_resume_after_crash_mid_row(tmp_path, output):
+    (tmp_path / 'in.txt').write_text('\n'.join(RUNS) + '\n')
+    with MockServer(file_size=1000) as srv:
+        _run(tmp_path, srv, output)
+        out, journal = tmp_path / output, tmp_path / (output + '.journal')
+        # killed while writing the last row and the next journal entry
+        out.write_bytes(out.read_bytes()[:-15])
+        with open(journal, 'a') as f: f.write('{"accession": "SRR1000009", "sta')
+        _run(tmp_path, srv, output, '--resume')
+    rows = list(merge.read_rows(str(out)))
+    assert sorted(r['Accession'] for r in rows) == RUNS
+    assert all(r['Scientific_Name'] for r in rows)
+    assert all(ln.endswith('}') for ln in journal.read_text().splitlines())
@@ -0,0 +1,25 @@
+import pytest
+from modules import shard
+
+ACCS = [f'SRR{1000000 + i}' for i in range(500)] + [f'SAMN{i:08d}' for i in range(500)]
+
+def test_assignment_is_pinned():
+    # Pinned values: changing the hash would silently re-shard jobs already split across nodes.
+    assert [shard.shard_of(a, 16) for a in ('SRR1234567', 'SAMN00000001', 'GCF_000005845.2')] == [11, 0, 2]
+
+def test_shards_partition_the_input():
+    parts = [shard.select(ACCS, i, 8) for i in range(8)]
+    assert sorted(a for p in parts for a in p) == sorted(ACCS)
+    assert all(len(p) > len(ACCS) / 8 / 2 for p in parts)  # roughly balanced
+    assert parts[3] == [a for a in ACCS if a in set(parts[3])]  # input order kept
+
+def test_normalized_accessions_share_a_shard():
+    assert shard.shard_of(' srr1234567\n', 16) == shard.shard_of('SRR1234567', 16)
+
+@pytest.mark.parametrize('spec', ['3', '4/4', '-1/4', 'a/b', '0/0'])
+def test_bad_specs(spec):
+    with pytest.raises(SystemExit):
+        shard.parse_shard(spec)
+
+def test_parse():
+    assert shard.parse_shard('2/16') == (2, 16)
@@ -0,0 +1,18 @@
+import os
+from modules.store import ContentStore
+
+def test_rewriting_a_linked_file_leaves_the_store_intact(tmp_path):
+    store = ContentStore(str(tmp_path / 'store'))
+    first = tmp_path / 'out' / 'A' / 'reads.fastq.gz'; first.parent.mkdir(parents=True)
+    first.write_bytes(b'original')
+    stored = store.ingest(str(first), 'ab' * 16)
+    linked = store.link_into('ab' * 16, str(tmp_path / 'out' / 'B' / 'reads.fastq.gz'))
+    assert os.access(linked, os.W_OK)  # modes are left alone: tools may rewrite the outdir file
+    ContentStore.detach(linked)
+    with open(linked, 'wb') as f: f.write(b'rewritten')
+    assert open(stored, 'rb').read() == b'original'
+
+def test_detach_keeps_unlinked_files(tmp_path):
+    p = tmp_path / 'x'; p.write_bytes(b'partial')
+    ContentStore.detach(str(p)); ContentStore.detach(str(tmp_path / 'missing'))
+    assert p.read_bytes() == b'partial'  # a lone partial file is kept for -c resume
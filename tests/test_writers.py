@@ -0,0 +1,73 @@
+import random, threading
+import pytest
+from modules import merge, writers
+
+ROWS = [{'Accession': 'A', 'Genome_Length': 5000000, 'GC_Content': 50.7, '_downloads': ['a.fq.gz'], 'custom': 'x'},
+        {'Accession': 'B', 'Host': 'Homo sapiens', '_error': None}]
+
+@pytest.mark.parametrize('name', ['out.csv', 'out.jsonl', 'out.parquet'])
+def test_sinks_round_trip(tmp_path, name):
+    if name.endswith('.parquet'): pytest.importorskip('pyarrow')
+    path = str(tmp_path / name)
+    sink = writers.open_sink(path)
+    for r in ROWS: sink.write(r)
+    sink.close()
+    rows = list(merge.read_rows(path))
+    assert sink.rows == 2 and [r['Accession'] for r in rows] == ['A', 'B']
+    assert rows[0]['custom'] == 'x'  # unknown keys ride in _extra
+    assert rows[1]['Host'] == 'Homo sapiens'
+    assert str(rows[0]['Genome_Length']) == '5000000'
+
+def test_csv_append_checks_columns(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    writers.open_sink(path, columns=['Accession', '_extra']).close()
+    with pytest.raises(SystemExit):
+        writers.open_sink(path, append=True)
+    sink = writers.open_sink(path, columns=['Accession', '_extra'], append=True)
+    sink.write({'Accession': 'C'}); sink.close()
+    assert open(path).read().splitlines() == ['Accession,_extra', 'C,']
+
+def test_parquet_refuses_append(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'out.parquet')
+    writers.open_sink(path).close()
+    with pytest.raises(SystemExit):
+        writers.open_sink(path, append=True)
+
+def test_reorder_buffer_emits_in_input_order():
+    out = []
+    buf = writers.ReorderBuffer(out.append)
+    order = list(range(200)); random.Random(1).shuffle(order)
+    threads = [threading.Thread(target=buf.put, args=(i, i)) for i in order]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert out == list(range(200))
+
+def test_reorder_buffer_window_blocks_producer():
+    out = []
+    buf = writers.ReorderBuffer(out.append, window=2)
+    buf.put(1, 'b'); buf.wait(1)  # one row ahead of index 0: fine
+    released = threading.Event()
+    t = threading.Thread(target=lambda: (buf.wait(2), released.set())); t.start()
+    assert not released.wait(0.1)  # two rows ahead: blocked until row 0 lands
+    buf.put(0, 'a'); t.join(1)
+    assert released.is_set() and out == ['a', 'b']
+
+@pytest.mark.parametrize('name', ['out.csv', 'out.jsonl'])
+def test_append_after_crash_drops_torn_last_line(tmp_path, name):
+    path = str(tmp_path / name)
+    sink = writers.open_sink(path)
+    sink.write(ROWS[0]); sink.close()
+    with open(path, 'a') as f: f.write('B,Homo sap' if name.endswith('.csv') else '{"Accession": "B", "Ho')  # killed mid-row
+    sink = writers.open_sink(path, append=True)
+    sink.write(ROWS[1]); sink.close()
+    rows = list(merge.read_rows(path))
+    assert [r['Accession'] for r in rows] == ['A', 'B'] and rows[1]['Host'] == 'Homo sapiens'
+
+def test_trim_torn_tail(tmp_path):
+    path = tmp_path / 'f'
+    path.write_bytes(b'one\n' + b'x' * 100)
+    assert writers.trim_torn_tail(str(path), block=7) == 100 and path.read_bytes() == b'one\n'
+    assert writers.trim_torn_tail(str(path)) == 0 and path.read_bytes() == b'one\n'
+    path.write_bytes(b'no newline at all')
+    assert writers.trim_torn_tail(str(path)) == 17 and path.read_bytes() == b''